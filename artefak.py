@@ -0,0 +1,282 @@
+"""
+Bundle artefak model untuk cold start yang cepat.
+
+Bundle berisi booster XGBoost dalam format native UBJSON dan tabel encoder
+dalam JSON biasa, sehingga bisa dimuat tanpa unpickle objek scikit-learn
+atau category_encoders. Bangun bundle dari file joblib dengan:
+
+    python artefak.py bangun
+
+dan lihat rincian waktu import/muat dengan:
+
+    python artefak.py waktu            # jalur bundle
+    python artefak.py waktu joblib     # jalur joblib lama, sebagai pembanding
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import metrik
+
+DIREKTORI_BUNDLE = "bundle_model"
+VERSI_FORMAT = 1
+FILE_MODEL = "model.ubj"
+FILE_FITUR = "fitur.json"
+FILE_MANIFEST = "manifest.json"
+# Sketsa referensi input untuk monitor drift (`drift.py`), opsional
+FILE_REFERENSI = "referensi_drift.json"
+# Evaluator pohon NumPy (`pohon.PrediktorPohon`) untuk batch kecil, opsional
+POHON_NUMPY = os.environ.get("HOTEL_POHON_NUMPY", "0") == "1"
+
+# Rincian waktu (detik) per tahap import/muat, diisi selama proses berjalan
+WAKTU_MUAT = {}
+
+# Booking bawaan dari form prediksi, dipakai untuk prediksi pemanasan
+INPUT_BAWAAN = {
+    "hotel": "City Hotel", "is_canceled": 0, "lead_time": 30,
+    "arrival_date_month": 1, "arrival_date_day_of_month": 15,
+    "stays_in_weekend_nights": 1, "stays_in_week_nights": 2,
+    "adults": 2, "children": 0, "babies": 0, "country": "IDN",
+    "market_segment": "Online TA", "is_repeated_guest": 0,
+    "previous_cancellations": 0, "previous_bookings_not_canceled": 0,
+    "reserved_room_type": "A", "assigned_room_type": "A", "booking_changes": 0,
+    "agent": 0, "days_in_waiting_list": 0, "distribution_channel": "TA/TO",
+    "deposit_type": "No Deposit", "customer_type": "Transient",
+    "arrival_day_of_week": "Monday", "meal": "BB",
+    "required_car_parking_spaces": 0, "total_of_special_requests": 0,
+    "arrival_month": 1,
+}
+
+
+class catat_waktu:
+    """Context manager yang mencatat durasi sebuah tahap ke `WAKTU_MUAT`."""
+
+    def __init__(self, tahap):
+        self.tahap = tahap
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        durasi = time.perf_counter() - self.mulai
+        WAKTU_MUAT[self.tahap] = WAKTU_MUAT.get(self.tahap, 0.0) + durasi
+        metrik.amati("hotel_muat_artefak_detik", durasi, tahap=self.tahap)
+        return False
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blok in iter(lambda: f.read(1 << 20), b""):
+            h.update(blok)
+    return h.hexdigest()
+
+
+class Bundle:
+    """Booster, daftar kolom dan encoder terkompilasi yang dimuat dari bundle."""
+
+    def __init__(self, booster, encoder, manifest, referensi_drift=None):
+        self.booster = booster
+        self.encoder = encoder
+        self.model_columns = encoder.model_columns
+        self.manifest = manifest
+        self.versi = manifest["versi"]
+        self.referensi_drift = referensi_drift
+        self.pohon = None
+
+    def aktifkan_pohon_numpy(self):
+        """Memakai `pohon.PrediktorPohon` untuk batch sampai `pohon.MAKS_BARIS` baris."""
+        import pohon
+        with catat_waktu("ekspor_pohon"):
+            self.pohon = pohon.PrediktorPohon.dari_booster(self.booster)
+        self.maks_baris_pohon = pohon.MAKS_BARIS
+
+    def prediksi_log(self, fitur):
+        """Prediksi log1p(ADR) untuk matriks fitur hasil `encoder.transform`."""
+        if self.pohon is not None and len(fitur) <= self.maks_baris_pohon:
+            with metrik.ukur("hotel_prediksi_tahap_detik", tahap="predict", jalur="pohon_numpy"):
+                return self.pohon.prediksi_margin(fitur)
+        with metrik.ukur("hotel_prediksi_tahap_detik", tahap="predict", jalur="terkompilasi"):
+            return self.booster.inplace_predict(fitur)
+
+    def prediksi(self, data):
+        """Prediksi ADR untuk `data` (DataFrame atau dict berisi kolom)."""
+        log_adr = self.prediksi_log(self.encoder.transform(data))
+        with metrik.ukur("hotel_prediksi_tahap_detik", tahap="expm1", jalur="terkompilasi"):
+            return np.expm1(log_adr)
+
+    def pemanasan(self):
+        """Satu prediksi dengan `INPUT_BAWAAN` agar request pertama tidak menanggung inisialisasi."""
+        with catat_waktu("pemanasan"):
+            return self.prediksi({k: [v] for k, v in INPUT_BAWAAN.items()})[0]
+
+
+def simpan_bundle(booster, encoder, direktori=DIREKTORI_BUNDLE, info=None, referensi=None):
+    """
+    Menulis `booster` (xgboost.Booster) dan `encoder` (EncoderTerkompilasi)
+    sebagai bundle di `direktori`, beserta `referensi` drift jika ada. Versi
+    bundle adalah hash isi file model dan fitur.
+    """
+    os.makedirs(direktori, exist_ok=True)
+    booster.save_model(os.path.join(direktori, FILE_MODEL))
+    fitur = {
+        "model_columns": encoder.model_columns,
+        "tabel_target": encoder.tabel_target,
+        "prior_target": encoder.prior_target,
+        "kolom_log": encoder.kolom_log,
+        "scaler_mean": None if encoder.scaler_mean is None else encoder.scaler_mean.tolist(),
+        "scaler_scale": None if encoder.scaler_scale is None else encoder.scaler_scale.tolist(),
+    }
+    with open(os.path.join(direktori, FILE_FITUR), "w") as f:
+        json.dump(fitur, f, indent=1)
+
+    checksum = {nama: _sha256(os.path.join(direktori, nama)) for nama in (FILE_MODEL, FILE_FITUR)}
+    manifest = {
+        "versi_format": VERSI_FORMAT,
+        "versi": hashlib.sha256("".join(checksum.values()).encode()).hexdigest()[:12],
+        "checksum": checksum,
+        "dibuat": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **(info or {}),
+    }
+    if referensi is not None:
+        return pasang_referensi_drift(direktori, referensi, manifest)
+    with open(os.path.join(direktori, FILE_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def pasang_referensi_drift(direktori, referensi, manifest=None):
+    """
+    Menulis `referensi` drift (dict, lihat `drift.PembangunReferensi`) ke
+    bundle di `direktori` dan menambahkan checksum-nya ke manifest. Versi
+    bundle tidak berubah karena model dan fiturnya sama.
+    """
+    if manifest is None:
+        manifest = baca_manifest(direktori)
+    with open(os.path.join(direktori, FILE_REFERENSI), "w") as f:
+        json.dump(referensi, f, separators=(",", ":"))
+    manifest = dict(manifest, checksum=dict(manifest["checksum"],
+                                            **{FILE_REFERENSI: _sha256(os.path.join(direktori, FILE_REFERENSI))}))
+    # Manifest diganti secara atomik agar pembaca tidak melihat checksum setengah jadi
+    sementara = os.path.join(direktori, FILE_MANIFEST + ".tmp")
+    with open(sementara, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(sementara, os.path.join(direktori, FILE_MANIFEST))
+    return manifest
+
+
+def bundle_dari_joblib(model_path="xgboost_model.joblib", columns_path="model_columns.joblib",
+                       encoder_path="target_encoder.joblib"):
+    """Memuat tiga file joblib hasil notebook (jalur lama, perlu unpickle) sebagai `Bundle`."""
+    with catat_waktu("import_joblib"):
+        import joblib
+    from encoder import EncoderTerkompilasi
+
+    with catat_waktu("muat_model"):
+        model = joblib.load(model_path)
+    with catat_waktu("muat_encoder"):
+        model_columns = joblib.load(columns_path)
+        target_encoder = joblib.load(encoder_path)
+        encoder = EncoderTerkompilasi.dari_artefak(model_columns, target_encoder)
+    # Versi = sidik isi ketiga file, sama seperti bundle
+    sidik = "".join(_sha256(path) for path in (model_path, columns_path, encoder_path))
+    manifest = {"versi_format": VERSI_FORMAT,
+                "versi": "joblib-" + hashlib.sha256(sidik.encode()).hexdigest()[:12],
+                "sumber": [model_path, columns_path, encoder_path]}
+    return Bundle(model.get_booster(), encoder, manifest)
+
+
+def bangun_bundle(direktori=DIREKTORI_BUNDLE, **path_joblib):
+    """Mengonversi tiga file joblib hasil notebook menjadi bundle di `direktori`."""
+    bundle = bundle_dari_joblib(**path_joblib)
+    return simpan_bundle(bundle.booster, bundle.encoder, direktori,
+                         info={"sumber": bundle.manifest["sumber"]})
+
+
+def baca_manifest(direktori=DIREKTORI_BUNDLE, verifikasi=True):
+    """
+    Manifest bundle di `direktori`. Jika `verifikasi`, checksum setiap file
+    dicocokkan dengan manifest (ValueError jika berbeda).
+    """
+    with open(os.path.join(direktori, FILE_MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("versi_format") != VERSI_FORMAT:
+        raise ValueError(f"Versi format bundle {manifest.get('versi_format')} tidak didukung.")
+    if verifikasi:
+        for nama, checksum in manifest["checksum"].items():
+            if _sha256(os.path.join(direktori, nama)) != checksum:
+                raise ValueError(f"Checksum '{nama}' di bundle '{direktori}' tidak cocok.")
+    return manifest
+
+
+def muat_bundle(direktori=DIREKTORI_BUNDLE, verifikasi=True):
+    """
+    Memuat bundle dari `direktori` tanpa unpickle. Jika `verifikasi`,
+    checksum setiap file dicocokkan dengan manifest.
+    """
+    with catat_waktu("muat_manifest"):
+        manifest = baca_manifest(direktori, verifikasi)
+
+    with catat_waktu("import_xgboost"):
+        import xgboost as xgb
+    from encoder import EncoderTerkompilasi
+
+    with catat_waktu("muat_model"):
+        booster = xgb.Booster(model_file=os.path.join(direktori, FILE_MODEL))
+    with catat_waktu("muat_encoder"):
+        with open(os.path.join(direktori, FILE_FITUR)) as f:
+            fitur = json.load(f)
+        encoder = EncoderTerkompilasi(
+            fitur["model_columns"], fitur["tabel_target"], fitur["prior_target"],
+            kolom_log=fitur["kolom_log"], scaler_mean=fitur["scaler_mean"],
+            scaler_scale=fitur["scaler_scale"])
+    referensi = None
+    if FILE_REFERENSI in manifest["checksum"]:
+        with catat_waktu("muat_referensi"):
+            with open(os.path.join(direktori, FILE_REFERENSI)) as f:
+                referensi = json.load(f)
+    return Bundle(booster, encoder, manifest, referensi)
+
+
+def muat_artefak(direktori=DIREKTORI_BUNDLE):
+    """
+    Memuat bundle jika `direktori` ada, jika tidak kembali ke file joblib.
+    Dengan `HOTEL_POHON_NUMPY=1`, batch kecil diskor dengan evaluator NumPy.
+    """
+    bundle = muat_bundle(direktori) if os.path.isdir(direktori) else bundle_dari_joblib()
+    if POHON_NUMPY:
+        bundle.aktifkan_pohon_numpy()
+    metrik.log_json("artefak_dimuat", versi=bundle.versi, waktu_ms=laporan_waktu())
+    return bundle
+
+
+def laporan_waktu():
+    """Rincian waktu import/muat (milidetik) yang tercatat di proses ini."""
+    return {tahap: round(detik * 1000, 2) for tahap, detik in WAKTU_MUAT.items()}
+
+
+def _ukur_cold_start(direktori):
+    """
+    Mengukur cold start di proses ini (jalankan di proses baru). `direktori`
+    bernilai "joblib" mengukur jalur lama sebagai pembanding.
+    """
+    with catat_waktu("total"):
+        bundle = bundle_dari_joblib() if direktori == "joblib" else muat_bundle(direktori)
+        bundle.pemanasan()
+    return {"versi": bundle.versi, "waktu_ms": laporan_waktu()}
+
+
+if __name__ == "__main__":
+    perintah = sys.argv[1] if len(sys.argv) > 1 else "waktu"
+    direktori = sys.argv[2] if len(sys.argv) > 2 else DIREKTORI_BUNDLE
+    if perintah == "bangun":
+        print(json.dumps(bangun_bundle(direktori), indent=1))
+    elif perintah == "waktu":
+        print(json.dumps(_ukur_cold_start(direktori), indent=1))
+    else:
+        sys.exit(f"Perintah tidak dikenal: {perintah} (pilihan: bangun, waktu)")
@@ -0,0 +1,282 @@
+"""
+Benchmark offline untuk jalur prediksi dan dashboard EDA.
+
+Mengukur latensi prediksi satu baris (persentil), throughput batch, waktu
+predict evaluator pohon NumPy dibanding XGBoost, waktu import/muat artefak
+(di proses baru) dan waktu filter + agregasi EDA pada beberapa skala data
+sintetis (`data_sintetis`). Hasil ditulis sebagai JSON dan bisa
+dibandingkan dengan baseline yang disimpan sebelumnya:
+
+    python benchmark.py --keluaran benchmark_baseline.json
+    python benchmark.py --bandingkan benchmark_baseline.json --toleransi 0.15
+
+Mode perbandingan keluar dengan kode 1 jika ada metrik yang memburuk lebih
+dari toleransi, sehingga bisa dipakai sebagai gerbang di CI.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import artefak
+import data_sintetis
+from cache_prediksi import CachePrediksi
+from pohon import PrediktorPohon
+
+SKALA = {
+    "penuh": {"batch": [1_000, 100_000, 1_000_000], "eda": [100_000, 1_000_000], "tunggal": 2_000, "cold_start": 5,
+              "pohon": [1, 16, 1024]},
+    "cepat": {"batch": [1_000, 100_000], "eda": [10_000, 100_000], "tunggal": 500, "cold_start": 2,
+              "pohon": [1, 16, 1024]},
+}
+# Arah metrik: "rendah" = makin kecil makin baik (waktu), "tinggi" = makin besar makin baik (throughput)
+RENDAH, TINGGI = "rendah", "tinggi"
+
+
+def _metrik(nilai, satuan, arah=RENDAH):
+    return {"nilai": round(float(nilai), 4), "satuan": satuan, "arah": arah}
+
+
+def _ulang(fungsi, minimal_detik=0.5, minimal_ulang=3):
+    """Menjalankan `fungsi` berulang (minimal sekian kali dan sekian detik); mengembalikan durasi tiap panggilan."""
+    durasi = []
+    mulai = time.perf_counter()
+    while len(durasi) < minimal_ulang or time.perf_counter() - mulai < minimal_detik:
+        t = time.perf_counter()
+        fungsi()
+        durasi.append(time.perf_counter() - t)
+    return np.array(durasi)
+
+
+def _persentil(nama, durasi_detik):
+    ms = np.asarray(durasi_detik) * 1000
+    return {f"{nama}_p{p}_ms": _metrik(np.percentile(ms, p), "ms") for p in (50, 90, 99)}
+
+
+def ukur_prediksi_tunggal(bundle, n_request):
+    """Latensi satu booking seperti submit form: cache miss (encode + predict) dan cache hit."""
+    data = data_sintetis.buat_booking(n_request, seed=1)
+    daftar = [data_sintetis.baris_booking(data, i) for i in range(n_request)]
+    hitung = lambda baris: bundle.prediksi({k: [b[k] for b in baris] for k in baris[0]}).tolist()
+
+    cache = CachePrediksi(maks_entri=n_request)
+    miss, hit = [], []
+    for baris in daftar:
+        t = time.perf_counter()
+        cache.ambil_atau_hitung(bundle.versi, [baris], hitung)
+        miss.append(time.perf_counter() - t)
+    for baris in daftar:
+        t = time.perf_counter()
+        cache.ambil_atau_hitung(bundle.versi, [baris], hitung)
+        hit.append(time.perf_counter() - t)
+    return {**_persentil("tunggal", miss), **_persentil("tunggal_cache_hit", hit)}
+
+
+def ukur_batch(bundle, ukuran):
+    """Throughput encode + predict untuk satu batch berisi `ukuran` baris."""
+    data = data_sintetis.buat_booking(ukuran, seed=2)
+    fitur = bundle.encoder.transform(data)
+    encode = _ulang(lambda: bundle.encoder.transform(data), minimal_ulang=1)
+    predict = _ulang(lambda: bundle.prediksi_log(fitur), minimal_ulang=1)
+    total = np.median(encode) + np.median(predict)
+    return {
+        f"batch_{ukuran}_encode_ms": _metrik(np.median(encode) * 1000, "ms"),
+        f"batch_{ukuran}_predict_ms": _metrik(np.median(predict) * 1000, "ms"),
+        f"batch_{ukuran}_baris_per_detik": _metrik(ukuran / total, "baris/s", TINGGI),
+    }
+
+
+def ukur_pohon(bundle, prediktor, ukuran):
+    """Waktu predict untuk `ukuran` baris: DMatrix + predict, inplace_predict, dan evaluator NumPy."""
+    import xgboost as xgb
+    fitur = bundle.encoder.transform(data_sintetis.buat_booking(ukuran, seed=3))
+    jalur = {
+        "dmatrix": lambda: bundle.booster.predict(xgb.DMatrix(fitur)),
+        "inplace": lambda: bundle.booster.inplace_predict(fitur),
+        "numpy": lambda: prediktor.prediksi_margin(fitur),
+    }
+    return {f"pohon_{ukuran}_{nama}_ms": _metrik(np.median(_ulang(fungsi, minimal_detik=0.2)) * 1000, "ms")
+            for nama, fungsi in jalur.items()}
+
+
+def ukur_cold_start(direktori, ulang):
+    """Median waktu import/muat per tahap dari `python artefak.py waktu` di proses baru."""
+    hasil = []
+    for _ in range(ulang):
+        keluaran = subprocess.run([sys.executable, "artefak.py", "waktu", direktori], check=True,
+                                  capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        hasil.append(json.loads(keluaran.stdout)["waktu_ms"])
+    nama = "joblib" if direktori == "joblib" else "bundle"
+    return {f"muat_{nama}_{tahap}_ms": _metrik(np.median([h[tahap] for h in hasil]), "ms") for tahap in hasil[0]}
+
+
+def _filter_acak(opsi, rng):
+    """Kombinasi filter sidebar acak; None berarti semua nilai (seperti multiselect penuh)."""
+    filter_dimensi = {}
+    for kolom, nilai in opsi.items():
+        if rng.random() < 0.4:
+            filter_dimensi[kolom] = None
+        else:
+            jumlah = rng.integers(1, len(nilai) + 1)
+            filter_dimensi[kolom] = [nilai[i] for i in rng.choice(len(nilai), jumlah, replace=False)]
+    return filter_dimensi
+
+
+def ukur_eda(n_baris, direktori):
+    """
+    Waktu dashboard EDA untuk `n_baris` booking sintetis: konversi CSV ke
+    Arrow, scan penuh + bangun kubus (sekali per proses), dan filter +
+    agregasi per interaksi sidebar (dari kubus dan dengan pushdown scan).
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    import dataset
+    import eda
+
+    path_csv = os.path.join(direktori, f"booking_{n_baris}.csv")
+    path_arrow = os.path.join(direktori, f"booking_{n_baris}.arrow")
+    pacsv.write_csv(pa.Table.from_pandas(data_sintetis.buat_dataset_eda(n_baris, seed=3), preserve_index=False),
+                    path_csv)
+
+    t = time.perf_counter()
+    dataset.konversi_csv(path_csv, path_arrow)
+    waktu_konversi = time.perf_counter() - t
+
+    sumber = dataset.buka(path_arrow, path_csv)
+    t = time.perf_counter()
+    tabel = dataset.scan(sumber, eda.KOLOM_DASHBOARD)
+    kubus = eda.bangun_kubus(tabel)
+    waktu_kubus = time.perf_counter() - t
+    opsi = {kolom: tabel[kolom].unique().to_pylist()
+            for kolom in ['hotel', 'market_segment', 'customer_type', 'arrival_month']}
+
+    rng = np.random.default_rng(4)
+    daftar_filter = [_filter_acak(opsi, rng) for _ in range(50)]
+
+    def dari_kubus(filter_dimensi):
+        terpilih = eda.filter_kubus(kubus, **filter_dimensi)
+        for kolom in ('arrival_month', 'arrival_day_of_week', 'market_segment'):
+            eda._rata_adr(terpilih, kolom)
+        return terpilih['jumlah'].sum(), terpilih['jumlah_batal'].sum()
+
+    def dengan_pushdown(filter_dimensi):
+        df = dataset.scan(sumber, eda.KOLOM_DASHBOARD, **filter_dimensi).to_pandas()
+        return df.groupby('arrival_month', observed=True)['adr'].mean()
+
+    durasi_kubus, durasi_scan = [], []
+    for filter_dimensi in daftar_filter:
+        t = time.perf_counter()
+        dari_kubus(filter_dimensi)
+        durasi_kubus.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        dengan_pushdown(filter_dimensi)
+        durasi_scan.append(time.perf_counter() - t)
+
+    return {
+        f"eda_{n_baris}_konversi_ms": _metrik(waktu_konversi * 1000, "ms"),
+        f"eda_{n_baris}_scan_kubus_ms": _metrik(waktu_kubus * 1000, "ms"),
+        f"eda_{n_baris}_filter_kubus_p50_ms": _metrik(np.percentile(durasi_kubus, 50) * 1000, "ms"),
+        f"eda_{n_baris}_filter_kubus_p90_ms": _metrik(np.percentile(durasi_kubus, 90) * 1000, "ms"),
+        f"eda_{n_baris}_filter_pushdown_p50_ms": _metrik(np.percentile(durasi_scan, 50) * 1000, "ms"),
+        f"eda_{n_baris}_filter_pushdown_p90_ms": _metrik(np.percentile(durasi_scan, 90) * 1000, "ms"),
+    }
+
+
+def jalankan(skala="penuh", direktori_bundle=artefak.DIREKTORI_BUNDLE, log=print):
+    """Menjalankan seluruh benchmark dan mengembalikan dict `{"meta": ..., "metrik": ...}`."""
+    konfigurasi = SKALA[skala]
+    bundle = artefak.muat_artefak(direktori_bundle)
+    bundle.pemanasan()
+    metrik = {}
+
+    log("Latensi prediksi satu baris...")
+    metrik.update(ukur_prediksi_tunggal(bundle, konfigurasi["tunggal"]))
+    for ukuran in konfigurasi["batch"]:
+        log(f"Throughput batch {ukuran} baris...")
+        metrik.update(ukur_batch(bundle, ukuran))
+    prediktor = PrediktorPohon.dari_booster(bundle.booster)
+    for ukuran in konfigurasi["pohon"]:
+        log(f"Evaluator pohon {ukuran} baris...")
+        metrik.update(ukur_pohon(bundle, prediktor, ukuran))
+    log("Cold start (proses baru)...")
+    for direktori in (direktori_bundle, "joblib"):
+        metrik.update(ukur_cold_start(direktori, konfigurasi["cold_start"]))
+    with tempfile.TemporaryDirectory() as sementara:
+        for n_baris in konfigurasi["eda"]:
+            log(f"EDA {n_baris} baris...")
+            metrik.update(ukur_eda(n_baris, sementara))
+
+    import pandas as pd
+    import pyarrow as pa
+    import xgboost as xgb
+    meta = {
+        "waktu": datetime.datetime.now().isoformat(timespec="seconds"),
+        "skala": skala,
+        "versi_model": bundle.versi,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu": os.cpu_count(),
+        "numpy": np.__version__, "pandas": pd.__version__, "pyarrow": pa.__version__, "xgboost": xgb.__version__,
+    }
+    return {"meta": meta, "metrik": metrik}
+
+
+def bandingkan(hasil, baseline, toleransi=0.15, selisih_minimal_ms=0.5):
+    """
+    Membandingkan metrik `hasil` dengan `baseline`. Mengembalikan list baris
+    (nama, nilai_baseline, nilai_baru, perubahan_relatif, status) dengan
+    status "REGRESI", "LEBIH BAIK" atau "OK". Metrik waktu yang selisihnya
+    di bawah `selisih_minimal_ms` selalu OK (noise timer untuk tahap sub-milidetik).
+    """
+    baris = []
+    for nama, baru in hasil["metrik"].items():
+        lama = baseline["metrik"].get(nama)
+        if lama is None or not lama["nilai"]:
+            continue
+        perubahan = baru["nilai"] / lama["nilai"] - 1
+        # Perubahan dinyatakan sebagai "memburuk" positif untuk kedua arah metrik
+        memburuk = perubahan if baru["arah"] == RENDAH else -perubahan
+        status = "REGRESI" if memburuk > toleransi else "LEBIH BAIK" if memburuk < -toleransi else "OK"
+        if baru["satuan"] == "ms" and abs(baru["nilai"] - lama["nilai"]) < selisih_minimal_ms:
+            status = "OK"
+        baris.append((nama, lama["nilai"], baru["nilai"], perubahan, status))
+    return baris
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline prediksi dan EDA")
+    parser.add_argument("--skala", choices=sorted(SKALA), default="penuh")
+    parser.add_argument("--bundle", default=artefak.DIREKTORI_BUNDLE)
+    parser.add_argument("--keluaran", default="hasil_benchmark.json", help="file JSON hasil")
+    parser.add_argument("--bandingkan", help="file JSON baseline untuk deteksi regresi")
+    parser.add_argument("--toleransi", type=float, default=0.15, help="batas perubahan relatif (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    hasil = jalankan(args.skala, args.bundle)
+    with open(args.keluaran, "w") as f:
+        json.dump(hasil, f, indent=1)
+    print(f"Hasil ditulis ke {args.keluaran}")
+
+    if not args.bandingkan:
+        for nama, m in hasil["metrik"].items():
+            print(f"{nama:45s} {m['nilai']:>14,.3f} {m['satuan']}")
+        sys.exit(0)
+
+    with open(args.bandingkan) as f:
+        baseline = json.load(f)
+    baris = bandingkan(hasil, baseline, args.toleransi)
+    print(f"{'metrik':45s} {'baseline':>14s} {'baru':>14s} {'ubah':>8s}")
+    for nama, lama, baru, perubahan, status in baris:
+        print(f"{nama:45s} {lama:>14,.3f} {baru:>14,.3f} {perubahan:>+8.1%}  {status}")
+    regresi = [b[0] for b in baris if b[4] == "REGRESI"]
+    if regresi:
+        sys.exit(f"{len(regresi)} metrik memburuk lebih dari {args.toleransi:.0%}: {', '.join(regresi)}")
+    print("Tidak ada regresi.")
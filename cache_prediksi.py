@@ -0,0 +1,125 @@
+"""
+Cache hasil prediksi untuk booking yang (hampir) identik.
+
+Kunci cache adalah hash kanonik dari `input_dict` digabung sidik artefak
+model (`Bundle.versi`, hash isi model/kolom/encoder), sehingga mengganti
+model otomatis membuat entri lama tidak terpakai. Entri dibuang dengan LRU
+(ukuran maksimal) dan TTL. Satu instance dipakai bersama oleh semua sesi
+Streamlit dan request API di proses yang sama. Penjelasan prediksi
+(`penjelasan`) disimpan di cache yang sama dengan kunci turunan.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+TIDAK_ADA = object()
+
+
+def _normal(nilai):
+    """Menyamakan representasi nilai: bool/np.integer -> int, float bulat -> int."""
+    if isinstance(nilai, (bool, np.bool_, np.integer)):
+        return int(nilai)
+    if isinstance(nilai, (float, np.floating)):
+        nilai = float(nilai)
+        return int(nilai) if nilai.is_integer() else nilai
+    if isinstance(nilai, np.str_):
+        return str(nilai)
+    return nilai
+
+
+def kunci_kanonik(sidik_model, input_dict):
+    """Hash kanonik `input_dict` (urutan field dan tipe angka tidak berpengaruh) + sidik model."""
+    teks = json.dumps({kolom: _normal(nilai) for kolom, nilai in input_dict.items()},
+                      sort_keys=True, separators=(",", ":"))
+    return f"{sidik_model}:{hashlib.blake2b(teks.encode(), digest_size=16).hexdigest()}"
+
+
+def kunci_penjelasan(kunci, metode):
+    """Kunci entri penjelasan (metode `metode`) untuk input dengan kunci prediksi `kunci`."""
+    return f"{kunci}:penjelasan:{metode}"
+
+
+class CachePrediksi:
+    """Cache LRU + TTL yang aman dipakai dari banyak thread, dengan statistik hit/miss/eviksi."""
+
+    def __init__(self, maks_entri=50_000, ttl_detik=6 * 3600):
+        self.maks_entri = maks_entri
+        self.ttl_detik = ttl_detik
+        self._data = OrderedDict()
+        self._kunci = threading.Lock()
+        self._statistik = {"hit": 0, "miss": 0, "eviksi": 0, "kedaluwarsa": 0}
+
+    def ambil(self, kunci):
+        """Nilai untuk `kunci`, atau `TIDAK_ADA` jika belum ada/sudah kedaluwarsa."""
+        sekarang = time.monotonic()
+        with self._kunci:
+            entri = self._data.get(kunci)
+            if entri is not None:
+                nilai, kedaluwarsa = entri
+                if kedaluwarsa > sekarang:
+                    self._data.move_to_end(kunci)
+                    self._statistik["hit"] += 1
+                    return nilai
+                del self._data[kunci]
+                self._statistik["kedaluwarsa"] += 1
+            self._statistik["miss"] += 1
+            return TIDAK_ADA
+
+    def simpan(self, kunci, nilai):
+        with self._kunci:
+            self._data[kunci] = (nilai, time.monotonic() + self.ttl_detik)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks_entri:
+                self._data.popitem(last=False)
+                self._statistik["eviksi"] += 1
+
+    def ambil_atau_hitung(self, sidik_model, daftar_input, hitung):
+        """
+        Hasil untuk setiap dict di `daftar_input`. Input yang belum ada di
+        cache dihitung bersama dengan satu panggilan `hitung(list_input)`.
+        """
+        daftar_kunci = [kunci_kanonik(sidik_model, baris) for baris in daftar_input]
+        hasil = [self.ambil(kunci) for kunci in daftar_kunci]
+        indeks_miss = [i for i, nilai in enumerate(hasil) if nilai is TIDAK_ADA]
+        if indeks_miss:
+            baru = hitung([daftar_input[i] for i in indeks_miss])
+            for i, nilai in zip(indeks_miss, baru):
+                hasil[i] = nilai
+                self.simpan(daftar_kunci[i], nilai)
+        return hasil
+
+    def ambil_atau_hitung_penjelasan(self, sidik_model, daftar_input, metode, hitung):
+        """
+        Seperti `ambil_atau_hitung` untuk penjelasan (dict berisi "adr", lihat
+        `penjelasan.ke_dict`). Disimpan terpisah dari hasil prediksi biasa:
+        ADR dari jumlah kontribusi bisa sedikit berbeda dari `Bundle.prediksi`.
+        """
+        daftar_kunci = [kunci_kanonik(sidik_model, baris) for baris in daftar_input]
+        hasil = [self.ambil(kunci_penjelasan(kunci, metode)) for kunci in daftar_kunci]
+        indeks_miss = [i for i, nilai in enumerate(hasil) if nilai is TIDAK_ADA]
+        if indeks_miss:
+            baru = hitung([daftar_input[i] for i in indeks_miss])
+            for i, nilai in zip(indeks_miss, baru):
+                hasil[i] = nilai
+                self.simpan(kunci_penjelasan(daftar_kunci[i], metode), nilai)
+        return hasil
+
+    def kosongkan(self):
+        with self._kunci:
+            self._data.clear()
+
+    def statistik(self):
+        """Penghitung hit/miss/eviksi/kedaluwarsa, ukuran saat ini dan rasio hit."""
+        with self._kunci:
+            statistik = dict(self._statistik, ukuran=len(self._data), maks_entri=self.maks_entri)
+        total = statistik["hit"] + statistik["miss"]
+        statistik["rasio_hit"] = round(statistik["hit"] / total, 4) if total else 0.0
+        return statistik
+
+
+# Instance bersama untuk seluruh proses (semua sesi Streamlit dan request API)
+cache_hasil = CachePrediksi()
@@ -0,0 +1,112 @@
+"""
+Generator data booking sintetis untuk benchmark dan pengecekan offline.
+
+Domain kategori dan rentang angka mengikuti pilihan di form
+`prediksi.tampilkan_prediksi`; `buat_dataset_eda` menghasilkan skema yang
+sama dengan `hotel_booking_demand_cleaned.csv` yang dibaca `dataset.scan`
+untuk kubus EDA (`eda.load_kubus`).
+"""
+import numpy as np
+import pandas as pd
+
+from encoder import ORDINAL_HARI
+
+HOTEL = ["City Hotel", "Resort Hotel"]
+MEAL = ['BB', 'SC', 'HB', 'Undefined', 'FB']
+KAMAR_DIPESAN = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'L']
+KAMAR_DIBERIKAN = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'K', 'L']
+SEGMEN_PASAR = ['Online TA', 'Offline TA/TO', 'Direct', 'Groups', 'Corporate', 'Complementary', 'Aviation', 'Undefined']
+SALURAN_DISTRIBUSI = ['TA/TO', 'Direct', 'Corporate', 'GDS', 'Undefined']
+TIPE_DEPOSIT = ["No Deposit", "Non Refund", "Refundable"]
+TIPE_CUSTOMER = ["Transient", "Transient-Party", "Contract", "Group"]
+# Negara yang sering muncul di data training ditambah kode yang tidak dikenal encoder
+NEGARA = ["PRT", "GBR", "FRA", "ESP", "DEU", "ITA", "IRL", "BEL", "BRA", "NLD", "USA", "CHE", "IDN", "XYZ"]
+
+# Rentang angka (min, max inklusif) sesuai widget form
+RENTANG_ANGKA = {
+    "lead_time": (0, 709),
+    "stays_in_weekend_nights": (0, 7),
+    "stays_in_week_nights": (0, 14),
+    "adults": (1, 10),
+    "children": (0, 3),
+    "babies": (0, 2),
+    "previous_cancellations": (0, 26),
+    "previous_bookings_not_canceled": (0, 50),
+    "booking_changes": (0, 20),
+    "agent": (0, 535),
+    "days_in_waiting_list": (0, 391),
+    "total_of_special_requests": (0, 5),
+}
+
+
+def _tanggal_acak(n_baris, rng):
+    """Tanggal kedatangan acak dalam periode dataset asli (Jul 2015 - Agu 2017)."""
+    awal = np.datetime64("2015-07-01")
+    hari = rng.integers(0, (np.datetime64("2017-08-31") - awal).astype(int) + 1, n_baris)
+    return pd.DatetimeIndex(awal + hari.astype("timedelta64[D]"))
+
+
+def buat_booking(n_baris, seed=0):
+    """
+    Dict kolom berisi `n_baris` booking acak dengan field yang sama dengan
+    `input_dict` di form prediksi (siap untuk `prediksi_adr_batch`).
+    """
+    rng = np.random.default_rng(seed)
+    pilih = lambda nilai: rng.choice(np.array(nilai, dtype=object), n_baris)
+    tanggal = _tanggal_acak(n_baris, rng)
+    data = {kolom: rng.integers(bawah, atas + 1, n_baris) for kolom, (bawah, atas) in RENTANG_ANGKA.items()}
+    data.update({
+        "hotel": pilih(HOTEL),
+        "is_canceled": rng.integers(0, 2, n_baris),
+        "arrival_date_month": tanggal.month.to_numpy(),
+        "arrival_date_day_of_month": tanggal.day.to_numpy(),
+        "country": pilih(NEGARA),
+        "market_segment": pilih(SEGMEN_PASAR),
+        "is_repeated_guest": rng.integers(0, 2, n_baris),
+        "reserved_room_type": pilih(KAMAR_DIPESAN),
+        "assigned_room_type": pilih(KAMAR_DIBERIKAN),
+        "distribution_channel": pilih(SALURAN_DISTRIBUSI),
+        "deposit_type": pilih(TIPE_DEPOSIT),
+        "customer_type": pilih(TIPE_CUSTOMER),
+        "arrival_day_of_week": np.array(list(ORDINAL_HARI), dtype=object)[tanggal.dayofweek.to_numpy()],
+        "meal": pilih(MEAL),
+        "required_car_parking_spaces": rng.integers(0, 2, n_baris),
+        "arrival_month": tanggal.month.to_numpy(),
+    })
+    return data
+
+
+def baris_booking(data, i):
+    """Satu booking (dict skalar) dari hasil `buat_booking`, seperti `input_dict` form."""
+    return {kolom: nilai[i].item() if hasattr(nilai[i], "item") else nilai[i] for kolom, nilai in data.items()}
+
+
+def buat_dataset_eda(n_baris, seed=0):
+    """
+    DataFrame dengan skema `hotel_booking_demand_cleaned.csv` (kolom dan
+    urutan sama dengan hasil cleaning di notebook), termasuk `arrival_date`
+    dan `adr` yang dipakai dashboard EDA.
+    """
+    rng = np.random.default_rng(seed)
+    data = buat_booking(n_baris, seed=seed + 1)
+    tanggal = _tanggal_acak(n_baris, rng)
+    # ADR kasar: puncak di musim panas, Resort sedikit lebih murah
+    musim = 1 + 0.35 * np.sin((tanggal.month.to_numpy() - 4) / 12 * 2 * np.pi)
+    adr = rng.gamma(9, 11, n_baris) * musim * np.where(data["hotel"] == "Resort Hotel", 0.9, 1.0)
+    kolom_booking = ["hotel", "is_canceled", "lead_time", "stays_in_weekend_nights", "stays_in_week_nights",
+                     "adults", "children", "babies", "country", "market_segment", "is_repeated_guest",
+                     "previous_cancellations", "previous_bookings_not_canceled", "reserved_room_type",
+                     "assigned_room_type", "booking_changes", "agent", "days_in_waiting_list",
+                     "distribution_channel", "deposit_type", "customer_type"]
+    df = pd.DataFrame({kolom: data[kolom] for kolom in kolom_booking})
+    df["children"] = df["children"].astype(float)
+    df["agent"] = df["agent"].astype(float)
+    df["arrival_day_of_week"] = tanggal.day_name()
+    df["meal"] = data["meal"]
+    df["required_car_parking_spaces"] = data["required_car_parking_spaces"]
+    df["total_of_special_requests"] = data["total_of_special_requests"]
+    df["arrival_month"] = tanggal.month
+    df["arrival_date"] = tanggal.strftime("%Y-%m-%d")
+    df["arrival_week"] = tanggal.isocalendar().week.to_numpy()
+    df["adr"] = np.round(adr, 2)
+    return df
@@ -0,0 +1,99 @@
+"""
+Dataset booking dalam format kolumnar (Arrow IPC) untuk dashboard EDA.
+
+File Arrow IPC tanpa kompresi bisa di-memory-map sehingga dibaca zero-copy
+dan dibagi read-only oleh semua sesi. Kolom teks disimpan sebagai dictionary
+(kategori) dan kolom angka di-downcast ke tipe terkecil yang muat. Konversi
+CSV hasil notebook dengan:
+
+    python dataset.py konversi hotel_booking_demand_cleaned.csv hotel_booking_demand_cleaned.arrow
+"""
+import os
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+PATH_CSV = "hotel_booking_demand_cleaned.csv"
+PATH_ARROW = "hotel_booking_demand_cleaned.arrow"
+
+_TIPE_INT = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+
+def _ringkas_kolom(kolom):
+    """Dictionary-encode kolom teks dan downcast kolom angka tanpa mengubah nilainya."""
+    if pa.types.is_string(kolom.type) or pa.types.is_large_string(kolom.type):
+        kolom = kolom.dictionary_encode()
+        n_kategori = len(kolom.chunk(0).dictionary) if kolom.num_chunks else 0
+        indeks = next(t for t in _TIPE_INT if n_kategori <= np.iinfo(t.to_pandas_dtype()).max)
+        return kolom.cast(pa.dictionary(indeks, kolom.type.value_type))
+    if pa.types.is_floating(kolom.type) and kolom.null_count == 0 and len(kolom):
+        # Float yang semuanya bulat (mis. children, agent) disimpan sebagai int
+        if pc.all(pc.equal(kolom, pc.floor(kolom))).as_py():
+            kolom = pc.cast(kolom, pa.int64())
+    if pa.types.is_integer(kolom.type) and kolom.null_count == 0 and len(kolom):
+        rentang = pc.min_max(kolom)
+        minimum, maksimum = rentang["min"].as_py(), rentang["max"].as_py()
+        for tipe in _TIPE_INT:
+            info = np.iinfo(tipe.to_pandas_dtype())
+            if info.min <= minimum and maksimum <= info.max:
+                return kolom.cast(tipe)
+    return kolom
+
+
+def konversi_csv(path_csv=PATH_CSV, path_arrow=PATH_ARROW):
+    """Mengonversi CSV booking menjadi file Arrow IPC ringkas yang bisa di-memory-map."""
+    tabel = pacsv.read_csv(path_csv)
+    # dictionary_encode per chunk menghasilkan dictionary berbeda; satukan dulu
+    tabel = tabel.combine_chunks()
+    tabel = pa.table({nama: _ringkas_kolom(tabel[nama]) for nama in tabel.column_names})
+    sementara = path_arrow + ".tmp"
+    with pa.OSFile(sementara, "wb") as f, pa.ipc.new_file(f, tabel.schema) as penulis:
+        penulis.write_table(tabel)
+    os.replace(sementara, path_arrow)
+    return tabel.schema
+
+
+def buka(path_arrow=PATH_ARROW, path_csv=PATH_CSV):
+    """
+    Sumber data untuk `scan`: dataset Arrow yang di-memory-map jika file
+    kolumnar ada, jika tidak tabel in-memory dari CSV (dengan tipe ringkas).
+    """
+    if os.path.exists(path_arrow):
+        return ds.dataset(path_arrow, format="arrow", filesystem=pafs.LocalFileSystem(use_mmap=True))
+    tabel = pacsv.read_csv(path_csv).combine_chunks()
+    return ds.dataset(pa.table({nama: _ringkas_kolom(tabel[nama]) for nama in tabel.column_names}))
+
+
+def ekspresi_filter(**filter_dimensi):
+    """Ekspresi filter Arrow dari `kolom=[nilai, ...]`; None berarti semua nilai."""
+    ekspresi = None
+    for kolom, nilai in filter_dimensi.items():
+        if nilai is None:
+            continue
+        syarat = pc.field(kolom).isin(list(nilai))
+        ekspresi = syarat if ekspresi is None else ekspresi & syarat
+    return ekspresi
+
+
+def scan(sumber, kolom=None, **filter_dimensi):
+    """
+    Membaca hanya `kolom` dari `sumber` dengan filter di-push ke scan, misalnya
+    `scan(buka(), ['adr'], hotel=['City Hotel'], arrival_month=[7, 8])`.
+    Mengembalikan `pyarrow.Table`.
+    """
+    return sumber.to_table(columns=kolom, filter=ekspresi_filter(**filter_dimensi))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "konversi":
+        sys.exit("Penggunaan: python dataset.py konversi [path_csv] [path_arrow]")
+    path_csv = sys.argv[2] if len(sys.argv) > 2 else PATH_CSV
+    path_arrow = sys.argv[3] if len(sys.argv) > 3 else PATH_ARROW
+    print(konversi_csv(path_csv, path_arrow))
+    print(f"Ukuran: {os.path.getsize(path_csv) / 1e6:.1f} MB (CSV) -> "
+          f"{os.path.getsize(path_arrow) / 1e6:.1f} MB (Arrow IPC)")
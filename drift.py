@@ -0,0 +1,493 @@
+"""
+Monitor drift input prediksi dengan sketsa streaming berukuran tetap.
+
+Setiap field input (`artefak.INPUT_BAWAAN`) diringkas dengan sketsa:
+* numerik: `SketsaKuantil`, sketsa kuantil compactor (gaya KLL) yang bisa
+  digabung, memorinya O(k log(n/k)) berapa pun jumlah datanya;
+* kategorikal: `SketsaFrekuensi`, heavy hitter Space-Saving dengan
+  maksimal k penghitung.
+
+Sketsa referensi dibangun dari data training saat artefak dibuat
+(`latih.py`, `perbarui.py`, atau `python drift.py referensi` untuk bundle
+yang sudah ada) dan disimpan di bundle sebagai `referensi_drift.json`.
+Di aplikasi dan layanan API, `MonitorDrift` memperbarui sketsa yang sama
+untuk setiap request (beberapa mikrodetik per baris) dalam jendela
+bergulir, lalu PSI, KS, rasio nilai di luar rentang training dan rasio
+kategori yang tidak dikenal encoder model dibandingkan dengan referensi
+saat metrik dibaca (gauge `hotel_drift_*` di /metrics, rincian di
+`GET /drift`).
+
+    HOTEL_DRIFT=0                  matikan monitor
+    HOTEL_DRIFT_JENDELA=10000      jumlah baris per jendela
+
+    python drift.py referensi data/ --bundle bundle_model
+    python drift.py cek booking_baru.csv --bundle bundle_model
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+
+import numpy as np
+
+import artefak
+import metrik
+from encoder import ONE_HOT_DASAR, ONE_HOT_KATEGORI, ORDINAL_HARI
+
+AKTIF = os.environ.get("HOTEL_DRIFT", "1") != "0"
+JENDELA = int(os.environ.get("HOTEL_DRIFT_JENDELA", "10000"))
+VERSI_FORMAT = 1
+
+K_KUANTIL = 200
+K_FREKUENSI_REFERENSI = 1024
+K_FREKUENSI = 64
+# Bin PSI numerik: desil referensi; KS dievaluasi di persentil referensi
+KUANTIL_PSI = np.linspace(0.1, 0.9, 9)
+KUANTIL_KS = np.linspace(0.01, 0.99, 99)
+# Kategori referensi terbanyak yang menjadi bin PSI sendiri; sisanya "lainnya"
+MAKS_BIN_KATEGORI = 20
+MIN_BARIS_SKOR = 100
+# Di atas ukuran ini, batch diperbarui per kolom dengan NumPy
+MAKS_BARIS_LOOP = 64
+EPS_PSI = 1e-4
+
+KOLOM_KATEGORI = [kolom for kolom, nilai in artefak.INPUT_BAWAAN.items() if isinstance(nilai, str)]
+KOLOM_NUMERIK = [kolom for kolom, nilai in artefak.INPUT_BAWAAN.items() if not isinstance(nilai, str)]
+
+
+class SketsaKuantil:
+    """
+    Sketsa kuantil streaming: compactor dengan kapasitas `k` per level, item
+    di level h berbobot 2^h. Saat sebuah level penuh, isinya diurutkan dan
+    setengahnya (posisi ganjil atau genap, acak) naik ke level berikutnya,
+    sehingga jumlah bobot tetap sama dengan jumlah data. Galat rank sekitar
+    log2(n/k)/k.
+    """
+
+    def __init__(self, k=K_KUANTIL):
+        self.k = k
+        self.level = [[]]
+        self.n = 0
+        self.min = math.inf
+        self.maks = -math.inf
+        self._acak = random.Random(0)
+
+    def tambah(self, nilai):
+        if nilai != nilai:
+            # NaN tidak bisa diurutkan; sama seperti `tambah_banyak`, diabaikan
+            return
+        level0 = self.level[0]
+        level0.append(nilai)
+        self.n += 1
+        if nilai < self.min:
+            self.min = nilai
+        if nilai > self.maks:
+            self.maks = nilai
+        if len(level0) >= self.k:
+            self._padatkan()
+
+    def tambah_banyak(self, nilai):
+        """Menambahkan array nilai sekaligus (dipakai saat membangun referensi dan batch besar)."""
+        nilai = np.asarray(nilai, dtype=np.float64)
+        nilai = nilai[~np.isnan(nilai)]
+        if not len(nilai):
+            return
+        self.n += len(nilai)
+        self.min = min(self.min, float(nilai.min()))
+        self.maks = max(self.maks, float(nilai.max()))
+        self.level[0].extend(nilai.tolist())
+        self._padatkan()
+
+    def _padatkan(self):
+        h = 0
+        while h < len(self.level):
+            isi = self.level[h]
+            if len(isi) >= self.k:
+                isi.sort()
+                # Jumlah item genap yang dipadatkan; sisa satu item tetap di level ini
+                sisa = [isi.pop()] if len(isi) % 2 else []
+                naik = isi[self._acak.getrandbits(1)::2]
+                self.level[h] = sisa
+                if h + 1 == len(self.level):
+                    self.level.append([])
+                self.level[h + 1].extend(naik)
+            h += 1
+
+    def gabung(self, lain):
+        """Sketsa baru berisi data `self` dan `lain`."""
+        hasil = SketsaKuantil(self.k)
+        for sumber in (self, lain):
+            for h, isi in enumerate(sumber.level):
+                while len(hasil.level) <= h:
+                    hasil.level.append([])
+                hasil.level[h].extend(isi)
+        hasil.n = self.n + lain.n
+        hasil.min, hasil.maks = min(self.min, lain.min), max(self.maks, lain.maks)
+        hasil._padatkan()
+        return hasil
+
+    def _item_berbobot(self):
+        item = np.concatenate([np.asarray(isi, dtype=np.float64) for isi in self.level])
+        bobot = np.concatenate([np.full(len(isi), 2.0 ** h) for h, isi in enumerate(self.level)])
+        urutan = np.argsort(item, kind="stable")
+        return item[urutan], np.cumsum(bobot[urutan])
+
+    def cdf(self, titik):
+        """Perkiraan P(X <= t) untuk setiap t di `titik`."""
+        if not self.n:
+            return np.zeros(len(titik))
+        item, kumulatif = self._item_berbobot()
+        indeks = np.searchsorted(item, titik, side="right")
+        return np.where(indeks > 0, kumulatif[np.maximum(indeks - 1, 0)], 0.0) / kumulatif[-1]
+
+    def kuantil(self, q):
+        """Perkiraan kuantil `q` (array di [0, 1])."""
+        item, kumulatif = self._item_berbobot()
+        indeks = np.searchsorted(kumulatif, np.asarray(q) * kumulatif[-1], side="left")
+        return item[np.minimum(indeks, len(item) - 1)]
+
+    def ke_dict(self):
+        return {"k": self.k, "n": self.n, "min": self.min, "maks": self.maks, "level": self.level}
+
+    @classmethod
+    def dari_dict(cls, data):
+        sketsa = cls(data["k"])
+        sketsa.n, sketsa.min, sketsa.maks = data["n"], data["min"], data["maks"]
+        sketsa.level = [list(isi) for isi in data["level"]]
+        return sketsa
+
+
+class SketsaFrekuensi:
+    """
+    Heavy hitter Space-Saving: maksimal `k` penghitung. Nilai baru saat
+    penuh menggantikan penghitung terkecil dan mewarisi hitungannya, sehingga
+    hitungan dugaan berlebih paling banyak n/k.
+    """
+
+    def __init__(self, k=K_FREKUENSI):
+        self.k = k
+        self.hitungan = {}
+        self.n = 0
+
+    def tambah(self, nilai, jumlah=1):
+        self.n += jumlah
+        hitungan = self.hitungan
+        if nilai in hitungan:
+            hitungan[nilai] += jumlah
+        elif len(hitungan) < self.k:
+            hitungan[nilai] = jumlah
+        else:
+            terkecil = min(hitungan, key=hitungan.get)
+            hitungan[nilai] = hitungan.pop(terkecil) + jumlah
+
+    def gabung(self, lain):
+        hasil = SketsaFrekuensi(max(self.k, lain.k))
+        gabungan = dict(self.hitungan)
+        for nilai, jumlah in lain.hitungan.items():
+            gabungan[nilai] = gabungan.get(nilai, 0) + jumlah
+        hasil.hitungan = dict(sorted(gabungan.items(), key=lambda item: -item[1])[:hasil.k])
+        hasil.n = self.n + lain.n
+        return hasil
+
+    def teratas(self, n=None):
+        return sorted(self.hitungan.items(), key=lambda item: -item[1])[:n]
+
+    def ke_dict(self):
+        return {"k": self.k, "n": self.n, "hitungan": self.hitungan}
+
+    @classmethod
+    def dari_dict(cls, data):
+        sketsa = cls(data["k"])
+        sketsa.n, sketsa.hitungan = data["n"], dict(data["hitungan"])
+        return sketsa
+
+
+class PembangunReferensi:
+    """Sketsa referensi per field input dari chunk DataFrame training (lihat `latih.hitung_statistik`)."""
+
+    def __init__(self, referensi=None):
+        if referensi is not None:
+            self.numerik = {f: SketsaKuantil.dari_dict(d) for f, d in referensi["numerik"].items()}
+            self.kategori = {f: SketsaFrekuensi.dari_dict(d) for f, d in referensi["kategori"].items()}
+        else:
+            self.numerik, self.kategori = {}, {}
+
+    def perbarui(self, df):
+        for kolom in KOLOM_NUMERIK:
+            if kolom in df.columns:
+                self.numerik.setdefault(kolom, SketsaKuantil()).tambah_banyak(df[kolom].to_numpy(dtype=np.float64))
+        for kolom in KOLOM_KATEGORI:
+            if kolom in df.columns:
+                sketsa = self.kategori.setdefault(kolom, SketsaFrekuensi(K_FREKUENSI_REFERENSI))
+                for nilai, jumlah in df[kolom].astype(str).value_counts(sort=False).items():
+                    sketsa.tambah(nilai, int(jumlah))
+
+    def ke_dict(self):
+        return {"versi_format": VERSI_FORMAT,
+                "numerik": {f: s.ke_dict() for f, s in self.numerik.items()},
+                "kategori": {f: s.ke_dict() for f, s in self.kategori.items()}}
+
+
+def _psi(p_ref, p_live):
+    p_ref = np.maximum(p_ref, EPS_PSI)
+    p_live = np.maximum(p_live, EPS_PSI)
+    return float(np.sum((p_live - p_ref) * np.log(p_live / p_ref)))
+
+
+def _proporsi_bin(sketsa, batas):
+    """Proporsi data per bin (-inf, b1], (b1, b2], ..., (bm, inf)."""
+    return np.diff(np.concatenate([[0.0], sketsa.cdf(batas), [1.0]]))
+
+
+def kategori_dikenal(encoder):
+    """
+    Kategori yang punya encoding sendiri di `encoder` per field: isi tabel
+    target encoding, slot one-hot beserta kategori dasarnya, dan nama hari.
+    Kategori lain di-encode sebagai prior atau semua slot one-hot 0.
+    """
+    dikenal = {kolom: frozenset(tabel) for kolom, tabel in encoder.tabel_target.items()}
+    for kolom, kategori in ONE_HOT_KATEGORI.items():
+        dikenal[kolom] = frozenset([ONE_HOT_DASAR[kolom], *kategori])
+    dikenal["arrival_day_of_week"] = frozenset(ORDINAL_HARI)
+    return dikenal
+
+
+class MonitorDrift:
+    """
+    Sketsa input live untuk satu referensi, dalam dua jendela bergulir
+    (jendela aktif dan jendela sebelumnya, masing-masing `jendela` baris),
+    sehingga skor mencerminkan antara `jendela` dan 2x`jendela` baris terakhir.
+    `dikenal` ({field: kategori}, lihat `kategori_dikenal`) menentukan
+    kategori yang tidak dikenal; tanpa itu dipakai kategori di referensi.
+    `hanya` membatasi field yang dipantau.
+    """
+
+    def __init__(self, referensi, jendela=JENDELA, dikenal=None, hanya=None):
+        self.jendela = jendela
+        self.numerik = {}
+        for kolom, data in referensi["numerik"].items():
+            if hanya is not None and kolom not in hanya:
+                continue
+            sketsa = SketsaKuantil.dari_dict(data)
+            batas_psi = np.unique(sketsa.kuantil(KUANTIL_PSI))
+            titik_ks = np.unique(sketsa.kuantil(KUANTIL_KS))
+            self.numerik[kolom] = {
+                "min": sketsa.min, "maks": sketsa.maks,
+                "batas_psi": batas_psi, "p_ref": _proporsi_bin(sketsa, batas_psi),
+                "titik_ks": titik_ks, "cdf_ref": sketsa.cdf(titik_ks)}
+        self.kategori = {}
+        for kolom, data in referensi["kategori"].items():
+            if hanya is not None and kolom not in hanya:
+                continue
+            sketsa = SketsaFrekuensi.dari_dict(data)
+            bin_kategori = [nilai for nilai, _ in sketsa.teratas(MAKS_BIN_KATEGORI)]
+            p_ref = np.array([sketsa.hitungan[nilai] for nilai in bin_kategori] + [0.0]) / sketsa.n
+            p_ref[-1] = 1 - p_ref[:-1].sum()
+            self.kategori[kolom] = {"dikenal": (dikenal or {}).get(kolom, frozenset(sketsa.hitungan)),
+                                    "bin": bin_kategori, "p_ref": p_ref}
+        self._kunci = threading.Lock()
+        self._aktif = self._jendela_baru()
+        self._sebelumnya = None
+
+    def _jendela_baru(self):
+        return {"n": 0,
+                "numerik": {kolom: SketsaKuantil() for kolom in self.numerik},
+                "kategori": {kolom: SketsaFrekuensi() for kolom in self.kategori},
+                "di_luar": dict.fromkeys(self.numerik, 0),
+                "tidak_dikenal": dict.fromkeys(self.kategori, 0)}
+
+    def amati(self, daftar_input):
+        """Memperbarui sketsa dengan list `input_dict` (sudah divalidasi)."""
+        with self._kunci:
+            jendela = self._aktif
+            if len(daftar_input) > MAKS_BARIS_LOOP:
+                self._amati_batch(jendela, daftar_input)
+            else:
+                for kolom, ref in self.numerik.items():
+                    sketsa, bawah, atas = jendela["numerik"][kolom], ref["min"], ref["maks"]
+                    for baris in daftar_input:
+                        nilai = baris[kolom]
+                        sketsa.tambah(nilai)
+                        if nilai < bawah or nilai > atas:
+                            jendela["di_luar"][kolom] += 1
+                for kolom, ref in self.kategori.items():
+                    sketsa, dikenal = jendela["kategori"][kolom], ref["dikenal"]
+                    for baris in daftar_input:
+                        nilai = baris[kolom]
+                        sketsa.tambah(nilai)
+                        if nilai not in dikenal:
+                            jendela["tidak_dikenal"][kolom] += 1
+            jendela["n"] += len(daftar_input)
+            if jendela["n"] >= self.jendela:
+                self._sebelumnya, self._aktif = jendela, self._jendela_baru()
+
+    def _amati_batch(self, jendela, daftar_input):
+        for kolom, ref in self.numerik.items():
+            nilai = np.fromiter((baris[kolom] for baris in daftar_input), dtype=np.float64, count=len(daftar_input))
+            jendela["numerik"][kolom].tambah_banyak(nilai)
+            jendela["di_luar"][kolom] += int(np.count_nonzero((nilai < ref["min"]) | (nilai > ref["maks"])))
+        for kolom, ref in self.kategori.items():
+            hitungan = {}
+            for baris in daftar_input:
+                hitungan[baris[kolom]] = hitungan.get(baris[kolom], 0) + 1
+            sketsa = jendela["kategori"][kolom]
+            for nilai, jumlah in hitungan.items():
+                sketsa.tambah(nilai, jumlah)
+                if nilai not in ref["dikenal"]:
+                    jendela["tidak_dikenal"][kolom] += jumlah
+
+    def _gabungan(self):
+        with self._kunci:
+            aktif, sebelumnya = self._aktif, self._sebelumnya
+            if sebelumnya is None:
+                return (aktif["n"], {k: s.gabung(SketsaKuantil(s.k)) for k, s in aktif["numerik"].items()},
+                        {k: s.gabung(SketsaFrekuensi(s.k)) for k, s in aktif["kategori"].items()},
+                        dict(aktif["di_luar"]), dict(aktif["tidak_dikenal"]))
+            return (aktif["n"] + sebelumnya["n"],
+                    {k: s.gabung(sebelumnya["numerik"][k]) for k, s in aktif["numerik"].items()},
+                    {k: s.gabung(sebelumnya["kategori"][k]) for k, s in aktif["kategori"].items()},
+                    {k: v + sebelumnya["di_luar"][k] for k, v in aktif["di_luar"].items()},
+                    {k: v + sebelumnya["tidak_dikenal"][k] for k, v in aktif["tidak_dikenal"].items()})
+
+    def skor(self):
+        """
+        PSI, KS dan rasio di luar rentang per field numerik; PSI, rasio tidak
+        dikenal dan nilai baru terbanyak per field kategorikal. Field kosong
+        jika jendela masih berisi kurang dari `MIN_BARIS_SKOR` baris.
+        """
+        n, numerik, kategori, di_luar, tidak_dikenal = self._gabungan()
+        hasil = {"jumlah_baris": n, "numerik": {}, "kategori": {}}
+        if n < MIN_BARIS_SKOR:
+            return hasil
+        for kolom, ref in self.numerik.items():
+            sketsa = numerik[kolom]
+            hasil["numerik"][kolom] = {
+                "psi": round(_psi(ref["p_ref"], _proporsi_bin(sketsa, ref["batas_psi"])), 6),
+                "ks": round(float(np.max(np.abs(sketsa.cdf(ref["titik_ks"]) - ref["cdf_ref"]))), 6),
+                "di_luar_rentang": round(di_luar[kolom] / n, 6),
+                "min": sketsa.min, "maks": sketsa.maks,
+                "p50": float(sketsa.kuantil([0.5])[0]), "p99": float(sketsa.kuantil([0.99])[0])}
+        for kolom, ref in self.kategori.items():
+            sketsa = kategori[kolom]
+            p_live = np.array([sketsa.hitungan.get(nilai, 0) for nilai in ref["bin"]] + [0.0]) / sketsa.n
+            p_live[-1] = max(1 - p_live[:-1].sum(), 0.0)
+            hasil["kategori"][kolom] = {
+                "psi": round(_psi(ref["p_ref"], p_live), 6),
+                "tidak_dikenal": round(tidak_dikenal[kolom] / n, 6),
+                "baru_teratas": [(nilai, jumlah) for nilai, jumlah in sketsa.teratas()
+                                 if nilai not in ref["dikenal"]][:5]}
+        return hasil
+
+    def gauge(self):
+        """Skor sebagai gauge berlabel untuk `metrik.teks_prometheus`."""
+        skor = self.skor()
+        gauge = {"hotel_drift_jumlah_baris": skor["jumlah_baris"]}
+        for kolom, nilai in skor["numerik"].items():
+            label = (("fitur", kolom),)
+            gauge[("hotel_drift_psi", label)] = nilai["psi"]
+            gauge[("hotel_drift_ks", label)] = nilai["ks"]
+            gauge[("hotel_drift_di_luar_rentang_rasio", label)] = nilai["di_luar_rentang"]
+        for kolom, nilai in skor["kategori"].items():
+            label = (("fitur", kolom),)
+            gauge[("hotel_drift_psi", label)] = nilai["psi"]
+            gauge[("hotel_drift_tidak_dikenal_rasio", label)] = nilai["tidak_dikenal"]
+        return gauge
+
+
+# Satu monitor per proses untuk versi bundle yang sedang dilayani
+_monitor = (None, None)
+_kunci_monitor = threading.Lock()
+
+
+def monitor_untuk(bundle):
+    """Monitor bersama untuk `bundle`, atau None jika dimatikan/bundle tanpa referensi drift."""
+    global _monitor
+    versi, monitor = _monitor
+    if versi == bundle.versi:
+        return monitor
+    with _kunci_monitor:
+        if _monitor[0] != bundle.versi:
+            referensi = getattr(bundle, "referensi_drift", None)
+            monitor = None
+            if AKTIF and referensi:
+                monitor = MonitorDrift(referensi, dikenal=kategori_dikenal(bundle.encoder))
+            _monitor = (bundle.versi, monitor)
+        return _monitor[1]
+
+
+def amati(bundle, daftar_input):
+    """Mencatat list `input_dict` yang diprediksi dengan `bundle` ke monitor drift."""
+    monitor = monitor_untuk(bundle)
+    if monitor is not None:
+        with metrik.ukur("hotel_drift_detik"):
+            monitor.amati(daftar_input)
+
+
+def gauge():
+    """Gauge drift monitor aktif (kosong jika belum ada); didaftarkan ke `metrik`."""
+    monitor = _monitor[1]
+    return monitor.gauge() if monitor is not None else {}
+
+
+metrik.daftarkan_gauge(gauge)
+
+
+def _daftar_file(path):
+    from latih import daftar_file
+
+    return [path] if os.path.isfile(path) else daftar_file(path)
+
+
+def bangun_referensi(path_data, ukuran_chunk=200_000):
+    """Referensi drift (dict) dari baris training (non-holdout) file atau folder `path_data`."""
+    from latih import FOLD_HOLDOUT, SumberData
+
+    pembangun = PembangunReferensi()
+    for df, fold in SumberData(_daftar_file(path_data), ukuran_chunk=ukuran_chunk).chunk_bersih():
+        pembangun.perbarui(df[fold != FOLD_HOLDOUT])
+    return pembangun.ke_dict()
+
+
+def cek_file(direktori_bundle, path_data, ukuran_chunk=200_000):
+    """
+    Skor drift seluruh baris file atau folder `path_data` terhadap referensi
+    bundle, tanpa jendela. Hanya field yang ada di chunk pertama yang dinilai.
+    """
+    from latih import SumberData
+
+    bundle = artefak.muat_bundle(direktori_bundle)
+    if bundle.referensi_drift is None:
+        raise ValueError(f"Bundle '{direktori_bundle}' belum punya referensi drift.")
+    monitor = None
+    for df, _ in SumberData(_daftar_file(path_data), ukuran_chunk=ukuran_chunk, dedup=False).chunk_bersih():
+        if monitor is None:
+            monitor = MonitorDrift(bundle.referensi_drift, jendela=math.inf,
+                                   dikenal=kategori_dikenal(bundle.encoder), hanya=set(df.columns))
+            kolom = [*monitor.numerik, *monitor.kategori]
+        hilang = [k for k in kolom if k not in df.columns]
+        if hilang:
+            raise ValueError(f"Kolom {', '.join(hilang)} tidak ada di semua file '{path_data}'.")
+        monitor.amati(df[kolom].to_dict("records"))
+    if monitor is None:
+        raise ValueError(f"Tidak ada baris data di '{path_data}'.")
+    return monitor.skor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Referensi dan cek drift input prediksi ADR.")
+    parser.add_argument("perintah", choices=["referensi", "cek"])
+    parser.add_argument("data", help="Folder atau file CSV/Parquet booking.")
+    parser.add_argument("--bundle", default=artefak.DIREKTORI_BUNDLE, help="Folder bundle model.")
+    parser.add_argument("--ukuran-chunk", type=int, default=200_000)
+    args = parser.parse_args()
+    if args.perintah == "referensi":
+        manifest = artefak.pasang_referensi_drift(args.bundle, bangun_referensi(args.data, args.ukuran_chunk))
+        print(f"Referensi drift ditulis ke bundle {manifest['versi']} di '{args.bundle}'.")
+    else:
+        print(json.dumps(cek_file(args.bundle, args.data, args.ukuran_chunk), indent=1, default=str))
+
+
+if __name__ == "__main__":
+    main()
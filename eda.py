@@ -3,15 +3,74 @@ import pandas as pd
 import plotly.express as px
 import calendar
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("hotel_booking_demand_cleaned.csv")
-    df['is_canceled'] = df['is_canceled'].astype('category')
-    df['hotel'] = df['hotel'].astype('category')
-    return df
-
-def plot_adr_by_month(df):
-    adr_month = df.groupby('arrival_month')['adr'].mean().reset_index()
+import dataset
+import metrik
+
+# Dimensi kubus agregat; semua filter dan grafik hanya memakai kolom ini
+DIMENSI_KUBUS = ['hotel', 'is_canceled', 'market_segment', 'customer_type', 'arrival_month', 'arrival_day_of_week']
+KOLOM_DASHBOARD = DIMENSI_KUBUS + ['adr']
+
+@st.cache_resource
+def load_sumber():
+    """
+    Sumber data kolumnar (Arrow IPC yang di-memory-map, atau CSV jika belum
+    dikonversi) yang dibagi read-only oleh semua sesi, tanpa disalin per sesi.
+    """
+    return dataset.buka()
+
+def bangun_kubus(tabel):
+    """
+    Pra-agregasi tabel Arrow booking menjadi kubus hotel x is_canceled x market_segment x
+    customer_type x arrival_month x arrival_day_of_week berisi jumlah booking,
+    total ADR dan jumlah pembatalan per sel (hanya sel yang berisi data).
+    """
+    with metrik.ukur("hotel_eda_detik", tahap="bangun_kubus"):
+        kubus = (tabel.group_by(DIMENSI_KUBUS, use_threads=False)
+                      .aggregate([('adr', 'count'), ('adr', 'sum'), ('is_canceled', 'sum')])
+                      .to_pandas()
+                      .rename(columns={'adr_count': 'jumlah', 'adr_sum': 'total_adr', 'is_canceled_sum': 'jumlah_batal'}))
+        # Tipe kolom disamakan dengan DataFrame hasil read_csv: hotel dan is_canceled kategori
+        kubus['hotel'] = pd.Categorical(kubus['hotel'].astype(str), categories=sorted(kubus['hotel'].astype(str).unique()))
+        kubus['is_canceled'] = kubus['is_canceled'].astype('int64').astype('category')
+        for kolom in ['market_segment', 'customer_type', 'arrival_day_of_week']:
+            kubus[kolom] = kubus[kolom].astype(str)
+        kubus['arrival_month'] = kubus['arrival_month'].astype('int64')
+        return kubus.sort_values(DIMENSI_KUBUS, ignore_index=True)
+
+@st.cache_resource
+def load_kubus():
+    """Kubus agregat dan pilihan filter (urutan sesuai data mentah), dihitung sekali per proses."""
+    with metrik.ukur("hotel_eda_detik", tahap="scan_penuh"):
+        tabel = dataset.scan(load_sumber(), KOLOM_DASHBOARD)
+    opsi = {
+        'hotel': tabel['hotel'].unique().to_pylist(),
+        'market_segment': tabel['market_segment'].unique().to_pylist(),
+        'customer_type': tabel['customer_type'].unique().to_pylist(),
+        'arrival_month': sorted(tabel['arrival_month'].unique().to_pylist()),
+    }
+    return bangun_kubus(tabel), opsi
+
+def filter_kubus(kubus, **filter_dimensi):
+    """
+    Memilih sel kubus yang cocok dengan filter, misalnya
+    `filter_kubus(kubus, hotel=['City Hotel'], arrival_month=[7, 8])`.
+    Filter bernilai None berarti semua nilai.
+    """
+    with metrik.ukur("hotel_eda_detik", tahap="filter_kubus"):
+        mask = pd.Series(True, index=kubus.index)
+        for kolom, nilai in filter_dimensi.items():
+            if nilai is not None:
+                mask &= kubus[kolom].isin(nilai)
+        return kubus[mask]
+
+def _rata_adr(kubus, kolom):
+    """Rata-rata ADR per `kolom` dari kubus: total ADR dibagi jumlah booking."""
+    with metrik.ukur("hotel_eda_detik", tahap="agregasi"):
+        agregat = kubus.groupby(kolom)[['total_adr', 'jumlah']].sum()
+        return (agregat['total_adr'] / agregat['jumlah']).rename('adr')
+
+def plot_adr_by_month(kubus):
+    adr_month = _rata_adr(kubus, 'arrival_month').reset_index()
     # Pastikan semua bulan ada, isi yang kosong dengan 0
     all_months = pd.DataFrame({'arrival_month': range(1, 13)})
     adr_month = pd.merge(all_months, adr_month, on='arrival_month', how='left').fillna(0)
@@ -27,9 +86,9 @@ def plot_adr_by_month(df):
     fig.update_traces(hovertemplate='Bulan: %{x}<br>Rata-rata ADR: $%{y:.2f}')
     return fig
 
-def plot_adr_by_day(df):
+def plot_adr_by_day(kubus):
     """Membuat plot interaktif ADR rata-rata per hari dalam seminggu."""
-    adr_day = df.groupby('arrival_day_of_week')['adr'].mean()
+    adr_day = _rata_adr(kubus, 'arrival_day_of_week')
     order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     adr_day = adr_day.reindex(order).reset_index()
 
@@ -43,9 +102,9 @@ def plot_adr_by_day(df):
     fig.update_traces(hovertemplate='Hari: %{x}<br>Rata-rata ADR: $%{y:.2f}')
     return fig
 
-def plot_adr_by_segment(df):
+def plot_adr_by_segment(kubus):
     """Membuat plot bar interaktif ADR rata-rata per segmen pasar."""
-    adr_segment = df.groupby('market_segment')['adr'].mean().sort_values(ascending=False).reset_index()
+    adr_segment = _rata_adr(kubus, 'market_segment').sort_values(ascending=False).reset_index()
     
     fig = px.bar(adr_segment, 
                  x='market_segment', 
@@ -57,9 +116,15 @@ def plot_adr_by_segment(df):
     fig.update_traces(textposition='outside', hovertemplate='Segmen: %{x}<br>Rata-rata ADR: $%{y:.2f}')
     return fig
     
-def plot_cancellation_ratio(df):
+def plot_cancellation_ratio(kubus):
     """Membuat plot bar interaktif untuk rasio pembatalan per tipe hotel."""
-    cancel_rate = df.groupby('hotel')['is_canceled'].value_counts(normalize=True).mul(100).rename('rate').reset_index()
+    # Sama dengan groupby('hotel')['is_canceled'].value_counts(normalize=True) pada data mentah:
+    # semua kombinasi kategori, diurutkan dari jumlah terbesar di setiap hotel
+    cancel_rate = kubus.groupby(['hotel', 'is_canceled'], observed=False)['jumlah'].sum().reset_index()
+    total_hotel = cancel_rate.groupby('hotel', observed=False)['jumlah'].transform('sum')
+    cancel_rate['rate'] = (cancel_rate['jumlah'] / total_hotel.where(total_hotel > 0)).fillna(0).mul(100)
+    cancel_rate = cancel_rate.sort_values(['hotel', 'jumlah'], ascending=[True, False], kind='stable')
+    cancel_rate = cancel_rate[['hotel', 'is_canceled', 'rate']].reset_index(drop=True)
     cancel_rate['is_canceled'] = cancel_rate['is_canceled'].map({0: 'Tidak Dibatalkan', 1: 'Dibatalkan'})
 
     fig = px.bar(cancel_rate, 
@@ -74,60 +139,89 @@ def plot_cancellation_ratio(df):
     fig.update_traces(texttemplate='%{y:.1f}%', textposition='inside')
     return fig
 
+@st.cache_resource(show_spinner=False, max_entries=256)
+def buat_tampilan(filter_aktif):
+    """
+    KPI dan keempat grafik untuk satu pilihan filter.
+    Di-cache per pilihan filter dan dibagi read-only oleh semua sesi, tanpa
+    pickle: membongkar pickle Figure Plotly memvalidasi ulang seluruh
+    properti dan hampir semahal membangunnya.
+    """
+    kubus, _ = load_kubus()
+    filtered_kubus = filter_kubus(kubus, **filter_aktif)
+    total_bookings = int(filtered_kubus['jumlah'].sum())
+    if total_bookings == 0:
+        return {'total': 0}
+    with metrik.ukur("hotel_eda_detik", tahap="grafik"):
+        grafik = {
+            'bulan': plot_adr_by_month(filtered_kubus),
+            'hari': plot_adr_by_day(filtered_kubus),
+            'segmen': plot_adr_by_segment(filtered_kubus),
+            'pembatalan': plot_cancellation_ratio(filtered_kubus),
+        }
+    return {
+        'total': total_bookings,
+        'avg_adr': filtered_kubus['total_adr'].sum() / total_bookings,
+        'cancellation_rate': filtered_kubus['jumlah_batal'].sum() / total_bookings * 100,
+        'grafik': grafik,
+    }
+
 # --- UI STREAMLIT ---
 def tampilkan_eda():
     st.title("📊 Dashboard Analisis Eksplorasi Data (EDA) Hotel")
-    st.markdown("Gunakan filter di samping untuk menjelajahi tren dan pola dalam data pemesanan hotel.")
+    st.markdown("Gunakan filter di bawah untuk menjelajahi tren dan pola dalam data pemesanan hotel.")
 
-    # Load Data
-    df = load_data()
+    # Pilihan filter (kubus agregat dimuat sekali per proses)
+    _, opsi = load_kubus()
 
-    # --- SIDEBAR UNTUK FILTER ---
-    st.sidebar.header("⚙️ Filter Data")
+    # --- FILTER ---
+    # Filter berada di halaman, bukan di sidebar, agar tab EDA bisa dijalankan
+    # ulang sebagai fragment tanpa ikut menjalankan tab lain
+    with st.expander("⚙️ Filter Data", expanded=True):
+        f1, f2, f3, f4, f5 = st.columns(5)
 
-    hotel_options = ["Semua"] + list(df['hotel'].unique())
-    selected_hotel = st.sidebar.multiselect("Tipe Hotel", hotel_options, default=["Semua"])
+        hotel_options = ["Semua"] + opsi['hotel']
+        selected_hotel = f1.multiselect("Tipe Hotel", hotel_options, default=["Semua"], key="eda_hotel")
+
+        cancel_map = {0: "Tidak Dibatalkan", 1: "Dibatalkan"}
+        cancel_options_display = ["Semua"] + list(cancel_map.values())
+        selected_cancel_display = f2.multiselect("Status Pembatalan", cancel_options_display, default=["Semua"],
+                                                 key="eda_pembatalan")
+
+        segment_options = ["Semua"] + opsi['market_segment']
+        selected_segment = f3.multiselect("Segmen Pasar", segment_options, default=["Semua"], key="eda_segmen")
+
+        customer_options = ["Semua"] + opsi['customer_type']
+        selected_customer = f4.multiselect("Tipe Customer", customer_options, default=["Semua"], key="eda_customer")
+
+        month_options_numeric = opsi['arrival_month']
+        month_names = ["Semua"] + [calendar.month_name[m] for m in month_options_numeric]
+        selected_month_name = f5.multiselect("Bulan Kedatangan", month_names, default=["Semua"], key="eda_bulan")
+
+    # --- LOGIKA FILTER (pada sel kubus, bukan baris mentah) ---
+    # Nilai diurutkan agar urutan klik di multiselect tidak membuat entri cache baru
+    cancel_filter_raw = sorted(k for k, v in cancel_map.items() if v in selected_cancel_display)
+    month_filter = sorted(list(calendar.month_name).index(name) for name in selected_month_name if name != "Semua")
+    filter_aktif = {
+        'hotel': None if "Semua" in selected_hotel else sorted(selected_hotel),
+        'is_canceled': None if "Semua" in selected_cancel_display else cancel_filter_raw,
+        'market_segment': None if "Semua" in selected_segment else sorted(selected_segment),
+        'customer_type': None if "Semua" in selected_customer else sorted(selected_customer),
+        'arrival_month': None if "Semua" in selected_month_name else month_filter,
+    }
+    tampilan = buat_tampilan(filter_aktif)
 
-    cancel_map = {0: "Tidak Dibatalkan", 1: "Dibatalkan"}
-    cancel_options_display = ["Semua"] + list(cancel_map.values())
-    selected_cancel_display = st.sidebar.multiselect("Status Pembatalan", cancel_options_display, default=["Semua"])
-    
-    segment_options = ["Semua"] + list(df['market_segment'].unique())
-    selected_segment = st.sidebar.multiselect("Segmen Pasar", segment_options, default=["Semua"])
-
-    customer_options = ["Semua"] + list(df['customer_type'].unique())
-    selected_customer = st.sidebar.multiselect("Tipe Customer", customer_options, default=["Semua"])
-
-    month_options_numeric = sorted(df['arrival_month'].unique())
-    month_names = ["Semua"] + [calendar.month_name[m] for m in month_options_numeric]
-    selected_month_name = st.sidebar.multiselect("Bulan Kedatangan", month_names, default=["Semua"])
-
-    # --- LOGIKA FILTER ---
-    filtered_df = df.copy()
-    if "Semua" not in selected_hotel:
-        filtered_df = filtered_df[filtered_df['hotel'].isin(selected_hotel)]
-    if "Semua" not in selected_cancel_display:
-        cancel_filter_raw = [k for k, v in cancel_map.items() if v in selected_cancel_display]
-        filtered_df = filtered_df[filtered_df['is_canceled'].isin(cancel_filter_raw)]
-    if "Semua" not in selected_segment:
-        filtered_df = filtered_df[filtered_df['market_segment'].isin(selected_segment)]
-    if "Semua" not in selected_customer:
-        filtered_df = filtered_df[filtered_df['customer_type'].isin(selected_customer)]
-    if "Semua" not in selected_month_name:
-        month_filter = [list(calendar.month_name).index(name) for name in selected_month_name]
-        filtered_df = filtered_df[filtered_df['arrival_month'].isin(month_filter)]
-    
     # --- HALAMAN UTAMA ---
-    
+
     # Metrik Utama (KPI)
     st.markdown("### Ringkasan Data")
-    if filtered_df.empty:
+    total_bookings = tampilan['total']
+    if total_bookings == 0:
         st.warning("Tidak ada data yang cocok dengan filter yang dipilih. Harap ubah pilihan Anda.")
     else:
         kpi1, kpi2, kpi3 = st.columns(3)
-        total_bookings = len(filtered_df)
-        avg_adr = filtered_df['adr'].mean()
-        cancellation_rate = filtered_df[filtered_df['is_canceled'] == 1].shape[0] / total_bookings * 100 if total_bookings > 0 else 0
+        avg_adr = tampilan['avg_adr']
+        cancellation_rate = tampilan['cancellation_rate']
 
         kpi1.metric(label="Total Booking", value=f"{total_bookings:,}")
         kpi2.metric(label="Rata-rata ADR", value=f"${avg_adr:.2f}")
@@ -135,17 +229,18 @@ def tampilkan_eda():
 
         st.markdown("<hr>", unsafe_allow_html=True)
 
+        grafik = tampilan['grafik']
         col1, col2 = st.columns(2)
 
         with col1:
-            st.plotly_chart(plot_adr_by_month(filtered_df), use_container_width=True)
+            st.plotly_chart(grafik['bulan'], use_container_width=True)
             with st.expander("Lihat Insight"):
                 st.markdown("""
                 - **Puncak ADR**: Harga cenderung naik signifikan pada bulan-bulan musim liburan seperti Juli dan Agustus.
                 - **Penurunan ADR**: Bulan dengan permintaan rendah seperti November dan Januari menunjukkan ADR yang lebih rendah.
                 """)
             
-            st.plotly_chart(plot_adr_by_segment(filtered_df), use_container_width=True)
+            st.plotly_chart(grafik['segmen'], use_container_width=True)
             with st.expander("Lihat Insight"):
                 st.markdown("""
                 - **Segmen Paling Menguntungkan**: Pemesanan 'Direct' dan 'Online TA' cenderung memiliki ADR tertinggi.
@@ -153,16 +248,16 @@ def tampilkan_eda():
                 """)
 
         with col2:
-            st.plotly_chart(plot_adr_by_day(filtered_df), use_container_width=True)
+            st.plotly_chart(grafik['hari'], use_container_width=True)
             with st.expander("Lihat Insight"):
                 st.markdown("""
                 - **Akhir Pekan Lebih Mahal**: Harga kamar jelas lebih tinggi pada akhir pekan (Jumat & Sabtu) dibandingkan hari kerja.
                 - **Hari Kerja Lebih Murah**: Pelancong bisnis atau mereka yang fleksibel bisa mendapatkan harga lebih baik di hari kerja.
                 """)
 
-            st.plotly_chart(plot_cancellation_ratio(filtered_df), use_container_width=True)
+            st.plotly_chart(grafik['pembatalan'], use_container_width=True)
             with st.expander("Lihat Insight"):
                 st.markdown("""
                 - **Risiko Pembatalan**: 'City Hotel' menunjukkan tingkat pembatalan yang lebih tinggi secara konsisten. Ini mungkin karena perubahan rencana perjalanan yang lebih sering untuk tamu kota.
                 - **Stabilitas**: 'Resort Hotel' memiliki tingkat pembatalan yang lebih rendah, mungkin karena pemesanan lebih direncanakan untuk liburan.
-                """)
\ No newline at end of file
+                """)
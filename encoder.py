@@ -0,0 +1,229 @@
+import time
+
+import numpy as np
+
+import metrik
+
+# Kategori yang di-one-hot secara manual (drop_first=True seperti di notebook)
+ONE_HOT_KATEGORI = {
+    "hotel": ["Resort Hotel"],
+    "meal": ["FB", "HB", "SC", "Undefined"],
+    "distribution_channel": ["Direct", "GDS", "TA/TO", "Undefined"],
+    "deposit_type": ["Non Refund", "Refundable"],
+    "customer_type": ["Group", "Transient", "Transient-Party"],
+}
+# Kategori pertama per kolom yang di-drop (semua slot one-hot bernilai 0)
+ONE_HOT_DASAR = {"hotel": "City Hotel", "meal": "BB", "distribution_channel": "Corporate",
+                 "deposit_type": "No Deposit", "customer_type": "Contract"}
+
+ORDINAL_HARI = {"Monday": 1, "Tuesday": 2, "Wednesday": 3, "Thursday": 4,
+                "Friday": 5, "Saturday": 6, "Sunday": 7}
+
+KOLOM_TARGET_ENCODE = ["country", "market_segment", "reserved_room_type", "assigned_room_type"]
+
+# Label tahap untuk metrik `hotel_prediksi_tahap_detik`
+TAHAP_ONE_HOT = "1-5_one_hot"
+TAHAP_ORDINAL = "6_ordinal_hari"
+TAHAP_TARGET = "7_target_encoding"
+TAHAP_NUMERIK = "numerik"
+TAHAP_REINDEX = "8_reindex"
+
+# Kolom numerik yang di-log1p di notebook sebelum encoding
+KOLOM_LOG = ["lead_time", "previous_cancellations", "previous_bookings_not_canceled",
+             "booking_changes", "agent", "days_in_waiting_list"]
+
+
+def tabel_target_encoder(target_encoder):
+    """
+    Mengambil tabel {kategori: nilai} per kolom dan nilai prior dari
+    `category_encoders.TargetEncoder` yang sudah di-fit.
+    """
+    tabel = {}
+    prior = {}
+    for info in target_encoder.ordinal_encoder.mapping:
+        kolom = info["col"]
+        nilai_per_kode = target_encoder.mapping[kolom]
+        tabel[kolom] = {
+            kategori: float(nilai_per_kode[kode])
+            for kategori, kode in info["mapping"].items()
+            if isinstance(kategori, str) and kode in nilai_per_kode.index
+        }
+        # handle_unknown/handle_missing='value' -> kode -1/-2 berisi prior
+        prior[kolom] = float(nilai_per_kode.get(-1, target_encoder._mean))
+    return tabel, prior
+
+
+def _cari(nilai, tabel, bawaan):
+    """Lookup vektor `nilai` ke dalam dict `tabel`, `bawaan` jika tidak ada."""
+    nilai = np.asarray(nilai, dtype=object).tolist()
+    return np.fromiter(map(tabel.get, nilai, [bawaan] * len(nilai)), dtype=np.float64, count=len(nilai))
+
+
+class EncoderTerkompilasi:
+    """
+    Pengganti rantai pra-pemrosesan pandas di `prediksi.praproses_batch`.
+
+    Rencana encoding per kolom `model_columns` dihitung sekali saat dibuat
+    (tabel lookup untuk target encoding, offset kolom untuk setiap slot
+    one-hot, dan peta ordinal hari). `transform` lalu menulis langsung ke
+    matriks float32 yang sudah dialokasikan dengan urutan `model_columns`.
+    Transformasi `log1p` dan `StandardScaler` dari notebook bersifat opsional.
+    """
+
+    def __init__(self, model_columns, tabel_target, prior_target,
+                 kolom_log=(), scaler_mean=None, scaler_scale=None):
+        self.model_columns = list(model_columns)
+        self.tabel_target = tabel_target
+        self.prior_target = prior_target
+        self.kolom_log = [kolom for kolom in kolom_log if kolom in self.model_columns]
+        self.scaler_mean = None if scaler_mean is None else np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = None if scaler_scale is None else np.asarray(scaler_scale, dtype=np.float64)
+
+        # Offset kolom output untuk setiap slot one-hot, per kolom sumber
+        self.offset_one_hot = {}
+        for sumber, kategori in ONE_HOT_KATEGORI.items():
+            offset = {nilai: self.model_columns.index(f"{sumber}_{nilai}")
+                      for nilai in kategori if f"{sumber}_{nilai}" in self.model_columns}
+            if offset:
+                self.offset_one_hot[sumber] = offset
+
+        kolom_khusus = set(self.offset_one_hot) | set(KOLOM_TARGET_ENCODE) | {"arrival_day_of_week"}
+        kolom_one_hot = {f"{s}_{v}" for s, kategori in ONE_HOT_KATEGORI.items() for v in kategori}
+        self.indeks_numerik = {kolom: j for j, kolom in enumerate(self.model_columns)
+                               if kolom not in kolom_khusus and kolom not in kolom_one_hot}
+        self.indeks_target = {kolom: self.model_columns.index(kolom) for kolom in KOLOM_TARGET_ENCODE
+                              if kolom in self.model_columns and kolom in self.tabel_target}
+        self.indeks_hari = (self.model_columns.index("arrival_day_of_week")
+                            if "arrival_day_of_week" in self.model_columns else None)
+        # Semua kolom input yang menghasilkan setidaknya satu kolom model
+        self.kolom_sumber = (list(self.indeks_numerik) + list(self.offset_one_hot)
+                             + (["arrival_day_of_week"] if self.indeks_hari is not None else [])
+                             + list(self.indeks_target))
+        self.indeks_log = {self.model_columns.index(kolom) for kolom in self.kolom_log}
+        # Label tahap metrik per kolom sumber, mengikuti langkah bernomor di `praproses_batch`
+        self.tahap_sumber = {sumber: TAHAP_ONE_HOT if sumber in self.offset_one_hot
+                             else TAHAP_ORDINAL if sumber == "arrival_day_of_week"
+                             else TAHAP_TARGET if sumber in self.indeks_target
+                             else TAHAP_NUMERIK
+                             for sumber in self.kolom_sumber}
+
+    @classmethod
+    def dari_artefak(cls, model_columns, target_encoder, kolom_log=(), scaler=None):
+        """Membangun encoder dari `model_columns.joblib` dan `target_encoder.joblib`."""
+        tabel, prior = tabel_target_encoder(target_encoder)
+        return cls(model_columns, tabel, prior, kolom_log=kolom_log,
+                   scaler_mean=None if scaler is None else scaler.mean_,
+                   scaler_scale=None if scaler is None else scaler.scale_)
+
+    def transform(self, data):
+        """
+        Meng-encode `data` (DataFrame atau dict berisi kolom) menjadi
+        `np.ndarray` float32 berukuran (N, len(model_columns)).
+        """
+        n_baris = len(next(iter(data.values()))) if isinstance(data, dict) else len(data)
+        hasil = np.zeros((n_baris, len(self.model_columns)), dtype=np.float32)
+        kolom_tersedia = set(data.keys()) if isinstance(data, dict) else set(data.columns)
+        terisi = np.zeros(len(self.model_columns), dtype=bool)
+
+        # Durasi per tahap diakumulasi lintas kolom lalu dicatat sekali per panggilan
+        durasi = {} if metrik.AKTIF else None
+        waktu = time.perf_counter() if durasi is not None else 0.0
+
+        # One-hot selalu wajib ada di input (seperti jalur pandas); kolom lain opsional
+        for sumber in self.kolom_sumber:
+            if sumber in kolom_tersedia or sumber in self.offset_one_hot:
+                for j, nilai in self.encode_sumber(sumber, data[sumber]):
+                    hasil[:, j] = nilai
+                    terisi[j] = True
+                if durasi is not None:
+                    sekarang = time.perf_counter()
+                    tahap = self.tahap_sumber[sumber]
+                    durasi[tahap] = durasi.get(tahap, 0.0) + sekarang - waktu
+                    waktu = sekarang
+
+        # 8. Kolom yang tidak ada di input bernilai 0 (seperti reindex), tetapi tetap di-scale
+        if self.scaler_mean is not None:
+            for j in np.flatnonzero(~terisi):
+                hasil[:, j] = self._transform_lanjut(j, np.zeros(n_baris))
+        if durasi is not None:
+            durasi[TAHAP_REINDEX] = time.perf_counter() - waktu
+            metrik.amati_tahap("hotel_prediksi_tahap_detik", durasi, jalur="terkompilasi")
+        return hasil
+
+    def encode_sumber(self, sumber, nilai):
+        """
+        Meng-encode satu kolom input `sumber` untuk vektor `nilai`. Mengembalikan
+        list (indeks kolom model, nilai float64 setelah log1p/scaler); list
+        kosong jika kolom tidak dipakai model.
+        """
+        # 1-5. One-hot: cari offset slot per baris lalu bandingkan dengan setiap kolom slot
+        if sumber in self.offset_one_hot:
+            slot = _cari(nilai, self.offset_one_hot[sumber], -1)
+            return [(j, self._transform_lanjut(j, (slot == j).astype(np.float64)))
+                    for j in self.offset_one_hot[sumber].values()]
+
+        # 6. Ordinal hari
+        if sumber == "arrival_day_of_week":
+            j = self.indeks_hari
+            return [(j, self._transform_lanjut(j, _cari(nilai, ORDINAL_HARI, np.nan)))]
+
+        # 7. Target encoding lewat tabel lookup
+        if sumber in self.tabel_target:
+            j = self.indeks_target[sumber]
+            return [(j, self._transform_lanjut(
+                j, _cari(nilai, self.tabel_target[sumber], self.prior_target[sumber])))]
+
+        # Kolom numerik diteruskan apa adanya
+        if sumber in self.indeks_numerik:
+            j = self.indeks_numerik[sumber]
+            return [(j, self._transform_lanjut(j, np.asarray(nilai, dtype=np.float64)))]
+        return []
+
+    def _transform_lanjut(self, j, nilai):
+        """Menerapkan log1p (jika kolom ter-log) dan StandardScaler pada satu kolom float64."""
+        if j in self.indeks_log:
+            nilai = np.log1p(nilai)
+        if self.scaler_mean is not None:
+            nilai = (nilai - self.scaler_mean[j]) / self.scaler_scale[j]
+        return nilai
+
+
+def cek_paritas(n_baris=5000, seed=42):
+    """
+    Membandingkan `EncoderTerkompilasi` dengan jalur pandas
+    `prediksi.praproses_batch` pada input acak, tanpa dan dengan log1p +
+    StandardScaler seperti di notebook. Melempar AssertionError jika berbeda.
+    """
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+    import prediksi
+    from data_sintetis import buat_booking
+
+    input_df = pd.DataFrame(buat_booking(n_baris, seed=seed))
+    # Satu baris (jalur form) dan batch penuh harus identik
+    for df in (input_df.head(1), input_df):
+        referensi = prediksi.praproses_batch(df).to_numpy(dtype=np.float64)
+        hasil = prediksi.encoder.transform(df)
+        np.testing.assert_allclose(hasil, referensi.astype(np.float32), rtol=1e-6)
+
+    # Jalur notebook: log1p sebelum encoding, StandardScaler setelah reindex
+    df_log = input_df.copy()
+    df_log[KOLOM_LOG] = np.log1p(df_log[KOLOM_LOG])
+    referensi = prediksi.praproses_batch(df_log)
+    scaler = StandardScaler().fit(referensi)
+    referensi = scaler.transform(referensi)
+    encoder_notebook = EncoderTerkompilasi.dari_artefak(
+        prediksi.model_columns, prediksi.muat_target_encoder(), kolom_log=KOLOM_LOG, scaler=scaler)
+    hasil = encoder_notebook.transform(input_df)
+    np.testing.assert_allclose(hasil, referensi.astype(np.float32), rtol=1e-5, atol=1e-6)
+    print(f"Paritas encoder OK untuk {n_baris} baris acak.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cek paritas EncoderTerkompilasi dengan jalur pandas.")
+    parser.add_argument("--baris", type=int, default=5000, help="Jumlah booking acak.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed data acak (hasil bisa direproduksi).")
+    args = parser.parse_args()
+    cek_paritas(args.baris, args.seed)
@@ -0,0 +1,118 @@
+"""
+Generator kalender tarif: prediksi ADR untuk setiap tanggal kedatangan dalam
+satu tahun x tipe hotel x pasangan tipe kamar (dipesan x diberikan) x lama
+menginap.
+
+Satu profil booking dasar di-encode sekali, lalu hanya kolom yang berubah
+(tanggal, hotel, kamar, jumlah malam) ditimpa lewat `encoder.encode_sumber`
+pada nilai uniknya. Seluruh grid diskor dengan satu panggilan model.
+"""
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from encoder import ORDINAL_HARI
+
+HOTEL = ["City Hotel", "Resort Hotel"]
+# Tipe kamar di form prediksi; grid berisi setiap kombinasi kamar dipesan x diberikan
+KAMAR_DIPESAN = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'L']
+KAMAR_DIBERIKAN = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'K', 'L']
+PASANGAN_KAMAR = [(dipesan, diberikan) for dipesan in KAMAR_DIPESAN for diberikan in KAMAR_DIBERIKAN]
+LAMA_MENGINAP = [1, 2, 3, 7]
+
+NAMA_HARI = list(ORDINAL_HARI)
+
+
+def _malam_akhir_pekan(lama):
+    """
+    Jumlah malam Sabtu/Minggu untuk menginap `lama` malam, per hari
+    kedatangan (0 = Senin). Mengembalikan array (len(lama), 7).
+    """
+    lama = np.asarray(lama)
+    malam = (np.arange(7)[None, :, None] + np.arange(lama.max())[None, None, :]) % 7
+    akhir_pekan = (malam >= 5) & (np.arange(lama.max())[None, None, :] < lama[:, None, None])
+    return akhir_pekan.sum(axis=2)
+
+
+def _isi(grid, encoder, sumber, nilai_unik, indeks):
+    """Meng-encode `nilai_unik` satu kali lalu menyebarkannya ke baris grid lewat `indeks`."""
+    for j, vektor in encoder.encode_sumber(sumber, nilai_unik):
+        grid[:, j] = vektor[indeks]
+
+
+def buat_kalender_tarif(bundle, profil_dasar, tahun, hotel=HOTEL, pasangan_kamar=PASANGAN_KAMAR,
+                        lama_menginap=LAMA_MENGINAP):
+    """
+    Memprediksi ADR untuk seluruh grid tanggal x hotel x kamar x lama menginap.
+
+    `profil_dasar` adalah dict seperti `input_dict` di form; field tanggal,
+    hotel, tipe kamar dan jumlah malam ditimpa oleh grid. Berbeda dengan
+    form, `arrival_week` diisi minggu ISO dari tanggal sebenarnya.
+    Mengembalikan DataFrame ringkas (kolom kategori dan float32) dengan
+    kolom tanggal, hotel, reserved_room_type, assigned_room_type,
+    lama_menginap dan adr.
+    """
+    encoder = bundle.encoder
+    tanggal = pd.date_range(f"{tahun}-01-01", f"{tahun}-12-31", freq="D")
+    hari = tanggal.dayofweek.to_numpy()
+    lama_menginap = np.asarray(lama_menginap)
+
+    n_tanggal, n_hotel, n_kamar, n_lama = len(tanggal), len(hotel), len(pasangan_kamar), len(lama_menginap)
+    # Urutan grid: hotel x kamar x lama x tanggal (tanggal paling dalam)
+    i_hotel, i_kamar, i_lama, i_tanggal = (
+        indeks.ravel() for indeks in np.indices((n_hotel, n_kamar, n_lama, n_tanggal)))
+
+    basis = encoder.transform({kolom: [nilai] for kolom, nilai in profil_dasar.items()})
+    grid = np.repeat(basis, len(i_tanggal), axis=0)
+
+    # Tanggal kedatangan
+    _isi(grid, encoder, "arrival_month", tanggal.month.to_numpy(), i_tanggal)
+    _isi(grid, encoder, "arrival_week", tanggal.isocalendar().week.to_numpy(), i_tanggal)
+    _isi(grid, encoder, "arrival_day_of_week", np.array(NAMA_HARI, dtype=object)[hari], i_tanggal)
+
+    # Hotel dan kamar
+    _isi(grid, encoder, "hotel", np.array(hotel, dtype=object), i_hotel)
+    _isi(grid, encoder, "reserved_room_type", np.array([r for r, _ in pasangan_kamar], dtype=object), i_kamar)
+    _isi(grid, encoder, "assigned_room_type", np.array([a for _, a in pasangan_kamar], dtype=object), i_kamar)
+
+    # Jumlah malam akhir pekan/hari kerja bergantung pada lama menginap dan hari kedatangan
+    akhir_pekan = _malam_akhir_pekan(lama_menginap)
+    hari_kerja = lama_menginap[:, None] - akhir_pekan
+    i_malam = i_lama * 7 + hari[i_tanggal]
+    _isi(grid, encoder, "stays_in_weekend_nights", akhir_pekan.ravel(), i_malam)
+    _isi(grid, encoder, "stays_in_week_nights", hari_kerja.ravel(), i_malam)
+
+    adr = np.expm1(bundle.prediksi_log(grid)).astype(np.float32)
+    return pd.DataFrame({
+        "tanggal": tanggal.to_numpy()[i_tanggal],
+        "hotel": pd.Categorical(hotel)[i_hotel],
+        "reserved_room_type": pd.Categorical([r for r, _ in pasangan_kamar])[i_kamar],
+        "assigned_room_type": pd.Categorical([a for _, a in pasangan_kamar])[i_kamar],
+        "lama_menginap": lama_menginap.astype(np.int16)[i_lama],
+        "adr": adr,
+    })
+
+
+def plot_kalender_tarif(kalender, hotel, reserved_room_type, assigned_room_type, lama_menginap):
+    """Heat-map kalender (bulan x tanggal) ADR prediksi untuk satu kombinasi hotel/kamar/lama."""
+    import plotly.express as px
+
+    pilihan = kalender[(kalender["hotel"] == hotel)
+                       & (kalender["reserved_room_type"] == reserved_room_type)
+                       & (kalender["assigned_room_type"] == assigned_room_type)
+                       & (kalender["lama_menginap"] == lama_menginap)]
+    tabel = (pilihan.assign(bulan=pilihan["tanggal"].dt.month, tanggal_bulan=pilihan["tanggal"].dt.day)
+             .pivot(index="bulan", columns="tanggal_bulan", values="adr")
+             .reindex(index=range(1, 13), columns=range(1, 32)))
+    tabel.index = [calendar.month_abbr[bulan] for bulan in tabel.index]
+
+    fig = px.imshow(tabel,
+                    color_continuous_scale="RdYlGn_r",
+                    aspect="auto",
+                    labels={"x": "Tanggal", "y": "Bulan", "color": "ADR ($)"},
+                    title=f"Kalender Tarif: {hotel}, kamar {reserved_room_type}/{assigned_room_type}, "
+                          f"{lama_menginap} malam")
+    fig.update_layout(title_x=0.5)
+    fig.update_traces(hovertemplate='%{y} %{x}<br>ADR: $%{z:.2f}<extra></extra>')
+    return fig
@@ -0,0 +1,581 @@
+"""
+Pelatihan ulang model ADR dari folder data, pengganti GridSearchCV di notebook.
+
+Membangun ulang `xgboost_model.joblib`, `model_columns.joblib`,
+`target_encoder.joblib` dan bundle model dari semua file booking
+(`*.csv`, `*.csv.gz`, `*.parquet`) di sebuah folder, baik skema mentah
+`hotel_bookings.csv` maupun hasil cleaning notebook:
+
+    python latih.py --data data/ --keluaran model_baru
+    python latih.py --data data/ --keluaran model_baru --eksternal   # data lebih besar dari RAM
+
+Perbedaan dengan notebook:
+* Pohon dibangun dengan `tree_method="hist"` dan early stopping, dan
+  pencarian parameter memakai successive halving: semua kandidat dicoba di
+  satu fold, hanya sepertiga terbaik yang lanjut ke fold berikutnya, dan
+  hanya kandidat terbaik yang menjalankan semua fold.
+* Data dibaca per chunk dan diumpankan lewat `xgboost.DataIter`. Dengan
+  `--eksternal`, matriks disimpan sebagai cache di disk
+  (`ExtMemQuantileDMatrix`) sehingga data tidak harus muat di RAM.
+* Fitur dibuat oleh `EncoderTerkompilasi` yang sama dengan aplikasi (tanpa
+  log1p/StandardScaler yang tidak ikut tersimpan di notebook), sehingga
+  fitur saat training dan saat prediksi identik.
+* Pembagian holdout/fold ditentukan dari hash isi baris, sehingga hasilnya
+  sama berapa pun ukuran chunk dan urutan pembacaannya.
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import queue
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+import artefak
+import drift
+from encoder import ONE_HOT_KATEGORI, KOLOM_TARGET_ENCODE, EncoderTerkompilasi
+
+# Kolom fitur selain dummy one-hot, dengan urutan sama seperti `model_columns` notebook
+KOLOM_MODEL_DASAR = [
+    "is_canceled", "lead_time", "stays_in_weekend_nights", "stays_in_week_nights", "adults",
+    "children", "babies", "country", "market_segment", "is_repeated_guest", "previous_cancellations",
+    "previous_bookings_not_canceled", "reserved_room_type", "assigned_room_type", "booking_changes",
+    "agent", "days_in_waiting_list", "required_car_parking_spaces", "total_of_special_requests",
+    "arrival_day_of_week", "arrival_month", "arrival_week",
+]
+MODEL_COLUMNS = KOLOM_MODEL_DASAR + [f"{kolom}_{nilai}" for kolom, kategori in ONE_HOT_KATEGORI.items()
+                                     for nilai in kategori]
+
+# Sama dengan test_size=0.2 di notebook: 1 dari 5 baris menjadi holdout
+MODULO_HOLDOUT = 5
+FOLD_HOLDOUT = -1
+MAKS_BIN = 256
+# Partisi hash untuk dedup di disk (mode eksternal); tiap partisi diproses sendiri di RAM
+PARTISI_DEDUP = 256
+
+# Titik tengah grid notebook, selalu ikut sebagai kandidat pertama
+PARAMETER_NOTEBOOK = {"max_depth": 5, "learning_rate": 0.05, "subsample": 0.8,
+                      "colsample_bytree": 0.8, "min_child_weight": 1.0, "reg_lambda": 1.0}
+
+
+def daftar_file(direktori):
+    """File data di `direktori`, terurut agar hasil training bisa direproduksi."""
+    pola = ("*.csv", "*.csv.gz", "*.parquet")
+    files = sorted({path for p in pola for path in glob.glob(os.path.join(direktori, p))})
+    if not files:
+        raise FileNotFoundError(f"Tidak ada file CSV/Parquet di '{direktori}'.")
+    return files
+
+
+def baca_chunk(path, ukuran_chunk):
+    """Membaca satu file per chunk berisi `ukuran_chunk` baris (DataFrame)."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=ukuran_chunk):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=ukuran_chunk)
+
+
+def bersihkan(df):
+    """
+    Langkah cleaning notebook untuk satu chunk (semuanya per baris kecuali
+    drop_duplicates, yang ditangani `SumberData`). Data yang sudah bersih
+    dilewatkan apa adanya kecuali filter ADR.
+    """
+    if "arrival_date_year" in df.columns:
+        # Skema mentah hotel_bookings.csv
+        df = df.copy()
+        df["children"] = df["children"].fillna(0)
+        df["agent"] = df["agent"].fillna(0)
+        df = df.dropna(subset=["country"])
+        df = df[(df["adults"] != 0) | (df["children"] != 0) | (df["babies"] != 0)]
+        df = df.drop(columns=[k for k in ["reservation_status", "reservation_status_date", "company"]
+                              if k in df.columns])
+        df["arrival_date"] = pd.to_datetime(
+            df["arrival_date_year"].astype(str) + "-" + df["arrival_date_month"] + "-"
+            + df["arrival_date_day_of_month"].astype(str), format="%Y-%B-%d")
+        df = df.drop(columns=["arrival_date_year", "arrival_date_month", "arrival_date_day_of_month",
+                              "arrival_date_week_number"])
+        df["arrival_day_of_week"] = df["arrival_date"].dt.day_name()
+        df["arrival_month"] = df["arrival_date"].dt.month
+        df["arrival_week"] = df["arrival_date"].dt.isocalendar().week.astype("int64")
+
+    df = df[(df["adr"] >= 0) & (df["adr"] <= 1000)]
+    # ADR 0 hanya wajar untuk Complementary atau customer Group/Contract
+    return df[~((df["adr"] == 0) & (df["market_segment"] != "Complementary")
+                & ~df["customer_type"].isin(["Group", "Contract"]))]
+
+
+def _sidik_baris(df):
+    """Hash 64-bit isi setiap baris; tipe angka disamakan agar stabil antar chunk."""
+    normal = df.apply(lambda kolom: kolom.astype("float64") if pd.api.types.is_numeric_dtype(kolom)
+                      else kolom.astype(str))
+    return pd.util.hash_pandas_object(normal, index=False).to_numpy()
+
+
+class SumberData:
+    """
+    Sumber data booking yang sudah dibersihkan, dibaca ulang dari file per
+    chunk setiap kali diiterasi. Setiap baris mendapat fold dari hash isinya:
+    `FOLD_HOLDOUT` untuk holdout (20%), selain itu 0..k_fold-1.
+
+    Jika `di_memori`, chunk yang sudah di-encode disimpan di RAM setelah
+    pembacaan pertama; jika tidak, setiap pass membaca file lagi.
+
+    Duplikat dibuang dengan set hash di RAM (8 byte hash per baris unik,
+    ditambah overhead set Python), atau jika `direktori_dedup` diisi, di
+    disk: satu pass awal menulis (hash, nomor baris) ke `PARTISI_DEDUP` file
+    partisi, setiap partisi dicari duplikatnya sendiri, dan hanya nomor baris
+    duplikat yang disimpan (file terurut, dibaca dengan memmap). Memori
+    puncaknya sekitar 16 byte x baris / `PARTISI_DEDUP`.
+    """
+
+    def __init__(self, files, k_fold=5, ukuran_chunk=200_000, dedup=True, di_memori=True,
+                 direktori_dedup=None):
+        self.files = files
+        self.k_fold = k_fold
+        self.ukuran_chunk = ukuran_chunk
+        self.dedup = dedup
+        self.di_memori = di_memori
+        self.direktori_dedup = direktori_dedup
+        self.encoder = None
+        self._cache = None
+        self._duplikat = None
+
+    def _chunk_dengan_sidik(self):
+        for path in self.files:
+            for df in baca_chunk(path, self.ukuran_chunk):
+                df = bersihkan(df)
+                if not df.empty:
+                    yield df, _sidik_baris(df)
+
+    def _cari_duplikat_disk(self):
+        """Nomor baris (urutan baris bersih) yang duplikat dari baris sebelumnya, terurut, sebagai memmap."""
+        direktori = os.path.join(self.direktori_dedup, "dedup")
+        os.makedirs(direktori, exist_ok=True)
+        path_partisi = [os.path.join(direktori, f"partisi_{p:03d}.bin") for p in range(PARTISI_DEDUP)]
+        berkas = [open(path, "wb") for path in path_partisi]
+        try:
+            awal = 0
+            for _, sidik in self._chunk_dengan_sidik():
+                nomor = np.arange(awal, awal + len(sidik), dtype=np.uint64)
+                awal += len(sidik)
+                # Bit teratas hash menentukan partisi; bit bawah dipakai untuk fold
+                partisi = (sidik >> np.uint64(56)).astype(np.int64) % PARTISI_DEDUP
+                urutan = np.argsort(partisi, kind="stable")
+                batas = np.searchsorted(partisi[urutan], np.arange(PARTISI_DEDUP + 1))
+                pasangan = np.column_stack([sidik[urutan], nomor[urutan]])
+                for p in np.flatnonzero(np.diff(batas)):
+                    pasangan[batas[p]:batas[p + 1]].tofile(berkas[p])
+        finally:
+            for f in berkas:
+                f.close()
+
+        duplikat = []
+        for path in path_partisi:
+            pasangan = np.fromfile(path, dtype=np.uint64).reshape(-1, 2)
+            os.remove(path)
+            # Urut per hash lalu nomor baris: selain kemunculan pertama, semuanya duplikat
+            urutan = np.lexsort((pasangan[:, 1], pasangan[:, 0]))
+            sidik, nomor = pasangan[urutan, 0], pasangan[urutan, 1]
+            duplikat.append(nomor[1:][sidik[1:] == sidik[:-1]])
+        path_duplikat = os.path.join(direktori, "duplikat.npy")
+        np.save(path_duplikat, np.sort(np.concatenate(duplikat)).astype(np.int64))
+        return np.load(path_duplikat, mmap_mode="r")
+
+    def chunk_bersih(self):
+        """Yield (DataFrame bersih, fold per baris), tanpa duplikat lintas file/chunk."""
+        di_disk = self.dedup and self.direktori_dedup is not None
+        if di_disk and self._duplikat is None:
+            self._duplikat = self._cari_duplikat_disk()
+        terlihat = set()
+        awal = 0
+        for df, sidik in self._chunk_dengan_sidik():
+            if di_disk:
+                dari, sampai = np.searchsorted(self._duplikat, [awal, awal + len(df)])
+                simpan = np.ones(len(df), dtype=bool)
+                simpan[np.asarray(self._duplikat[dari:sampai]) - awal] = False
+                awal += len(df)
+                df, sidik = df[simpan], sidik[simpan]
+            elif self.dedup:
+                # Duplikat dalam chunk dan dengan chunk sebelumnya (8 byte hash per baris unik)
+                _, pertama = np.unique(sidik, return_index=True)
+                pertama.sort()
+                baru = [i for i in pertama if sidik[i].item() not in terlihat]
+                terlihat.update(sidik[baru].tolist())
+                df, sidik = df.iloc[baru], sidik[baru]
+            if df.empty:
+                continue
+            fold = np.where(sidik % MODULO_HOLDOUT == 0, FOLD_HOLDOUT,
+                            (sidik // MODULO_HOLDOUT) % self.k_fold).astype(np.int8)
+            yield df.reset_index(drop=True), fold
+
+    def batch(self):
+        """Yield (fitur float32, log1p(adr), fold) per chunk, memakai `self.encoder`."""
+        if self._cache is not None:
+            yield from self._cache
+            return
+        cache = [] if self.di_memori else None
+        for df, fold in self.chunk_bersih():
+            item = (self.encoder.transform(df), np.log1p(df["adr"].to_numpy(dtype=np.float32)), fold)
+            if cache is not None:
+                cache.append(item)
+            yield item
+        if cache is not None:
+            self._cache = cache
+
+
+class StatistikTarget:
+    """
+    Jumlah dan banyaknya log1p(adr) per kategori untuk kolom target encoding,
+    plus total keseluruhan (prior). Disimpan sebagai JSON agar target
+    encoder bisa diperbarui dari data baru tanpa membaca ulang histori.
+    """
+
+    def __init__(self, kolom=KOLOM_TARGET_ENCODE, smoothing=None, min_samples_leaf=None):
+        self.kolom = list(kolom)
+        # Bawaan mengikuti TargetEncoder() yang dipakai notebook
+        if smoothing is None or min_samples_leaf is None:
+            from category_encoders import TargetEncoder
+            bawaan = TargetEncoder()
+            smoothing = bawaan.smoothing if smoothing is None else smoothing
+            min_samples_leaf = bawaan.min_samples_leaf if min_samples_leaf is None else min_samples_leaf
+        self.smoothing = float(smoothing)
+        self.min_samples_leaf = float(min_samples_leaf)
+        self.jumlah = 0.0
+        self.n = 0
+        # {kolom: {kategori: [jumlah, n]}} dengan urutan kemunculan pertama
+        self.per_kategori = {kolom: {} for kolom in self.kolom}
+
+    def perbarui(self, df, y):
+        """Menambahkan baris `df` dengan target `y` (log1p adr) ke statistik."""
+        y = np.asarray(y, dtype=np.float64)
+        self.jumlah += float(y.sum())
+        self.n += len(y)
+        for kolom in self.kolom:
+            kategori = df[kolom].to_numpy(dtype=object)
+            grup = pd.Series(y).groupby(kategori, sort=False).agg(["sum", "count"])
+            tabel = self.per_kategori[kolom]
+            for nilai, (jumlah, n) in zip(grup.index, grup.to_numpy()):
+                entri = tabel.setdefault(nilai, [0.0, 0])
+                entri[0] += float(jumlah)
+                entri[1] += int(n)
+
+    @property
+    def prior(self):
+        return self.jumlah / self.n if self.n else 0.0
+
+    def tabel(self):
+        """(tabel {kolom: {kategori: nilai}}, prior per kolom) dengan rumus smoothing TargetEncoder."""
+        prior = self.prior
+        tabel = {}
+        for kolom, per_nilai in self.per_kategori.items():
+            tabel[kolom] = {}
+            for nilai, (jumlah, n) in per_nilai.items():
+                bobot = 1 / (1 + math.exp(-(n - self.min_samples_leaf) / self.smoothing))
+                tabel[kolom][nilai] = prior * (1 - bobot) + jumlah / n * bobot
+        return tabel, {kolom: prior for kolom in self.kolom}
+
+    def ke_target_encoder(self):
+        """`category_encoders.TargetEncoder` setara dengan fit pada seluruh baris statistik."""
+        from category_encoders import TargetEncoder
+
+        tabel, prior = self.tabel()
+        # Fit pada satu baris per kategori agar peta ordinal terbentuk dengan urutan yang sama
+        panjang = max(len(per_nilai) for per_nilai in self.per_kategori.values())
+        contoh = pd.DataFrame({
+            kolom: [list(per_nilai)[min(i, len(per_nilai) - 1)] for i in range(panjang)]
+            for kolom, per_nilai in self.per_kategori.items()})
+        te = TargetEncoder(cols=self.kolom, smoothing=self.smoothing, min_samples_leaf=self.min_samples_leaf)
+        te.fit(contoh, pd.Series(np.zeros(panjang)))
+        for info in te.ordinal_encoder.mapping:
+            kolom = info["col"]
+            nilai = {kode: tabel[kolom][kategori] for kategori, kode in info["mapping"].items()
+                     if kode > 0}
+            nilai.update({-1: prior[kolom], -2: prior[kolom]})
+            te.mapping[kolom] = pd.Series(nilai, dtype="float64")
+        te._mean = self.prior
+        return te
+
+    def ke_dict(self):
+        return {"kolom": self.kolom, "smoothing": self.smoothing, "min_samples_leaf": self.min_samples_leaf,
+                "jumlah": self.jumlah, "n": self.n, "per_kategori": self.per_kategori}
+
+    @classmethod
+    def dari_dict(cls, data):
+        statistik = cls(data["kolom"], data["smoothing"], data["min_samples_leaf"])
+        statistik.jumlah, statistik.n = data["jumlah"], data["n"]
+        statistik.per_kategori = {kolom: {k: list(v) for k, v in per_nilai.items()}
+                                  for kolom, per_nilai in data["per_kategori"].items()}
+        return statistik
+
+
+def hitung_statistik(sumber, referensi=None):
+    """
+    Pass pertama: statistik target encoding dari baris non-holdout (seperti
+    fit di X_train). Jika `referensi` (drift.PembangunReferensi) diberikan,
+    sketsa referensi drift ikut diperbarui dari baris yang sama.
+    """
+    statistik = StatistikTarget()
+    for df, fold in sumber.chunk_bersih():
+        latih = fold != FOLD_HOLDOUT
+        statistik.perbarui(df[latih], np.log1p(df["adr"].to_numpy()[latih]))
+        if referensi is not None:
+            referensi.perbarui(df[latih])
+    return statistik
+
+
+class IterasiData(xgb.DataIter):
+    """Mengumpankan chunk `SumberData` dengan fold di `fold_dipakai` ke XGBoost."""
+
+    def __init__(self, sumber, fold_dipakai, cache_prefix=None):
+        self.sumber = sumber
+        self.fold_dipakai = np.asarray(fold_dipakai, dtype=np.int8)
+        self._iter = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._iter = None
+
+    def next(self, input_data):
+        if self._iter is None:
+            self._iter = self.sumber.batch()
+        for fitur, y, fold in self._iter:
+            pilih = np.isin(fold, self.fold_dipakai)
+            if pilih.any():
+                input_data(data=fitur[pilih], label=y[pilih])
+                return True
+        return False
+
+
+def buat_matriks(sumber, fold_dipakai, eksternal=False, ref=None, nthread=None, direktori_cache=None):
+    """
+    Matriks kuantil XGBoost untuk baris dengan fold di `fold_dipakai`. Dengan
+    `eksternal`, halaman data disimpan di `direktori_cache` (external memory).
+    """
+    if eksternal:
+        nama = "fold_" + "_".join(str(f) for f in sorted(fold_dipakai)).replace("-", "h")
+        iterasi = IterasiData(sumber, fold_dipakai, cache_prefix=os.path.join(direktori_cache, nama))
+        return xgb.ExtMemQuantileDMatrix(iterasi, max_bin=MAKS_BIN, ref=ref, nthread=nthread)
+    return xgb.QuantileDMatrix(IterasiData(sumber, fold_dipakai), max_bin=MAKS_BIN, ref=ref, nthread=nthread)
+
+
+def buat_kandidat(n_kandidat, seed):
+    """Kandidat parameter: titik tengah grid notebook lalu sampel acak (log-uniform untuk skala)."""
+    rng = np.random.default_rng(seed)
+    kandidat = [dict(PARAMETER_NOTEBOOK)]
+    while len(kandidat) < n_kandidat:
+        kandidat.append({
+            "max_depth": int(rng.choice([3, 4, 5, 6, 8, 10])),
+            "learning_rate": float(np.exp(rng.uniform(np.log(0.02), np.log(0.3)))),
+            "subsample": float(rng.uniform(0.6, 1.0)),
+            "colsample_bytree": float(rng.uniform(0.6, 1.0)),
+            "min_child_weight": float(np.exp(rng.uniform(0.0, np.log(20)))),
+            "reg_lambda": float(np.exp(rng.uniform(np.log(0.1), np.log(10)))),
+        })
+    return kandidat
+
+
+def _parameter_xgb(kandidat, nthread, seed):
+    return {**kandidat, "objective": "reg:squarederror", "eval_metric": "rmse", "tree_method": "hist",
+            "max_bin": MAKS_BIN, "nthread": nthread, "seed": seed}
+
+
+def bagi_thread(n_tugas, n_jobs, eksternal=False):
+    """
+    (jumlah pekerja CV paralel, list nthread XGBoost per pekerja) agar
+    totalnya sama dengan `n_jobs` core; sisa pembagian diberikan ke pekerja
+    pertama, misalnya 3 tugas di 4 core menjadi [2, 1, 1]. Mode eksternal
+    memakai satu pekerja agar akses disk tidak saling berebut.
+    """
+    pekerja = 1 if eksternal else max(1, min(n_tugas, n_jobs))
+    dasar, sisa = divmod(n_jobs, pekerja)
+    return pekerja, [max(1, dasar + (i < sisa)) for i in range(pekerja)]
+
+
+def cari_parameter(matriks_fold, kandidat, k_fold, eta=3, maks_putaran=2000, henti_awal=50,
+                   n_jobs=None, eksternal=False, seed=42, log=print):
+    """
+    Successive halving dengan fold CV sebagai sumber daya. Rung ke-i memakai
+    ceil(k / eta^(R-i)) fold pertama; setelah tiap rung hanya 1/eta kandidat
+    dengan RMSE rata-rata terbaik yang lanjut. `matriks_fold(f)` mengembalikan
+    (matriks latih, matriks validasi) untuk fold `f`.
+    Mengembalikan (indeks kandidat terbaik, hasil per kandidat).
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_rung = math.ceil(math.log(len(kandidat), eta) - 1e-9) if len(kandidat) > 1 else 0
+    hasil = {c: {} for c in range(len(kandidat))}
+    aktif = list(range(len(kandidat)))
+
+    def jalankan(tugas, jatah):
+        c, f = tugas
+        latih, validasi = matriks_fold(f)
+        # Setiap tugas yang berjalan memegang satu jatah thread pekerja sampai selesai
+        nthread = jatah.get()
+        try:
+            booster = xgb.train(_parameter_xgb(kandidat[c], nthread, seed), latih, num_boost_round=maks_putaran,
+                                evals=[(validasi, "validasi")], early_stopping_rounds=henti_awal,
+                                verbose_eval=False)
+        finally:
+            jatah.put(nthread)
+        return c, f, float(booster.best_score), booster.best_iteration + 1
+
+    skor = {}
+    for rung in range(n_rung + 1):
+        n_fold = min(k_fold, max(1, math.ceil(k_fold / eta ** (n_rung - rung))))
+        # Fold yang sudah dihitung di rung sebelumnya dipakai ulang
+        tugas = [(c, f) for c in aktif for f in range(n_fold) if f not in hasil[c]]
+        for f in sorted({f for _, f in tugas}):
+            matriks_fold(f)
+        pekerja, nthread = bagi_thread(len(tugas), n_jobs, eksternal)
+        jatah = queue.SimpleQueue()
+        for n in nthread:
+            jatah.put(n)
+        mulai = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=pekerja) as eksekutor:
+            for c, f, rmse, putaran in eksekutor.map(lambda t: jalankan(t, jatah), tugas):
+                hasil[c][f] = (rmse, putaran)
+        skor = {c: float(np.mean([hasil[c][f][0] for f in range(n_fold)])) for c in aktif}
+        log(f"Rung {rung}: {len(aktif)} kandidat x {n_fold} fold, {pekerja} pekerja x {'/'.join(map(str, nthread))} thread, "
+            f"{time.perf_counter() - mulai:.1f} detik, RMSE terbaik {min(skor.values()):.5f}")
+        if rung < n_rung:
+            aktif = sorted(aktif, key=skor.get)[:max(1, math.ceil(len(aktif) / eta))]
+    return min(aktif, key=skor.get), hasil
+
+
+def evaluasi(booster, matriks):
+    """RMSE log1p(adr), R2 log dan MAE ADR ($) pada `matriks`."""
+    y = matriks.get_label().astype(np.float64)
+    prediksi = booster.predict(matriks).astype(np.float64)
+    rmse = float(np.sqrt(np.mean((prediksi - y) ** 2)))
+    r2 = float(1 - np.sum((prediksi - y) ** 2) / np.sum((y - y.mean()) ** 2))
+    mae_adr = float(np.mean(np.abs(np.expm1(prediksi) - np.expm1(y))))
+    return {"rmse_log": rmse, "r2_log": r2, "mae_adr": mae_adr, "jumlah_baris": int(len(y))}
+
+
+def simpan_artefak(booster, te, statistik, direktori, info, referensi=None):
+    """
+    Menulis tiga file joblib (format sama dengan notebook), statistik target
+    encoding dan bundle model (dengan referensi drift jika ada) ke
+    `direktori`. Mengembalikan manifest bundle.
+    """
+    import joblib
+    from xgboost import XGBRegressor
+
+    os.makedirs(direktori, exist_ok=True)
+    with tempfile.TemporaryDirectory() as sementara:
+        path_model = os.path.join(sementara, "model.ubj")
+        booster.save_model(path_model)
+        model = XGBRegressor()
+        model.load_model(path_model)
+    joblib.dump(model, os.path.join(direktori, "xgboost_model.joblib"))
+    joblib.dump(list(MODEL_COLUMNS), os.path.join(direktori, "model_columns.joblib"))
+    joblib.dump(te, os.path.join(direktori, "target_encoder.joblib"))
+    with open(os.path.join(direktori, "statistik_target.json"), "w") as f:
+        json.dump(statistik.ke_dict(), f)
+
+    encoder = EncoderTerkompilasi.dari_artefak(MODEL_COLUMNS, te)
+    return artefak.simpan_bundle(booster, encoder, os.path.join(direktori, artefak.DIREKTORI_BUNDLE), info,
+                                 referensi=None if referensi is None else referensi.ke_dict())
+
+
+def latih(direktori_data, keluaran="model_baru", k_fold=5, n_kandidat=27, eta=3, maks_putaran=2000,
+          henti_awal=50, n_jobs=None, eksternal=False, ukuran_chunk=200_000, seed=42, log=print):
+    """Menjalankan seluruh pipeline training dan mengembalikan laporan (dict)."""
+    mulai = time.perf_counter()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    files = daftar_file(direktori_data)
+
+    with tempfile.TemporaryDirectory(prefix="cache_latih_") as direktori_cache:
+        # Mode eksternal: dedup di disk agar memori tidak tumbuh dengan jumlah baris
+        sumber = SumberData(files, k_fold, ukuran_chunk, di_memori=not eksternal,
+                            direktori_dedup=direktori_cache if eksternal else None)
+        log(f"Statistik target encoding dan referensi drift dari {len(files)} file...")
+        referensi = drift.PembangunReferensi()
+        statistik = hitung_statistik(sumber, referensi)
+        te = statistik.ke_target_encoder()
+        sumber.encoder = EncoderTerkompilasi.dari_artefak(MODEL_COLUMNS, te)
+
+        matriks = {}
+
+        def matriks_fold(f):
+            if f not in matriks:
+                latih_f = buat_matriks(sumber, [g for g in range(k_fold) if g != f], eksternal,
+                                       nthread=n_jobs, direktori_cache=direktori_cache)
+                matriks[f] = (latih_f, buat_matriks(sumber, [f], eksternal, ref=latih_f, nthread=n_jobs,
+                                                    direktori_cache=direktori_cache))
+            return matriks[f]
+
+        kandidat = buat_kandidat(n_kandidat, seed)
+        terbaik, hasil_cv = cari_parameter(matriks_fold, kandidat, k_fold, eta, maks_putaran, henti_awal,
+                                           n_jobs, eksternal, seed, log)
+        matriks.clear()
+
+        putaran = int(round(np.mean([p for _, p in hasil_cv[terbaik].values()])))
+        log(f"Model akhir: kandidat {terbaik}, {putaran} putaran, {n_jobs} thread...")
+        semua = buat_matriks(sumber, list(range(k_fold)), eksternal, nthread=n_jobs,
+                             direktori_cache=direktori_cache)
+        holdout = buat_matriks(sumber, [FOLD_HOLDOUT], eksternal, ref=semua, nthread=n_jobs,
+                               direktori_cache=direktori_cache)
+        booster = xgb.train(_parameter_xgb(kandidat[terbaik], n_jobs, seed), semua, num_boost_round=putaran)
+        metrik_holdout = evaluasi(booster, holdout)
+        jumlah_latih = semua.num_row()
+        # Lepas matriks sebelum folder cache external memory dihapus
+        del semua, holdout
+    log(f"Holdout: {json.dumps(metrik_holdout)}")
+
+    laporan = {
+        "data": [{"file": os.path.basename(path), "sha256": artefak._sha256(path)} for path in files],
+        "parameter": kandidat[terbaik],
+        "putaran": putaran,
+        "metrik_holdout": metrik_holdout,
+        "jumlah_baris_latih": int(jumlah_latih),
+        "pencarian": {
+            "k_fold": k_fold, "eta": eta, "henti_awal": henti_awal, "maks_putaran": maks_putaran, "seed": seed,
+            "kandidat": [{"parameter": kandidat[c],
+                          "fold": {str(f): {"rmse_log": r, "putaran": p} for f, (r, p) in sorted(hasil.items())}}
+                         for c, hasil in hasil_cv.items()],
+        },
+        "eksternal": eksternal,
+        "n_jobs": n_jobs,
+        "versi": {"xgboost": xgb.__version__, "pandas": pd.__version__, "numpy": np.__version__},
+        "durasi_detik": round(time.perf_counter() - mulai, 2),
+    }
+    manifest = simpan_artefak(booster, te, statistik, keluaran,
+                              info={"sumber": "latih.py", "parameter": laporan["parameter"],
+                                    "metrik_holdout": metrik_holdout}, referensi=referensi)
+    laporan["versi_bundle"] = manifest["versi"]
+    with open(os.path.join(keluaran, "laporan_latih.json"), "w") as f:
+        json.dump(laporan, f, indent=1)
+    log(f"Artefak ditulis ke '{keluaran}' (bundle {manifest['versi']}), {laporan['durasi_detik']} detik.")
+    return laporan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training ulang model ADR dari folder data booking.")
+    parser.add_argument("--data", required=True, help="Folder berisi file CSV/Parquet booking.")
+    parser.add_argument("--keluaran", default="model_baru", help="Folder tujuan artefak.")
+    parser.add_argument("--fold", type=int, default=5, help="Jumlah fold cross-validation.")
+    parser.add_argument("--kandidat", type=int, default=27, help="Jumlah kandidat parameter.")
+    parser.add_argument("--eta", type=int, default=3, help="Faktor pengurangan kandidat per rung.")
+    parser.add_argument("--maks-putaran", type=int, default=2000)
+    parser.add_argument("--henti-awal", type=int, default=50, help="Early stopping (putaran tanpa perbaikan).")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Total core (bawaan: semua).")
+    parser.add_argument("--eksternal", action="store_true",
+                        help="Simpan matriks training dan hash dedup di disk (data lebih besar dari RAM).")
+    parser.add_argument("--ukuran-chunk", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    latih(args.data, args.keluaran, args.fold, args.kandidat, args.eta, args.maks_putaran, args.henti_awal,
+          args.n_jobs, args.eksternal, args.ukuran_chunk, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""
+Layanan HTTP/JSON asinkron untuk prediksi ADR (machine-to-machine).
+
+Request yang datang bersamaan dikumpulkan menjadi micro-batch (maksimal
+`--tunggu-ms` milidetik atau `--maks-baris` baris) lalu diskor dengan satu
+kali panggilan model, memakai encoder dan bundle yang sama dengan
+`prediksi.prediksi_adr_batch`. Jalankan dengan:
+
+    python layanan.py --port 8080 --tunggu-ms 2 --maks-baris 256
+
+Endpoint:
+    POST /prediksi  body berupa satu objek `input_dict` (seperti form) atau list objek;
+                    `?penjelasan=saabas` (atau `=1`) / `?penjelasan=shap` menambahkan
+                    kontribusi per field (lihat `penjelasan`)
+    GET  /health    proses hidup (liveness)
+    GET  /ready     model sudah dimuat dan dipanaskan (readiness)
+    GET  /metrics   histogram durasi per tahap dalam format teks Prometheus
+    GET  /drift     skor drift input terhadap data training per fitur (lihat `drift`)
+
+Dengan `--registri model_versi`, versi aktif registri dilayani dan diganti
+tanpa restart saat registri berubah, dan sebagian request bisa diskor juga
+oleh kandidat bayangan (lihat `registri`).
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import artefak
+import drift
+import metrik
+import penjelasan
+import registri
+from cache_prediksi import TIDAK_ADA, cache_hasil, kunci_kanonik, kunci_penjelasan
+
+# Field yang sama dengan `input_dict` di form prediksi
+KOLOM_INPUT = list(artefak.INPUT_BAWAAN)
+KOLOM_TEKS = {kolom for kolom, nilai in artefak.INPUT_BAWAAN.items() if isinstance(nilai, str)}
+
+MAKS_UKURAN_BODY = 32 * 1024 * 1024
+
+
+def _tolak_konstanta(nama):
+    # `json.loads` menerima NaN/Infinity yang bukan bagian dari standar JSON
+    raise ValueError(f"Konstanta {nama} tidak diizinkan.")
+
+
+def validasi_input(baris):
+    """
+    Memeriksa satu booking seperti validasi di form prediksi. Melempar
+    ValueError dengan pesan yang bisa dikirim balik ke klien.
+    """
+    if not isinstance(baris, dict):
+        raise ValueError("Setiap input harus berupa objek JSON.")
+    hilang = [kolom for kolom in KOLOM_INPUT if kolom not in baris]
+    if hilang:
+        raise ValueError(f"Field wajib tidak ada: {', '.join(hilang)}")
+    for kolom in KOLOM_INPUT:
+        nilai = baris[kolom]
+        if kolom in KOLOM_TEKS:
+            if not isinstance(nilai, str):
+                raise ValueError(f"Field '{kolom}' harus berupa teks.")
+        elif isinstance(nilai, bool) or not isinstance(nilai, (int, float)):
+            raise ValueError(f"Field '{kolom}' harus berupa angka.")
+        elif not math.isfinite(nilai):
+            raise ValueError(f"Field '{kolom}' harus berupa angka yang berhingga.")
+    country = baris["country"].upper()
+    if len(country) != 3 or not country.isalpha():
+        raise ValueError("Kode negara harus terdiri dari 3 huruf (misal: IDN untuk Indonesia).")
+    if baris["adults"] == 0 and baris["children"] == 0 and baris["babies"] == 0:
+        raise ValueError("Jumlah tamu (dewasa/anak/bayi) minimal harus 1.")
+    return {**{kolom: baris[kolom] for kolom in KOLOM_INPUT}, "country": country}
+
+
+class PengumpulBatch:
+    """
+    Mengumpulkan request prediksi yang datang bersamaan menjadi satu batch.
+
+    Batch ditutup setelah `tunggu_ms` sejak request pertama masuk atau saat
+    jumlah baris mencapai `maks_baris`, lalu diskor di satu thread terpisah
+    agar event loop tetap bisa menerima request berikutnya. Request dengan
+    penjelasan diskor di thread sendiri tanpa ditunggu oleh putaran batch,
+    sehingga penjelasan besar tidak menahan prediksi biasa.
+    """
+
+    def __init__(self, bundle, tunggu_ms=2.0, maks_baris=256):
+        self.bundle = bundle
+        self.tunggu = tunggu_ms / 1000
+        self.maks_baris = maks_baris
+        self.statistik = {"jumlah_batch": 0, "jumlah_baris": 0, "baris_maks_per_batch": 0}
+        self._antrean = None
+        self._tugas = None
+        self._eksekutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="skor")
+        self._eksekutor_penjelasan = ThreadPoolExecutor(max_workers=1, thread_name_prefix="penjelasan")
+        self._tugas_penjelasan = set()
+
+    def mulai(self):
+        self._antrean = asyncio.Queue()
+        self._tugas = asyncio.get_running_loop().create_task(self._putaran())
+
+    async def berhenti(self):
+        if self._tugas is not None:
+            self._tugas.cancel()
+            try:
+                await self._tugas
+            except asyncio.CancelledError:
+                pass
+        for tugas in list(self._tugas_penjelasan):
+            tugas.cancel()
+        self._eksekutor.shutdown(wait=False)
+        self._eksekutor_penjelasan.shutdown(wait=False)
+
+    async def prediksi(self, daftar_baris, metode=None, bundle=None):
+        """
+        Prediksi ADR untuk list booking (dict) yang sudah divalidasi. Dengan
+        `metode` penjelasan, hasilnya berupa dict dari `penjelasan.ke_dict`.
+        `bundle` (bawaan: bundle pengumpul) adalah versi model yang dipakai.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._antrean.put((daftar_baris, future, metode, bundle or self.bundle))
+        return await future
+
+    async def _putaran(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._antrean.get()
+            batch = [item]
+            jumlah = len(item[0])
+            batas_waktu = loop.time() + self.tunggu
+            while jumlah < self.maks_baris:
+                if not self._antrean.empty():
+                    item = self._antrean.get_nowait()
+                else:
+                    sisa = batas_waktu - loop.time()
+                    if sisa <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._antrean.get(), sisa)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(item)
+                jumlah += len(item[0])
+            await self._skor(batch, jumlah)
+
+    async def _skor(self, batch, jumlah):
+        # Request dengan metode penjelasan dan versi model yang sama diskor
+        # bersama dalam satu panggilan (saat hot-swap, batch bisa berisi dua versi)
+        for metode, bundle in dict.fromkeys((m, b) for _, _, m, b in batch):
+            bagian = [item for item in batch if item[2] == metode and item[3] is bundle]
+            if metode is None:
+                await self._skor_bagian(bagian, metode, bundle, self._eksekutor)
+            else:
+                tugas = asyncio.get_running_loop().create_task(
+                    self._skor_bagian(bagian, metode, bundle, self._eksekutor_penjelasan))
+                self._tugas_penjelasan.add(tugas)
+                tugas.add_done_callback(self._tugas_penjelasan.discard)
+
+        self.statistik["jumlah_batch"] += 1
+        self.statistik["jumlah_baris"] += jumlah
+        self.statistik["baris_maks_per_batch"] = max(self.statistik["baris_maks_per_batch"], jumlah)
+
+    async def _skor_bagian(self, bagian, metode, bundle, eksekutor):
+        """Menskor request di `bagian` dengan satu panggilan di `eksekutor` lalu mengisi future-nya."""
+        semua_baris = [baris for daftar_baris, _, _, _ in bagian for baris in daftar_baris]
+        kolom = {nama: [baris[nama] for baris in semua_baris] for nama in KOLOM_INPUT}
+        try:
+            hasil, tahap = await asyncio.get_running_loop().run_in_executor(
+                eksekutor, self._skor_terukur, kolom, metode, bundle)
+        except Exception as e:
+            for _, future, _, _ in bagian:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        metrik.log_json("batch", baris=len(semua_baris), request=len(bagian), penjelasan=metode,
+                        tahap_ms={nama: round(detik * 1000, 4) for nama, detik in tahap.items()})
+        awal = 0
+        for daftar_baris, future, _, _ in bagian:
+            if not future.done():
+                future.set_result(hasil[awal:awal + len(daftar_baris)])
+            awal += len(daftar_baris)
+
+    def _skor_terukur(self, kolom, metode=None, bundle=None):
+        """Skor satu batch di thread eksekutor; mengembalikan (ADR atau penjelasan, durasi per tahap)."""
+        bundle = bundle or self.bundle
+        with metrik.bagian_diprofil(), metrik.jejak() as tahap:
+            if metode is None:
+                return bundle.prediksi(kolom), tahap
+            return penjelasan.ke_dict(*penjelasan.jelaskan(bundle, kolom, metode)), tahap
+
+
+class Layanan:
+    """
+    Aplikasi HTTP prediksi ADR. `tangani` tidak bergantung pada socket
+    sehingga bisa dipanggil langsung lewat `KlienLokal`.
+    """
+
+    def __init__(self, bundle=None, direktori_bundle=artefak.DIREKTORI_BUNDLE,
+                 tunggu_ms=2.0, maks_baris=256, cache=cache_hasil, direktori_registri=None):
+        self._bundle_awal = bundle
+        self.pemegang = None
+        self.cache = cache
+        self.direktori_bundle = direktori_bundle
+        self.direktori_registri = direktori_registri
+        self.tunggu_ms = tunggu_ms
+        self.maks_baris = maks_baris
+        self.pengumpul = None
+        self.siap = False
+        self.error_muat = None
+        self._tugas_muat = None
+
+    async def mulai(self):
+        """Memuat dan memanaskan model di background; /health langsung aktif."""
+        self._tugas_muat = asyncio.get_running_loop().create_task(self._muat())
+
+    async def tunggu_siap(self):
+        if self._tugas_muat is not None:
+            await self._tugas_muat
+        return self.siap
+
+    @property
+    def bundle(self):
+        """Bundle yang sedang dilayani (berganti saat hot-swap registri)."""
+        return self.pemegang.bundle if self.pemegang is not None else self._bundle_awal
+
+    async def berhenti(self):
+        if self.pengumpul is not None:
+            await self.pengumpul.berhenti()
+        if self.pemegang is not None:
+            self.pemegang.berhenti()
+
+    async def _muat(self):
+        loop = asyncio.get_running_loop()
+        try:
+            if self.direktori_registri is not None:
+                self.pemegang = await loop.run_in_executor(
+                    None, registri.PemegangModel.dari_registri, self.direktori_registri)
+                self.pemegang.pantau()
+            else:
+                bundle = self._bundle_awal
+                if bundle is None:
+                    bundle = await loop.run_in_executor(None, artefak.muat_artefak, self.direktori_bundle)
+                await loop.run_in_executor(None, bundle.pemanasan)
+                self.pemegang = registri.PemegangModel(bundle)
+        except Exception as e:
+            self.error_muat = str(e)
+            return
+        self.pengumpul = PengumpulBatch(self.bundle, self.tunggu_ms, self.maks_baris)
+        self.pengumpul.mulai()
+        self.siap = True
+
+    async def tangani(self, metode, path, body=b""):
+        """Menangani satu request; mengembalikan (status HTTP, payload dict atau teks untuk /metrics)."""
+        path, _, query = path.partition("?")
+        if path == "/health":
+            if metode != "GET":
+                return 405, {"error": "Gunakan GET."}
+            return 200, {"status": "hidup",
+                         "statistik": self.pengumpul.statistik if self.pengumpul else None,
+                         "cache": self.cache.statistik() if self.cache else None,
+                         "model": self.pemegang.info() if self.pemegang else None}
+        if path == "/ready":
+            if metode != "GET":
+                return 405, {"error": "Gunakan GET."}
+            if self.siap:
+                return 200, {"status": "siap", "versi_model": self.bundle.versi}
+            return 503, {"status": "belum siap", "error": self.error_muat}
+        if path == "/metrics":
+            if metode != "GET":
+                return 405, {"error": "Gunakan GET."}
+            return 200, metrik.teks_prometheus(self._gauge())
+        if path == "/drift":
+            if metode != "GET":
+                return 405, {"error": "Gunakan GET."}
+            monitor = drift.monitor_untuk(self.bundle) if self.siap else None
+            if monitor is None:
+                return 404, {"error": "Monitor drift tidak aktif (model belum siap atau tanpa referensi drift)."}
+            return 200, dict(monitor.skor(), versi_model=self.bundle.versi)
+        if path == "/prediksi":
+            if metode != "POST":
+                return 405, {"error": "Gunakan POST."}
+            mulai = time.perf_counter()
+            status, payload = await self._tangani_prediksi(body, parse_qs(query))
+            durasi = time.perf_counter() - mulai
+            metrik.amati("hotel_request_detik", durasi, status=status)
+            metrik.request_selesai()
+            metrik.log_json("request", status=status, durasi_ms=round(durasi * 1000, 4),
+                            error=payload.get("error"))
+            return status, payload
+        return 404, {"error": f"Path '{path}' tidak ditemukan."}
+
+    def _gauge(self):
+        """Statistik micro-batch dan cache sebagai gauge untuk /metrics."""
+        gauge = {}
+        if self.pengumpul is not None:
+            gauge.update({f"hotel_batch_{nama}": nilai for nama, nilai in self.pengumpul.statistik.items()})
+        if self.cache is not None:
+            gauge.update({f"hotel_cache_{nama}": nilai for nama, nilai in self.cache.statistik().items()})
+        if self.pemegang is not None:
+            gauge.update(self.pemegang.gauge())
+        gauge["hotel_model_siap"] = int(self.siap)
+        return gauge
+
+    async def _tangani_prediksi(self, body, query=None):
+        if not self.siap:
+            return 503, {"error": "Model belum siap."}
+        metode = (query or {}).get("penjelasan", [None])[-1]
+        if metode in ("1", "true"):
+            metode = "saabas"
+        if metode in ("0", "false", ""):
+            metode = None
+        if metode is not None and metode not in penjelasan.METODE:
+            return 400, {"error": f"Metode penjelasan '{metode}' tidak dikenal "
+                                  f"(pilihan: {', '.join(penjelasan.METODE)})."}
+        try:
+            data = json.loads(body or b"null", parse_constant=_tolak_konstanta)
+        except ValueError:
+            return 400, {"error": "Body harus berupa JSON yang valid."}
+        tunggal = isinstance(data, dict)
+        daftar = [data] if tunggal else data
+        if not isinstance(daftar, list) or not daftar:
+            return 400, {"error": "Body harus berupa objek input atau list objek input yang tidak kosong."}
+        try:
+            daftar = [validasi_input(baris) for baris in daftar]
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        if metode == "shap" and len(daftar) > penjelasan.MAKS_BARIS_SHAP:
+            return 400, {"error": f"Penjelasan 'shap' dibatasi {penjelasan.MAKS_BARIS_SHAP} baris per request; "
+                                  "gunakan 'saabas' untuk batch besar."}
+        # Satu versi model untuk seluruh request, walaupun hot-swap terjadi di tengahnya
+        bundle = self.bundle
+        try:
+            # ADR utama selalu dari prediksi biasa, sehingga sama dengan/tanpa penjelasan
+            if metode is None:
+                adr = await self._prediksi_dengan_cache(daftar, None, bundle)
+            else:
+                adr, hasil = await asyncio.gather(self._prediksi_dengan_cache(daftar, None, bundle),
+                                                   self._prediksi_dengan_cache(daftar, metode, bundle))
+        except Exception as e:
+            return 500, {"error": f"Terjadi kesalahan saat melakukan prediksi: {e}"}
+        drift.amati(bundle, daftar)
+        self.pemegang.bayangkan(daftar, adr, bundle)
+        if metode is None:
+            return 200, {"adr": adr[0] if tunggal else adr, "versi_model": bundle.versi}
+        alasan = [{k: v for k, v in item.items() if k != "adr"} for item in hasil]
+        return 200, {"adr": adr[0] if tunggal else adr, "penjelasan": alasan[0] if tunggal else alasan,
+                     "metode_penjelasan": metode, "versi_model": bundle.versi}
+
+    async def _prediksi_dengan_cache(self, daftar, metode=None, bundle=None):
+        """
+        Mengambil hasil dari cache; hanya baris yang miss dikirim ke micro-batch.
+        Penjelasan disimpan dengan kunci sendiri, terpisah dari prediksi biasa.
+        """
+        bundle = bundle or self.bundle
+        if self.cache is None:
+            hasil = await self.pengumpul.prediksi(daftar, metode, bundle)
+            return list(hasil) if metode else [float(nilai) for nilai in hasil]
+        daftar_kunci = [kunci_kanonik(bundle.versi, baris) for baris in daftar]
+        kunci_cache = [kunci_penjelasan(kunci, metode) if metode else kunci for kunci in daftar_kunci]
+        hasil = [self.cache.ambil(kunci) for kunci in kunci_cache]
+        indeks_miss = [i for i, nilai in enumerate(hasil) if nilai is TIDAK_ADA]
+        if indeks_miss:
+            baru = await self.pengumpul.prediksi([daftar[i] for i in indeks_miss], metode, bundle)
+            for i, nilai in zip(indeks_miss, baru):
+                hasil[i] = nilai if metode else float(nilai)
+                self.cache.simpan(kunci_cache[i], hasil[i])
+        return hasil
+
+    async def _koneksi(self, reader, writer):
+        """Loop HTTP/1.1 keep-alive minimal untuk satu koneksi."""
+        try:
+            while True:
+                try:
+                    kepala = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    # Header melebihi batas buffer stream: sisanya tidak bisa dibaca sebagai request
+                    await self._tulis(writer, 431, {"error": "Header request terlalu besar."}, False)
+                    break
+                baris = kepala.decode("latin-1").split("\r\n")
+                try:
+                    metode, path, versi_http = baris[0].split(" ", 2)
+                except ValueError:
+                    await self._tulis(writer, 400, {"error": "Request line tidak valid."}, False)
+                    break
+                header = {}
+                for h in baris[1:]:
+                    if ":" in h:
+                        nama, nilai = h.split(":", 1)
+                        header[nama.strip().lower()] = nilai.strip()
+                panjang = header.get("content-length", "0") or "0"
+                if not (panjang.isascii() and panjang.isdigit()):
+                    # Panjang tidak valid: sisa stream tidak bisa dipisah menjadi request berikutnya
+                    await self._tulis(writer, 400, {"error": "Header Content-Length tidak valid."}, False)
+                    break
+                panjang = int(panjang)
+                if panjang > MAKS_UKURAN_BODY:
+                    await self._tulis(writer, 413, {"error": "Body terlalu besar."}, False)
+                    break
+                body = await reader.readexactly(panjang) if panjang else b""
+                tetap_hidup = (header.get("connection", "").lower() != "close"
+                               and versi_http.upper() == "HTTP/1.1")
+                status, payload = await self.tangani(metode.upper(), path, body)
+                await self._tulis(writer, status, payload, tetap_hidup)
+                if not tetap_hidup:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _tulis(writer, status, payload, tetap_hidup):
+        # Payload teks (mis. /metrics) dikirim apa adanya, selain itu JSON
+        if isinstance(payload, str):
+            isi, tipe = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            isi, tipe = json.dumps(payload).encode(), "application/json"
+        alasan = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+                  503: "Service Unavailable"}.get(status, "")
+        writer.write(
+            f"HTTP/1.1 {status} {alasan}\r\nContent-Type: {tipe}\r\n"
+            f"Content-Length: {len(isi)}\r\n"
+            f"Connection: {'keep-alive' if tetap_hidup else 'close'}\r\n\r\n".encode() + isi)
+        await writer.drain()
+
+    async def jalankan(self, host="0.0.0.0", port=8080):
+        """Menjalankan server HTTP sampai dihentikan."""
+        await self.mulai()
+        server = await asyncio.start_server(self._koneksi, host, port)
+        print(f"Layanan prediksi ADR berjalan di http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.berhenti()
+
+
+class KlienLokal:
+    """Klien in-process untuk `Layanan`, tanpa socket (untuk pengujian lokal)."""
+
+    def __init__(self, layanan):
+        self.layanan = layanan
+
+    async def get(self, path):
+        return await self.layanan.tangani("GET", path)
+
+    async def post(self, path, data):
+        return await self.layanan.tangani("POST", path, json.dumps(data).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layanan HTTP prediksi ADR dengan micro-batching.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--bundle", default=artefak.DIREKTORI_BUNDLE, help="Folder bundle model.")
+    parser.add_argument("--registri", default=registri.DIREKTORI_REGISTRI,
+                        help="Folder registri model; versi aktifnya dilayani dan di-hot-swap (menggantikan --bundle).")
+    parser.add_argument("--tunggu-ms", type=float, default=2.0,
+                        help="Jendela tunggu maksimal untuk mengumpulkan satu micro-batch.")
+    parser.add_argument("--maks-baris", type=int, default=256,
+                        help="Jumlah baris maksimal per micro-batch.")
+    parser.add_argument("--tanpa-cache", action="store_true", help="Nonaktifkan cache hasil prediksi.")
+    parser.add_argument("--profil", type=int, default=0, metavar="N",
+                        help="Profil sampling untuk N request prediksi berikutnya (folded stacks).")
+    parser.add_argument("--file-profil", default="profil.folded", help="File keluaran profil.")
+    args = parser.parse_args()
+    if args.profil > 0:
+        metrik.mulai_profil(args.profil, args.file_profil)
+    layanan = Layanan(direktori_bundle=args.bundle, tunggu_ms=args.tunggu_ms, maks_baris=args.maks_baris,
+                      cache=None if args.tanpa_cache else cache_hasil, direktori_registri=args.registri)
+    try:
+        asyncio.run(layanan.jalankan(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
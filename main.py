@@ -1,4 +1,6 @@
 import streamlit as st
+import os
+import metrik
 st.set_page_config(layout="wide")
 st.image("Hotel-Room-Banner.jpg", use_container_width=True)
 st.title("Hotel Pricing Optimization App")
@@ -7,20 +9,52 @@ st.markdown("""
 Selamat datang di aplikasi prediksi harga kamar hotel!  
 """)
 
-# Tab Navigasi di Atas
-tab1, tab2, tab3 = st.tabs(["🏷️ Prediksi Harga", "📊 EDA", "🧑 Tentang Saya"])
+# Mode start cepat: HOTEL_APP_LAZY=1 memakai navigasi halaman sehingga modul
+# berat (pandas, plotly, xgboost) baru di-import saat halamannya dibuka.
+MODE_LAZY = os.environ.get("HOTEL_APP_LAZY", "0") == "1"
 
-# Prediksi Harga
-with tab1:
+# HOTEL_METRIK_PORT=9100 membuka GET /metrics (sekali per proses, bukan per rerun)
+metrik.mulai_server_dari_env()
+
+
+def halaman_prediksi():
     import prediksi
-    prediksi.tampilkan_prediksi()
+    with metrik.ukur("hotel_app_halaman_detik", halaman="prediksi"):
+        prediksi.tampilkan_prediksi()
+
 
-# EDA
-with tab2:
+def halaman_eda():
     import eda
-    eda.tampilkan_eda()
+    with metrik.ukur("hotel_app_halaman_detik", halaman="eda"):
+        eda.tampilkan_eda()
 
-# Tentang Saya
-with tab3:
+
+def halaman_tentang_saya():
     import about
-    about.tampilkan_tentang_saya()
\ No newline at end of file
+    with metrik.ukur("hotel_app_halaman_detik", halaman="tentang_saya"):
+        about.tampilkan_tentang_saya()
+
+
+if MODE_LAZY:
+    halaman = st.navigation([
+        st.Page(halaman_prediksi, title="Prediksi Harga", icon="🏷️", default=True),
+        st.Page(halaman_eda, title="EDA", icon="📊"),
+        st.Page(halaman_tentang_saya, title="Tentang Saya", icon="🧑"),
+    ])
+    halaman.run()
+else:
+    # Tab Navigasi di Atas. Setiap tab adalah fragment: interaksi widget di
+    # dalam satu tab hanya menjalankan ulang tab tersebut, bukan ketiganya.
+    tab1, tab2, tab3 = st.tabs(["🏷️ Prediksi Harga", "📊 EDA", "🧑 Tentang Saya"])
+
+    # Prediksi Harga
+    with tab1:
+        st.fragment(halaman_prediksi)()
+
+    # EDA
+    with tab2:
+        st.fragment(halaman_eda)()
+
+    # Tentang Saya
+    with tab3:
+        st.fragment(halaman_tentang_saya)()
@@ -0,0 +1,460 @@
+"""
+Instrumentasi waktu per tahap untuk prediksi, pemuatan artefak dan EDA.
+
+Durasi dicatat sebagai histogram (bucket kumulatif seperti Prometheus) yang
+bisa dibaca lewat `teks_prometheus()` (endpoint `/metrics` di `layanan.py`,
+atau server kecil untuk aplikasi Streamlit lewat `HOTEL_METRIK_PORT`).
+Pengaturan lewat environment:
+
+    HOTEL_METRIK=0          matikan pencatatan (ukur() menjadi no-op)
+    HOTEL_LOG_JSON=1        tulis log terstruktur (satu objek JSON per baris) ke stderr
+    HOTEL_METRIK_PORT=9100  aplikasi Streamlit membuka GET /metrics di port ini
+    HOTEL_PROFIL=50         profil sampling untuk 50 request berikutnya, ditulis ke profil.folded
+
+File profil berformat "folded stacks" (satu baris per stack + jumlah sampel)
+yang bisa dibuka di speedscope atau diubah menjadi flame graph dengan
+`flamegraph.pl profil.folded > profil.svg`.
+"""
+import bisect
+import contextlib
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+AKTIF = os.environ.get("HOTEL_METRIK", "1") != "0"
+LOG_JSON = os.environ.get("HOTEL_LOG_JSON", "0") == "1"
+
+# Batas bucket (detik): 50 mikrodetik sampai 10 detik
+BATAS_BAWAAN = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Batas bucket untuk histogram yang bukan durasi (rasio tanpa satuan)
+BATAS_RASIO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BATAS_METRIK = {
+    "hotel_bayangan_selisih_rasio": BATAS_RASIO,
+}
+
+BANTUAN = {
+    "hotel_prediksi_tahap_detik": "Durasi tiap tahap prediksi ADR (langkah bernomor prediksi_adr, predict, expm1).",
+    "hotel_muat_artefak_detik": "Durasi import dan pemuatan artefak model per tahap.",
+    "hotel_eda_detik": "Durasi pemuatan data dan agregasi dashboard EDA.",
+    "hotel_request_detik": "Durasi total request prediksi di layanan API.",
+    "hotel_app_halaman_detik": "Durasi render per tab/halaman aplikasi Streamlit.",
+    "hotel_bayangan_detik": "Durasi skor model bayangan (kandidat) per request yang disampel.",
+    "hotel_bayangan_selisih_rasio": "Selisih relatif |ADR kandidat - ADR dilayani| / ADR dilayani per baris.",
+    "hotel_drift_detik": "Durasi pembaruan sketsa drift per request.",
+    "hotel_drift_jumlah_baris": "Jumlah baris input di jendela monitor drift.",
+    "hotel_drift_psi": "Population Stability Index input terhadap data training, per fitur.",
+    "hotel_drift_ks": "Statistik Kolmogorov-Smirnov input terhadap data training, per fitur numerik.",
+    "hotel_drift_di_luar_rentang_rasio": "Rasio input di luar rentang min-maks data training, per fitur numerik.",
+    "hotel_drift_tidak_dikenal_rasio": "Rasio kategori input yang tidak ada di data training, per fitur.",
+}
+
+_log = logging.getLogger("hotel")
+_lokal = threading.local()
+
+
+class Histogram:
+    """Histogram (durasi atau rasio) dengan bucket tetap; aman dipakai dari banyak thread."""
+
+    def __init__(self, batas=BATAS_BAWAAN):
+        self.batas = batas
+        self.jumlah_bucket = [0] * (len(batas) + 1)
+        self.jumlah = 0
+        self.total = 0.0
+        self._kunci = threading.Lock()
+
+    def amati(self, detik):
+        i = bisect.bisect_left(self.batas, detik)
+        with self._kunci:
+            self.jumlah_bucket[i] += 1
+            self.jumlah += 1
+            self.total += detik
+
+    def amati_banyak(self, daftar_nilai):
+        """Seperti `amati` untuk banyak nilai sekaligus, dengan satu kali lock."""
+        indeks = [bisect.bisect_left(self.batas, nilai) for nilai in daftar_nilai]
+        with self._kunci:
+            for i in indeks:
+                self.jumlah_bucket[i] += 1
+            self.jumlah += len(indeks)
+            self.total += sum(daftar_nilai)
+
+    def salinan(self):
+        """(bucket kumulatif per batas, jumlah, total detik)."""
+        with self._kunci:
+            per_bucket, jumlah, total = list(self.jumlah_bucket), self.jumlah, self.total
+        kumulatif, berjalan = [], 0
+        for n in per_bucket[:-1]:
+            berjalan += n
+            kumulatif.append(berjalan)
+        return kumulatif, jumlah, total
+
+
+# (nama metrik, pasangan label sesuai urutan argumen) -> Histogram
+_histogram = {}
+_kunci_registri = threading.Lock()
+_penyedia_gauge = []
+
+
+def _ambil_histogram(nama, label):
+    kunci = (nama, label)
+    histogram = _histogram.get(kunci)
+    if histogram is None:
+        with _kunci_registri:
+            histogram = _histogram.setdefault(kunci, Histogram(BATAS_METRIK.get(nama, BATAS_BAWAAN)))
+    return histogram
+
+
+def amati(nama, detik, **label):
+    """Mencatat satu durasi `detik` ke histogram `nama` dengan label `label`."""
+    if not AKTIF:
+        return
+    diam = getattr(_lokal, "diam", None)
+    if diam is not None and nama in diam:
+        return
+    _ambil_histogram(nama, tuple(label.items())).amati(detik)
+    jejak = getattr(_lokal, "jejak", None)
+    if jejak is not None:
+        tahap = label.get("tahap", nama)
+        jejak[tahap] = jejak.get(tahap, 0.0) + detik
+
+
+def amati_banyak(nama, daftar_nilai, **label):
+    """Mencatat list nilai (mis. selisih per baris satu batch) ke histogram `nama`."""
+    if not AKTIF or not daftar_nilai:
+        return
+    diam = getattr(_lokal, "diam", None)
+    if diam is not None and nama in diam:
+        return
+    _ambil_histogram(nama, tuple(label.items())).amati_banyak(daftar_nilai)
+
+
+def diamkan_thread(*nama):
+    """
+    Histogram `nama` tidak dicatat dari thread pemanggil, misalnya tahap
+    prediksi di thread skor bayangan agar tidak bercampur dengan model yang
+    dilayani.
+    """
+    _lokal.diam = frozenset(nama)
+
+
+def amati_tahap(nama, durasi, **label):
+    """Mencatat dict {tahap: detik} sekaligus, misalnya hasil akumulasi di dalam loop."""
+    for tahap, detik in durasi.items():
+        amati(nama, detik, tahap=tahap, **label)
+
+
+class _Pengukur:
+    __slots__ = ("nama", "label", "mulai")
+
+    def __init__(self, nama, label):
+        self.nama = nama
+        self.label = label
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        amati(self.nama, time.perf_counter() - self.mulai, **self.label)
+        return False
+
+
+_TANPA_UKUR = contextlib.nullcontext()
+
+
+def ukur(nama, **label):
+    """
+    Context manager yang mencatat durasi blok ke histogram `nama`, misalnya
+    `with metrik.ukur("hotel_eda_detik", tahap="scan_penuh"): ...`.
+    Jika metrik dimatikan, mengembalikan context manager kosong bersama.
+    """
+    return _Pengukur(nama, label) if AKTIF else _TANPA_UKUR
+
+
+@contextlib.contextmanager
+def jejak():
+    """
+    Mengumpulkan durasi per tahap yang dicatat di thread ini selama blok
+    berjalan, untuk log per request/batch: `with jejak() as tahap: ...`.
+    """
+    sebelumnya = getattr(_lokal, "jejak", None)
+    _lokal.jejak = tahap = {}
+    try:
+        yield tahap
+    finally:
+        _lokal.jejak = sebelumnya
+
+
+def _escape(nilai):
+    return str(nilai).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_label(label, tambahan=()):
+    pasangan = sorted(label) + list(tambahan)
+    if not pasangan:
+        return ""
+    isi = ",".join(f'{k}="{_escape(v)}"' for k, v in pasangan)
+    return "{" + isi + "}"
+
+
+def daftarkan_gauge(fungsi):
+    """
+    Mendaftarkan `fungsi()` yang mengembalikan gauge (format sama dengan
+    argumen `teks_prometheus`) untuk ikut ditulis di setiap /metrics.
+    """
+    with _kunci_registri:
+        if fungsi not in _penyedia_gauge:
+            _penyedia_gauge.append(fungsi)
+    return fungsi
+
+
+def _kumpulkan_gauge(gauge):
+    semua = {}
+    with _kunci_registri:
+        penyedia = list(_penyedia_gauge)
+    for fungsi in penyedia:
+        try:
+            semua.update(fungsi())
+        except Exception as e:
+            log_json("gauge_gagal", penyedia=getattr(fungsi, "__qualname__", repr(fungsi)), error=str(e))
+    semua.update(gauge or {})
+    # Kunci berupa nama saja, atau (nama, ((label, nilai), ...)) untuk gauge berlabel
+    return sorted(((kunci, ()) if isinstance(kunci, str) else kunci, nilai) for kunci, nilai in semua.items())
+
+
+def teks_prometheus(gauge=None):
+    """
+    Semua histogram dalam format teks Prometheus (versi 0.0.4). `gauge`
+    opsional berisi {nama: nilai} atau {(nama, label): nilai} tambahan,
+    misalnya statistik cache, digabung dengan gauge dari `daftarkan_gauge`.
+    """
+    with _kunci_registri:
+        item = sorted(_histogram.items())
+    baris = []
+    nama_sebelumnya = None
+    for (nama, label), histogram in item:
+        if nama != nama_sebelumnya:
+            baris.append(f"# HELP {nama} {BANTUAN.get(nama, nama)}")
+            baris.append(f"# TYPE {nama} histogram")
+            nama_sebelumnya = nama
+        kumulatif, jumlah, total = histogram.salinan()
+        for batas, n in zip(histogram.batas, kumulatif):
+            baris.append(f"{nama}_bucket{_format_label(label, [('le', repr(batas))])} {n}")
+        baris.append(f"{nama}_bucket{_format_label(label, [('le', '+Inf')])} {jumlah}")
+        baris.append(f"{nama}_sum{_format_label(label)} {total:.9f}")
+        baris.append(f"{nama}_count{_format_label(label)} {jumlah}")
+    for (nama, label), nilai in _kumpulkan_gauge(gauge):
+        if nama != nama_sebelumnya:
+            if nama in BANTUAN:
+                baris.append(f"# HELP {nama} {BANTUAN[nama]}")
+            baris.append(f"# TYPE {nama} gauge")
+            nama_sebelumnya = nama
+        baris.append(f"{nama}{_format_label(label)} {nilai}")
+    return "\n".join(baris) + "\n"
+
+
+def ringkasan():
+    """Jumlah, rata-rata dan total (ms) per histogram, untuk log atau /health."""
+    with _kunci_registri:
+        item = sorted(_histogram.items())
+    hasil = {}
+    for (nama, label), histogram in item:
+        _, jumlah, total = histogram.salinan()
+        kunci = nama + _format_label(label)
+        hasil[kunci] = {"jumlah": jumlah, "total_ms": round(total * 1000, 3),
+                        "rata_ms": round(total * 1000 / jumlah, 4) if jumlah else 0.0}
+    return hasil
+
+
+def reset():
+    with _kunci_registri:
+        _histogram.clear()
+
+
+def log_json(peristiwa, **field):
+    """Menulis satu log terstruktur (JSON satu baris) jika `HOTEL_LOG_JSON=1`."""
+    if not LOG_JSON:
+        return
+    if not _log.handlers:
+        penangan = logging.StreamHandler(sys.stderr)
+        penangan.setFormatter(logging.Formatter("%(message)s"))
+        _log.addHandler(penangan)
+        _log.setLevel(logging.INFO)
+        _log.propagate = False
+    catatan = {"waktu": datetime.datetime.now().isoformat(timespec="milliseconds"), "peristiwa": peristiwa}
+    catatan.update(field)
+    _log.info(json.dumps(catatan, default=str))
+
+
+# Profiler sampling (opt-in)
+
+class ProfilerSampling:
+    """
+    Profiler sampling berbasis `sys._current_frames()` untuk `n_request`
+    request berikutnya. Hanya thread yang sedang berada di dalam
+    `bagian_diprofil()` yang disampel, sehingga thread idle (event loop,
+    server Streamlit) tidak mengotori profil. Hasilnya ditulis sebagai
+    folded stacks ke `path` setelah `n_request` request selesai.
+    """
+
+    def __init__(self, n_request, path="profil.folded", interval_ms=2.0):
+        self.sisa = n_request
+        self.path = path
+        self.interval = interval_ms / 1000
+        self.sampel = Counter()
+        self.thread_aktif = Counter()
+        self._kunci = threading.Lock()
+        self._berhenti = threading.Event()
+        self._thread = threading.Thread(target=self._putaran, name="profiler-sampling", daemon=True)
+
+    def mulai(self):
+        self._thread.start()
+        return self
+
+    def _putaran(self):
+        while not self._berhenti.wait(self.interval):
+            with self._kunci:
+                aktif = [tid for tid, n in self.thread_aktif.items() if n > 0]
+            if not aktif:
+                continue
+            frame_semua = sys._current_frames()
+            for tid in aktif:
+                frame = frame_semua.get(tid)
+                stack = []
+                while frame is not None:
+                    kode = frame.f_code
+                    stack.append(f"{os.path.basename(kode.co_filename)}:{kode.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    self.sampel[";".join(reversed(stack))] += 1
+
+    def masuk(self):
+        with self._kunci:
+            self.thread_aktif[threading.get_ident()] += 1
+
+    def keluar(self):
+        with self._kunci:
+            self.thread_aktif[threading.get_ident()] -= 1
+
+    def request_selesai(self):
+        """Mengurangi sisa request; menulis profil dan berhenti saat sisa habis."""
+        with self._kunci:
+            self.sisa -= 1
+            selesai = self.sisa == 0
+        if selesai:
+            self.berhenti()
+        return selesai
+
+    def berhenti(self):
+        self._berhenti.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        with open(self.path, "w") as f:
+            for stack, jumlah in self.sampel.most_common():
+                f.write(f"{stack} {jumlah}\n")
+        log_json("profil_ditulis", path=self.path, jumlah_sampel=sum(self.sampel.values()))
+
+
+_profiler = None
+
+
+def mulai_profil(n_request, path="profil.folded", interval_ms=2.0):
+    """Mengaktifkan profiler sampling untuk `n_request` request berikutnya."""
+    global _profiler
+    _profiler = ProfilerSampling(n_request, path, interval_ms).mulai()
+    return _profiler
+
+
+@contextlib.contextmanager
+def bagian_diprofil():
+    """Menandai thread ini untuk disampel profiler selama blok berjalan (no-op jika profiler mati)."""
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    profiler.masuk()
+    try:
+        yield
+    finally:
+        profiler.keluar()
+
+
+def request_selesai(n=1):
+    """Dipanggil setelah setiap request prediksi; mematikan profiler setelah N request."""
+    global _profiler
+    profiler = _profiler
+    if profiler is None:
+        return
+    for _ in range(n):
+        if profiler.request_selesai():
+            _profiler = None
+            return
+
+
+if os.environ.get("HOTEL_PROFIL"):
+    mulai_profil(int(os.environ["HOTEL_PROFIL"]))
+
+
+# Server /metrics untuk aplikasi Streamlit
+
+_server = None
+_kunci_server = threading.Lock()
+# Diisi pesan error jika bind gagal, agar rerun Streamlit tidak mencoba (dan mencatat) ulang
+_server_gagal = None
+
+
+def mulai_server(port, host="0.0.0.0"):
+    """
+    Membuka `GET /metrics` di thread daemon (sekali per proses). Dipakai oleh
+    aplikasi Streamlit yang tidak punya endpoint HTTP sendiri.
+    """
+    global _server
+    with _kunci_server:
+        if _server is None:
+            _server = _buat_server(host, port)
+    return _server
+
+
+def _buat_server(host, port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Penangan(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            isi = teks_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(isi)))
+            self.end_headers()
+            self.wfile.write(isi)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Penangan)
+    threading.Thread(target=server.serve_forever, name="server-metrik", daemon=True).start()
+    return server
+
+
+def mulai_server_dari_env():
+    """
+    Menjalankan `mulai_server` jika `HOTEL_METRIK_PORT` di-set. Bind yang
+    gagal dicatat sekali dan tidak dicoba lagi selama proses berjalan.
+    """
+    global _server_gagal
+    if not os.environ.get("HOTEL_METRIK_PORT") or not AKTIF or _server_gagal is not None:
+        return
+    try:
+        mulai_server(int(os.environ["HOTEL_METRIK_PORT"]))
+    except OSError as e:
+        _server_gagal = str(e)
+        log_json("server_metrik_gagal", error=_server_gagal)
@@ -0,0 +1,85 @@
+"""
+Penjelasan prediksi: kontribusi setiap field input terhadap ADR prediksi.
+
+Kontribusi dihitung langsung dari booster (`pred_contribs`) dalam ruang
+log1p(ADR), lalu kolom model hasil one-hot dan target encoding
+dikelompokkan kembali ke field input asalnya (hotel, meal, country, ...).
+Untuk setiap baris berlaku
+
+    log1p(adr) = dasar_log + sum(kontribusi_log)
+
+Metode:
+* "saabas": atribusi per jalur pohon (`approx_contribs`), biayanya beberapa
+  kali lipat `predict` saja sehingga cocok untuk batch besar;
+* "shap": TreeSHAP eksak, jauh lebih mahal (ratusan kali `predict`),
+  hanya atas permintaan (`?penjelasan=shap` di API) dan dibatasi
+  `MAKS_BARIS_SHAP` baris.
+
+ADR diambil dari jumlah kontribusi (termasuk bias), sehingga penjelasan
+tidak memerlukan panggilan `predict` kedua.
+"""
+import numpy as np
+
+import metrik
+
+METODE = ("saabas", "shap")
+MAKS_BARIS_SHAP = 1000
+
+
+def kelompok_kolom(encoder):
+    """(nama field input, matriks float32 kolom model x field) untuk menjumlahkan kontribusi per field."""
+    sumber = list(encoder.model_columns)
+    for field, offset in encoder.offset_one_hot.items():
+        for j in offset.values():
+            sumber[j] = field
+    nama = list(dict.fromkeys(sumber))
+    matriks = np.zeros((len(sumber), len(nama)), dtype=np.float32)
+    matriks[np.arange(len(sumber)), [nama.index(field) for field in sumber]] = 1
+    return nama, matriks
+
+
+def jelaskan(bundle, data, metode="saabas"):
+    """
+    Prediksi dan penjelasan untuk `data` (DataFrame atau dict berisi kolom)
+    dengan satu kali encoding dan satu panggilan booster. Mengembalikan (ADR,
+    kontribusi log1p per field berukuran (N, len(nama)), nilai dasar log1p,
+    nama field).
+    """
+    import xgboost as xgb
+
+    if metode not in METODE:
+        raise ValueError(f"Metode penjelasan '{metode}' tidak dikenal (pilihan: {', '.join(METODE)}).")
+    fitur = bundle.encoder.transform(data)
+    with metrik.ukur("hotel_prediksi_tahap_detik", tahap="kontribusi", jalur=metode):
+        kontribusi = bundle.booster.predict(xgb.DMatrix(fitur), pred_contribs=True,
+                                            approx_contribs=metode == "saabas")
+    # Kedua metode memenuhi bias + sum(kontribusi) = margin, yaitu log1p(ADR)
+    adr = np.expm1(kontribusi.sum(axis=1, dtype=np.float64)).astype(np.float32)
+    nama, matriks = kelompok_kolom(bundle.encoder)
+    # Kolom terakhir pred_contribs adalah bias (nilai dasar), sama untuk semua baris
+    dasar = float(kontribusi[0, -1]) if len(kontribusi) else 0.0
+    return adr, kontribusi[:, :-1] @ matriks, dasar, nama
+
+
+def ke_dict(adr, kontribusi, dasar, nama):
+    """List dict per baris {"adr", "dasar_log", "kontribusi_log": {field: nilai}} untuk cache dan API."""
+    return [{"adr": float(nilai), "dasar_log": dasar, "kontribusi_log": dict(zip(nama, baris))}
+            for nilai, baris in zip(adr.tolist(), kontribusi.tolist())]
+
+
+def plot_penjelasan(penjelasan, n_teratas=10):
+    """Bar chart efek (%) field dengan kontribusi terbesar untuk satu hasil `ke_dict`."""
+    import pandas as pd
+    import plotly.express as px
+
+    efek = pd.Series(penjelasan["kontribusi_log"])
+    efek = efek.reindex(efek.abs().sort_values(ascending=False).index[:n_teratas])[::-1]
+    tabel = pd.DataFrame({"field": efek.index, "efek": np.expm1(efek.to_numpy()) * 100})
+    fig = px.bar(tabel, x="efek", y="field", orientation="h",
+                 color=np.where(tabel["efek"] >= 0, "Menaikkan", "Menurunkan"),
+                 color_discrete_map={"Menaikkan": "#d62728", "Menurunkan": "#2ca02c"},
+                 labels={"efek": "Efek terhadap harga (%)", "field": "", "color": ""},
+                 title=f"Harga dasar model $ {np.expm1(penjelasan['dasar_log']):,.2f}")
+    fig.update_layout(title_x=0.5)
+    fig.update_traces(hovertemplate='%{y}: %{x:+.1f}%<extra></extra>')
+    return fig
@@ -0,0 +1,192 @@
+"""
+Pembaruan inkremental model ADR dari booking baru, tanpa training ulang penuh.
+
+Menambahkan putaran boosting ke booster yang sudah ada memakai data baru
+saja, dan memperbarui target encoding dari `statistik_target.json`
+(jumlah dan banyaknya target per kategori) sehingga histori tidak perlu
+dibaca ulang:
+
+    python perbarui.py --model model_baru --data booking_baru/ --keluaran model_versi
+
+Model di `--model` harus dihasilkan `latih.py` atau `perbarui.py` (butuh
+`statistik_target.json`). Hasilnya ditulis sebagai set artefak baru di
+`<keluaran>/<versi bundle>/`. Seperti `latih.py`, 20% baris data baru
+(dipilih dari hash isi baris) tidak ikut training dan dipakai sebagai
+holdout: pembaruan ditolak jika RMSE model baru di holdout lebih buruk dari
+model lama. Duplikat hanya dibuang di dalam data baru, bukan terhadap histori.
+Jika bundle induk punya referensi drift, sketsanya digabung dengan baris
+training data baru.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+import artefak
+import drift
+from encoder import EncoderTerkompilasi
+from latih import (FOLD_HOLDOUT, MODEL_COLUMNS, PARAMETER_NOTEBOOK, SumberData, StatistikTarget,
+                   _parameter_xgb, buat_matriks, daftar_file, evaluasi, simpan_artefak)
+
+FILE_STATISTIK = "statistik_target.json"
+FILE_LAPORAN = "laporan_perbarui.json"
+# Holdout yang terlalu kecil tidak cukup untuk membandingkan dua model
+MIN_BARIS_HOLDOUT = 200
+
+
+def muat_model(direktori):
+    """(Bundle, StatistikTarget) dari folder artefak hasil `latih.py`/`perbarui.py`."""
+    path_statistik = os.path.join(direktori, FILE_STATISTIK)
+    if not os.path.exists(path_statistik):
+        raise FileNotFoundError(f"'{path_statistik}' tidak ada; jalankan latih.py sekali untuk membuatnya.")
+    path_bundle = os.path.join(direktori, artefak.DIREKTORI_BUNDLE)
+    if os.path.isdir(path_bundle):
+        bundle = artefak.muat_bundle(path_bundle)
+    else:
+        bundle = artefak.bundle_dari_joblib(*(os.path.join(direktori, nama) for nama in (
+            "xgboost_model.joblib", "model_columns.joblib", "target_encoder.joblib")))
+    with open(path_statistik) as f:
+        statistik = StatistikTarget.dari_dict(json.load(f))
+
+    if bundle.encoder.kolom_log or bundle.encoder.scaler_mean is not None:
+        raise ValueError("Model dengan log1p/StandardScaler tidak didukung; latih ulang dengan latih.py.")
+    if any(abs(prior - statistik.prior) > 1e-9 for prior in bundle.encoder.prior_target.values()):
+        raise ValueError(f"'{path_statistik}' tidak cocok dengan target encoder model di '{direktori}'.")
+    return bundle, statistik
+
+
+def _evaluasi_fitur(booster, fitur, df):
+    """`evaluasi` untuk matriks fitur yang sudah di-encode dan ADR di `df`."""
+    return evaluasi(booster, xgb.DMatrix(fitur, label=np.log1p(df["adr"].to_numpy(dtype=np.float32))))
+
+
+def _simpan_versi(booster, te, statistik, keluaran, info, laporan, referensi=None):
+    """Menulis set artefak ke folder sementara lalu memindahkannya ke `<keluaran>/<versi>`."""
+    os.makedirs(keluaran, exist_ok=True)
+    sementara = os.path.join(keluaran, f".sementara_{os.getpid()}")
+    manifest = simpan_artefak(booster, te, statistik, sementara, info, referensi)
+    laporan["versi_bundle"] = manifest["versi"]
+    with open(os.path.join(sementara, FILE_LAPORAN), "w") as f:
+        json.dump(laporan, f, indent=1)
+    tujuan = os.path.join(keluaran, manifest["versi"])
+    if os.path.exists(tujuan):
+        # Isi model sama persis dengan versi yang sudah ada
+        shutil.rmtree(sementara)
+    else:
+        os.replace(sementara, tujuan)
+    return tujuan
+
+
+def perbarui(direktori_model, direktori_data, keluaran="model_versi", putaran=50, learning_rate=None,
+             direktori_holdout=None, toleransi=0.0, n_jobs=None, ukuran_chunk=200_000, log=print):
+    """
+    Menjalankan pembaruan inkremental dan mengembalikan laporan (dict).
+    `laporan["diterima"]` bernilai False jika holdout menolak pembaruan;
+    dalam hal ini tidak ada artefak yang ditulis.
+    """
+    mulai = time.perf_counter()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    bundle, statistik = muat_model(direktori_model)
+    files = daftar_file(direktori_data)
+    # k_fold=1: semua baris non-holdout berada di fold 0
+    sumber = SumberData(files, k_fold=1, ukuran_chunk=ukuran_chunk)
+
+    log(f"Statistik target encoding dari {len(files)} file data baru...")
+    kategori_lama = {kolom: set(per_nilai) for kolom, per_nilai in statistik.per_kategori.items()}
+    n_lama = statistik.n
+    # Tanpa referensi induk, sketsa dari data baru saja tidak mewakili data training model
+    referensi = None if bundle.referensi_drift is None else drift.PembangunReferensi(bundle.referensi_drift)
+    holdout = []
+    for df, fold in sumber.chunk_bersih():
+        latih = fold != FOLD_HOLDOUT
+        statistik.perbarui(df[latih], np.log1p(df["adr"].to_numpy()[latih]))
+        if referensi is not None:
+            referensi.perbarui(df[latih])
+        holdout.append(df[~latih])
+    te = statistik.ke_target_encoder()
+    sumber.encoder = EncoderTerkompilasi.dari_artefak(MODEL_COLUMNS, te)
+
+    parameter = dict(bundle.manifest.get("parameter", PARAMETER_NOTEBOOK))
+    if learning_rate is not None:
+        parameter["learning_rate"] = learning_rate
+    dlatih = buat_matriks(sumber, [0], nthread=n_jobs)
+    log(f"Menambah {putaran} putaran ke model {bundle.versi} dengan {dlatih.num_row()} baris baru...")
+    booster = xgb.train(_parameter_xgb(parameter, n_jobs, 42), dlatih, num_boost_round=putaran,
+                        xgb_model=bundle.booster)
+    # Atribut early stopping model lama akan membatasi predict() ke pohon lama
+    booster.set_attr(best_iteration=None, best_score=None)
+
+    set_holdout = {"data_baru": pd.concat(holdout, ignore_index=True) if holdout else pd.DataFrame()}
+    if direktori_holdout:
+        set_holdout["referensi"] = pd.concat(
+            [df for df, _ in SumberData(daftar_file(direktori_holdout), ukuran_chunk=ukuran_chunk).chunk_bersih()],
+            ignore_index=True)
+    perbandingan = {}
+    diterima = True
+    for nama, df in set_holdout.items():
+        if len(df) < MIN_BARIS_HOLDOUT:
+            log(f"Holdout '{nama}' hanya {len(df)} baris (minimal {MIN_BARIS_HOLDOUT}).")
+            perbandingan[nama] = {"jumlah_baris": len(df)}
+            diterima = False
+            continue
+        lama = _evaluasi_fitur(bundle.booster, bundle.encoder.transform(df), df)
+        baru = _evaluasi_fitur(booster, sumber.encoder.transform(df), df)
+        perbandingan[nama] = {"lama": lama, "baru": baru}
+        diterima &= baru["rmse_log"] <= lama["rmse_log"] * (1 + toleransi)
+        log(f"Holdout '{nama}' ({len(df)} baris): RMSE log {lama['rmse_log']:.5f} -> {baru['rmse_log']:.5f}")
+
+    laporan = {
+        "induk": bundle.versi,
+        "data": [{"file": os.path.basename(path), "sha256": artefak._sha256(path)} for path in files],
+        "parameter": parameter,
+        "putaran_tambahan": putaran,
+        "total_putaran": booster.num_boosted_rounds(),
+        "jumlah_baris_baru": int(dlatih.num_row()),
+        "jumlah_baris_statistik": {"sebelum": n_lama, "sesudah": statistik.n},
+        "kategori_baru": {kolom: sorted(map(str, set(per_nilai) - kategori_lama[kolom]))
+                          for kolom, per_nilai in statistik.per_kategori.items()},
+        "holdout": perbandingan,
+        "toleransi": toleransi,
+        "diterima": bool(diterima),
+        "durasi_detik": round(time.perf_counter() - mulai, 2),
+    }
+    if not diterima:
+        log("Pembaruan ditolak: model baru tidak lebih baik di holdout, artefak tidak ditulis.")
+        return laporan
+
+    tujuan = _simpan_versi(booster, te, statistik, keluaran, laporan=laporan, info={
+        "sumber": "perbarui.py", "induk": bundle.versi, "parameter": parameter,
+        "metrik_holdout": perbandingan["data_baru"]["baru"]}, referensi=referensi)
+    log(f"Artefak ditulis ke '{tujuan}', {laporan['durasi_detik']} detik.")
+    return laporan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pembaruan inkremental model ADR dari booking baru.")
+    parser.add_argument("--model", required=True, help="Folder artefak model saat ini (hasil latih.py).")
+    parser.add_argument("--data", required=True, help="Folder berisi file CSV/Parquet booking baru.")
+    parser.add_argument("--keluaran", default="model_versi", help="Folder induk untuk set artefak berversi.")
+    parser.add_argument("--putaran", type=int, default=50, help="Jumlah putaran boosting tambahan.")
+    parser.add_argument("--learning-rate", type=float, default=None,
+                        help="Learning rate putaran tambahan (bawaan: sama dengan model lama).")
+    parser.add_argument("--holdout", default=None,
+                        help="Folder holdout referensi tambahan, misalnya sampel histori.")
+    parser.add_argument("--toleransi", type=float, default=0.0,
+                        help="Kenaikan RMSE relatif yang masih diterima (0.01 = 1%%).")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Jumlah thread XGBoost (bawaan: semua core).")
+    parser.add_argument("--ukuran-chunk", type=int, default=200_000)
+    args = parser.parse_args()
+    laporan = perbarui(args.model, args.data, args.keluaran, args.putaran, args.learning_rate, args.holdout,
+                       args.toleransi, args.n_jobs, args.ukuran_chunk)
+    if not laporan["diterima"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Evaluator pohon XGBoost dengan NumPy untuk prediksi satu booking atau batch kecil.
+
+Untuk satu baris, sebagian besar waktu `predict` XGBoost habis untuk
+overhead tetap (validasi input, DMatrix/proxy, dispatch thread), bukan
+untuk menelusuri pohon. `PrediktorPohon` mengekspor booster menjadi array
+datar per simpul (indeks fitur, ambang, anak kiri/kanan, arah default untuk
+nilai hilang, nilai daun) dan menelusuri semua pohon sekaligus, level demi
+level, untuk semua baris batch dengan operasi vektor.
+
+Aktifkan di aplikasi dan layanan dengan `HOTEL_POHON_NUMPY=1`; batch yang
+lebih besar dari `MAKS_BARIS` tetap memakai `inplace_predict`. Cek paritas
+dengan XGBoost:
+
+    python pohon.py
+"""
+import json
+
+import numpy as np
+
+# Batch sampai ukuran ini diskor dengan PrediktorPohon jika diaktifkan; di atasnya
+# inplace_predict (C++) lebih cepat karena overhead tetapnya sudah tertutup
+MAKS_BARIS = 8
+
+
+class PrediktorPohon:
+    """
+    Ensemble pohon dalam array NumPy datar. Simpul semua pohon digabung
+    dalam satu array; `akar` berisi indeks simpul akar setiap pohon. Daun
+    menunjuk ke dirinya sendiri sebagai anak kiri dan kanan sehingga
+    penelusuran cukup diulang sebanyak kedalaman maksimum.
+    """
+
+    def __init__(self, fitur, ambang, kiri, kanan, default_kiri, nilai, akar, base_score, kedalaman):
+        self.fitur = fitur
+        self.ambang = ambang
+        self.kiri = kiri
+        self.kanan = kanan
+        self.default_kiri = default_kiri
+        self.nilai = nilai
+        self.akar = akar
+        self.base_score = base_score
+        self.kedalaman = kedalaman
+
+    @classmethod
+    def dari_booster(cls, booster):
+        """Mengekspor `xgboost.Booster` (gbtree, satu target, split numerik) ke array."""
+        model = json.loads(booster.save_raw(raw_format="json"))
+        learner = model["learner"]
+        gbm = learner["gradient_booster"]
+        if gbm["name"] != "gbtree" or int(learner["learner_model_param"]["num_target"]) > 1:
+            raise ValueError("PrediktorPohon hanya mendukung booster gbtree dengan satu target.")
+        if learner["objective"]["name"] != "reg:squarederror":
+            raise ValueError(f"Objective '{learner['objective']['name']}' tidak didukung.")
+
+        fitur, ambang, kiri, kanan, default_kiri, nilai, akar = [], [], [], [], [], [], []
+        kedalaman = 0
+        offset = 0
+        for pohon in gbm["model"]["trees"]:
+            if any(pohon["split_type"]):
+                raise ValueError("Split kategorikal tidak didukung.")
+            anak_kiri = np.asarray(pohon["left_children"], dtype=np.int64)
+            anak_kanan = np.asarray(pohon["right_children"], dtype=np.int64)
+            n_simpul = len(anak_kiri)
+            daun = anak_kiri == -1
+            indeks = np.arange(n_simpul)
+            kiri.append(np.where(daun, indeks, anak_kiri) + offset)
+            kanan.append(np.where(daun, indeks, anak_kanan) + offset)
+            fitur.append(np.where(daun, 0, pohon["split_indices"]))
+            kondisi = np.asarray(pohon["split_conditions"], dtype=np.float32)
+            # Untuk daun, split_conditions berisi nilai daun
+            ambang.append(np.where(daun, np.float32(0), kondisi))
+            nilai.append(np.where(daun, kondisi, np.float32(0)))
+            default_kiri.append(np.asarray(pohon["default_left"], dtype=bool))
+            akar.append(offset)
+            kedalaman = max(kedalaman, _kedalaman(anak_kiri, anak_kanan))
+            offset += n_simpul
+
+        # Format lama menulis "4.5E0", format baru "[4.5E0]"
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        return cls(np.concatenate(fitur).astype(np.intp), np.concatenate(ambang).astype(np.float32),
+                   np.concatenate(kiri).astype(np.intp), np.concatenate(kanan).astype(np.intp),
+                   np.concatenate(default_kiri), np.concatenate(nilai).astype(np.float32),
+                   np.asarray(akar, dtype=np.intp), base_score, kedalaman)
+
+    def prediksi_daun(self, fitur):
+        """
+        Indeks daun (baris x pohon) yang dicapai setiap baris `fitur`.
+        Penelusuran level demi level: di setiap level hanya simpul yang sedang
+        dikunjungi setiap (baris, pohon) yang dievaluasi.
+        """
+        n_baris, n_fitur = fitur.shape
+        datar = fitur.ravel()
+        hilang = np.isnan(datar).any()
+        # Offset baris dalam matriks datar, agar lookup fitur cukup satu fancy index
+        offset = (np.arange(n_baris, dtype=np.intp) * n_fitur)[:, None]
+        simpul = np.broadcast_to(self.akar, (n_baris, len(self.akar)))
+        for _ in range(self.kedalaman):
+            x = datar[offset + self.fitur[simpul]]
+            ke_kiri = x < self.ambang[simpul]
+            if hilang:
+                ke_kiri = np.where(np.isnan(x), self.default_kiri[simpul], ke_kiri)
+            simpul = np.where(ke_kiri, self.kiri[simpul], self.kanan[simpul])
+        return simpul
+
+    def prediksi_margin(self, fitur):
+        """Prediksi log1p(ADR) (float32) untuk matriks fitur hasil `EncoderTerkompilasi.transform`."""
+        fitur = np.ascontiguousarray(fitur, dtype=np.float32)
+        daun = self.prediksi_daun(fitur)
+        return (self.nilai[daun].sum(axis=1, dtype=np.float64) + self.base_score).astype(np.float32)
+
+
+def _kedalaman(kiri, kanan):
+    """Kedalaman maksimum satu pohon (jumlah split dari akar ke daun terdalam)."""
+    kedalaman = np.zeros(len(kiri), dtype=np.int64)
+    # Anak selalu memiliki indeks lebih besar dari induknya
+    for i in range(len(kiri)):
+        if kiri[i] != -1:
+            kedalaman[kiri[i]] = kedalaman[kanan[i]] = kedalaman[i] + 1
+    return int(kedalaman.max())
+
+
+def cek_paritas(n_baris=5000, seed=42):
+    """
+    Membandingkan `PrediktorPohon` dengan `inplace_predict` bundle dan
+    `model.predict` dari `xgboost_model.joblib` (jika ada), termasuk
+    `np.expm1`, untuk satu baris, batch kecil dan batch besar. Melempar
+    AssertionError jika berbeda.
+    """
+    import os
+    import pandas as pd
+    import artefak
+    from data_sintetis import buat_booking
+
+    bundle = artefak.muat_artefak()
+    prediktor = PrediktorPohon.dari_booster(bundle.booster)
+    input_df = pd.DataFrame(buat_booking(n_baris, seed=seed))
+    # Hari yang tidak dikenal menjadi NaN dan mengikuti arah default
+    input_df.loc[input_df.index[::50], "arrival_day_of_week"] = "Libur"
+    fitur = bundle.encoder.transform(input_df)
+    model = None
+    if os.path.exists("xgboost_model.joblib"):
+        import joblib
+        model = joblib.load("xgboost_model.joblib")
+
+    for n in (1, 16, n_baris):
+        hasil = prediktor.prediksi_margin(fitur[:n])
+        np.testing.assert_allclose(hasil, bundle.prediksi_log(fitur[:n]), rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(np.expm1(hasil), bundle.prediksi(input_df.iloc[:n]), rtol=1e-4)
+        if model is not None and model.get_booster().num_boosted_rounds() == bundle.booster.num_boosted_rounds():
+            np.testing.assert_allclose(np.expm1(hasil), np.expm1(model.predict(fitur[:n])), rtol=1e-4)
+    print(f"Paritas PrediktorPohon OK untuk {prediktor.akar.size} pohon, kedalaman {prediktor.kedalaman}, "
+          f"{n_baris} baris acak.")
+
+
+if __name__ == "__main__":
+    cek_paritas()
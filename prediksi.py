@@ -1,72 +1,145 @@
 import streamlit as st
-import joblib
 import numpy as np
 import pandas as pd
-from category_encoders import TargetEncoder
 import datetime
+import artefak
+import drift
+import kalender_tarif
+import metrik
+import penjelasan
+import registri
+from cache_prediksi import cache_hasil
+from encoder import (ONE_HOT_KATEGORI, ORDINAL_HARI, KOLOM_TARGET_ENCODE,
+                     TAHAP_ONE_HOT, TAHAP_ORDINAL, TAHAP_TARGET, TAHAP_REINDEX)
 
-# Load model dan file pendukung dengan penanganan error
+# Load model dan file pendukung dengan penanganan error.
+# Bundle (UBJSON + JSON) dipakai jika tersedia karena tidak perlu unpickle
+# objek scikit-learn/category_encoders; jika tidak, kembali ke file joblib.
+# Dengan HOTEL_REGISTRI, versi aktif registri dimuat dan diganti otomatis
+# (hot-swap) saat registri berubah; jalur prediksi selalu memakai
+# `pemegang.bundle`, sedangkan `bundle` di bawah adalah versi saat start.
 try:
-    model = joblib.load("xgboost_model.joblib")
-    model_columns = joblib.load("model_columns.joblib")
-    target_encoder = joblib.load("target_encoder.joblib")
-except FileNotFoundError:
-    st.error("File model atau encoder tidak ditemukan. Pastikan file 'xgboost_model.joblib', 'model_columns.joblib', dan 'target_encoder.joblib' berada di direktori yang sama.")
+    if registri.DIREKTORI_REGISTRI:
+        pemegang = registri.PemegangModel.dari_registri(registri.DIREKTORI_REGISTRI).pantau()
+    else:
+        pemegang = registri.PemegangModel(artefak.muat_artefak())
+        pemegang.bundle.pemanasan()
+    bundle = pemegang.bundle
+    model = bundle.booster
+    model_columns = bundle.model_columns
+    encoder = bundle.encoder
+except FileNotFoundError as e:
+    if registri.DIREKTORI_REGISTRI:
+        st.error(f"Model dari registri tidak dapat dimuat: {e}")
+    else:
+        st.error("File model atau encoder tidak ditemukan. Pastikan folder 'bundle_model' atau file 'xgboost_model.joblib', 'model_columns.joblib', dan 'target_encoder.joblib' berada di direktori yang sama.")
     st.stop()
 except Exception as e:
     st.error(f"Terjadi kesalahan saat memuat model atau encoder: {e}")
     st.stop()
 
-def prediksi_adr(input_df):
-    """
-    Fungsi ini melakukan pra-pemrosesan pada data input agar sesuai
-    dengan format yang digunakan saat training model, lalu melakukan prediksi.
-    """
-    # 1. Hotel (One-Hot Encoding Manual)
-    input_df['hotel_Resort Hotel'] = (input_df['hotel'] == 'Resort Hotel').astype(int)
-    input_df = input_df.drop('hotel', axis=1) 
+_target_encoder = None
 
-    # 2. Meal (One-Hot Encoding Manual)
-    for meal_type_val in ['FB', 'HB', 'SC', 'Undefined']:
-        input_df[f'meal_{meal_type_val}'] = (input_df['meal'] == meal_type_val).astype(int)
-    input_df = input_df.drop('meal', axis=1) 
 
-    # 3. Distribution Channel (One-Hot Encoding Manual)
-    for channel_type_val in ['Direct', 'GDS', 'TA/TO', 'Undefined']:
-        input_df[f'distribution_channel_{channel_type_val}'] = (input_df['distribution_channel'] == channel_type_val).astype(int)
-    input_df = input_df.drop('distribution_channel', axis=1) 
+def muat_target_encoder():
+    """
+    Memuat `target_encoder.joblib` saat pertama dibutuhkan. Hanya dipakai
+    jalur referensi pandas, sehingga category_encoders tidak ikut di-import
+    saat aplikasi start.
+    """
+    global _target_encoder
+    if _target_encoder is None:
+        import joblib
+        _target_encoder = joblib.load("target_encoder.joblib")
+    return _target_encoder
 
-    # 4. Deposit Type (One-Hot Encoding Manual)
-    for deposit_type_val in ['Non Refund', 'Refundable']:
-        input_df[f'deposit_type_{deposit_type_val}'] = (input_df['deposit_type'] == deposit_type_val).astype(int)
-    input_df = input_df.drop('deposit_type', axis=1) 
 
-    # 5. Customer Type (One-Hot Encoding Manual)
-    for customer_type_val in ['Group', 'Transient', 'Transient-Party']:
-        input_df[f'customer_type_{customer_type_val}'] = (input_df['customer_type'] == customer_type_val).astype(int)
-    input_df = input_df.drop('customer_type', axis=1) 
+def praproses_batch(input_df):
+    """
+    Jalur referensi pandas: mengubah DataFrame input (N baris) menjadi
+    DataFrame fitur dengan urutan `model_columns`. Prediksi memakai
+    `encoder` (EncoderTerkompilasi); fungsi ini dipertahankan sebagai acuan
+    paritas.
+    """
+    # 1-5. One-Hot Encoding manual untuk hotel, meal, distribution channel,
+    # deposit type dan customer type. Semua kolom dummy dibuat sekaligus lalu
+    # digabung satu kali agar tidak ada penyisipan kolom berulang.
+    with metrik.ukur("hotel_prediksi_tahap_detik", tahap=TAHAP_ONE_HOT, jalur="pandas"):
+        one_hot = {}
+        for kolom, kategori in ONE_HOT_KATEGORI.items():
+            nilai_kolom = input_df[kolom]
+            for nilai in kategori:
+                one_hot[f"{kolom}_{nilai}"] = (nilai_kolom == nilai).astype(int)
+        fitur_df = pd.concat(
+            [input_df.drop(columns=list(ONE_HOT_KATEGORI)), pd.DataFrame(one_hot, index=input_df.index)],
+            axis=1,
+        )
 
     # 6. Ordinal Encoding untuk 'arrival_day_of_week'
-    ordinal_map = {"Monday": 1, "Tuesday": 2, "Wednesday": 3, "Thursday": 4,
-                   "Friday": 5, "Saturday": 6, "Sunday": 7}
-    if "arrival_day_of_week" in input_df.columns:
-        input_df["arrival_day_of_week"] = input_df["arrival_day_of_week"].map(ordinal_map)
-    
+    with metrik.ukur("hotel_prediksi_tahap_detik", tahap=TAHAP_ORDINAL, jalur="pandas"):
+        if "arrival_day_of_week" in fitur_df.columns:
+            fitur_df["arrival_day_of_week"] = fitur_df["arrival_day_of_week"].map(ORDINAL_HARI)
+
     # 7. Target Encoding untuk kolom kategorikal lainnya
-    cols_to_target_encode = ["country", "market_segment", "reserved_room_type", "assigned_room_type"]
-    # Memastikan kolom ada sebelum encoding
-    cols_to_encode_present = [col for col in cols_to_target_encode if col in input_df.columns]
-    if cols_to_encode_present:
-        target_encoded_data = target_encoder.transform(input_df[cols_to_encode_present])
-        input_df[cols_to_encode_present] = target_encoded_data
+    with metrik.ukur("hotel_prediksi_tahap_detik", tahap=TAHAP_TARGET, jalur="pandas"):
+        cols_to_encode_present = [col for col in KOLOM_TARGET_ENCODE if col in fitur_df.columns]
+        if cols_to_encode_present:
+            target_encoded_data = muat_target_encoder().transform(fitur_df[cols_to_encode_present])
+            fitur_df[cols_to_encode_present] = target_encoded_data
 
     # 8. Reindex agar kolom sesuai dengan model training
     # Ini adalah langkah krusial untuk memastikan konsistensi fitur
-    input_df = input_df.reindex(columns=model_columns, fill_value=0)
-    
-    # Lakukan prediksi dan kembalikan hasil
-    log_result = model.predict(input_df)[0]
-    hasil = np.expm1(log_result)
+    with metrik.ukur("hotel_prediksi_tahap_detik", tahap=TAHAP_REINDEX, jalur="pandas"):
+        return fitur_df.reindex(columns=model_columns, fill_value=0)
+
+
+def prediksi_adr_batch(input_df):
+    """
+    Memprediksi ADR untuk seluruh baris `input_df` dengan satu kali panggilan
+    `model.predict`. Mengembalikan `np.ndarray` berisi ADR per baris.
+    """
+    return pemegang.bundle.prediksi(input_df)
+
+
+def prediksi_adr_cache(daftar_input):
+    """
+    Prediksi ADR untuk list `input_dict` lewat cache hasil bersama; hanya
+    input yang belum ada di cache yang diskor (dalam satu batch).
+    """
+    bundle = pemegang.bundle
+    with metrik.bagian_diprofil():
+        hasil = cache_hasil.ambil_atau_hitung(
+            bundle.versi, daftar_input,
+            lambda miss: bundle.prediksi({kolom: [baris[kolom] for baris in miss] for kolom in miss[0]}).tolist())
+    metrik.request_selesai()
+    drift.amati(bundle, daftar_input)
+    pemegang.bayangkan(daftar_input, hasil, bundle)
+    return hasil
+
+
+def jelaskan_adr_cache(daftar_input, metode="saabas"):
+    """
+    Prediksi ADR beserta kontribusi per field input (lihat `penjelasan`) untuk
+    list `input_dict`, lewat cache hasil bersama. Dipanggil setelah
+    `prediksi_adr_cache` untuk input yang sama, sehingga drift dan model
+    bayangan tidak dicatat dua kali.
+    """
+    bundle = pemegang.bundle
+    with metrik.bagian_diprofil():
+        hasil = cache_hasil.ambil_atau_hitung_penjelasan(
+            bundle.versi, daftar_input, metode,
+            lambda miss: penjelasan.ke_dict(*penjelasan.jelaskan(
+                bundle, {kolom: [baris[kolom] for baris in miss] for kolom in miss[0]}, metode)))
+    metrik.request_selesai()
+    return hasil
+
+
+def prediksi_adr(input_df):
+    """
+    Fungsi ini melakukan pra-pemrosesan pada data input agar sesuai
+    dengan format yang digunakan saat training model, lalu melakukan prediksi.
+    """
+    hasil = prediksi_adr_batch(input_df)[0]
     return hasil
 
 
@@ -149,6 +222,7 @@ def tampilkan_prediksi():
         # Tombol Submit Form di bagian bawah
         col_submit = st.columns(3)
         with col_submit[1]: # Center the button
+            tampilkan_alasan = st.toggle("Tampilkan alasan harga", value=False, help="Kontribusi setiap detail pemesanan terhadap harga prediksi (dihitung hanya jika diaktifkan).", key="alasan_toggle")
             submitted = st.form_submit_button("🚀 Prediksi Harga Kamar Sekarang!")
 
         if submitted:
@@ -193,16 +267,86 @@ def tampilkan_prediksi():
                 "arrival_month": arrival_date_month
             }
             
-            # Buat DataFrame dari dictionary
-            input_df = pd.DataFrame([input_dict])
-
-            # Panggil fungsi prediksi
+            # Panggil fungsi prediksi (lewat cache hasil bersama)
             with st.spinner('Sedang memprediksi harga kamar...'):
                 try:
-                    hasil = prediksi_adr(input_df)
+                    hasil = prediksi_adr_cache([input_dict])[0]
                     # Tampilkan hasil
                     st.success(f"🎉 **Harga Kamar yang Diprediksi (ADR): $ {hasil:,.2f}**")
+                    if tampilkan_alasan:
+                        # Penjelasan opsional: hanya dihitung jika diminta, ADR utama tetap dari prediksi biasa
+                        with st.expander("🔍 Mengapa harganya segini?", expanded=True):
+                            alasan = jelaskan_adr_cache([input_dict])[0]
+                            st.plotly_chart(penjelasan.plot_penjelasan(alasan), use_container_width=True)
+                            st.caption("Efek dihitung dari jalur pohon model (Saabas) dan bersifat multiplikatif terhadap harga dasar; detail yang tidak ditampilkan berpengaruh lebih kecil.")
                     st.info("💡 Catatan: Hasil ini hanyalah perkiraan berdasarkan model yang telah dilatih. Harga sebenarnya dapat bervariasi tergantung faktor lain seperti dinamika pasar, promosi khusus, dan kebijakan hotel.")
                     st.balloons()
+                    # Profil terakhir menjadi dasar kalender tarif
+                    st.session_state["profil_kalender"] = input_dict
                 except Exception as e:
-                    st.error(f"Terjadi kesalahan saat melakukan prediksi: {e}")
\ No newline at end of file
+                    st.error(f"Terjadi kesalahan saat melakukan prediksi: {e}")
+
+    tampilkan_kalender_tarif()
+
+
+@st.cache_data(show_spinner=False)
+def _buat_kalender_cache(profil_items, tahun, lama_menginap, versi_model, _bundle):
+    # versi_model ikut menjadi kunci cache agar kalender dibuat ulang saat model berganti;
+    # _bundle (tidak di-hash) adalah bundle versi tersebut
+    return kalender_tarif.buat_kalender_tarif(_bundle, dict(profil_items), tahun,
+                                              lama_menginap=list(lama_menginap))
+
+
+@st.cache_data(show_spinner=False)
+def _kalender_csv_cache(profil_items, tahun, lama_menginap, versi_model, _bundle):
+    # CSV seluruh grid (ratusan ribu baris) dibuat sekali per kalender, bukan setiap rerun
+    return _buat_kalender_cache(profil_items, tahun, lama_menginap, versi_model, _bundle).to_csv(index=False)
+
+
+def tampilkan_kalender_tarif():
+    """
+    Menampilkan kalender tarif (heat-map ADR prediksi per tanggal) untuk
+    profil booking terakhir yang diprediksi, atau profil bawaan form.
+    """
+    st.markdown("---")
+    st.header("📅 Kalender Tarif")
+    st.markdown("""
+        Prediksi ADR untuk setiap tanggal kedatangan dalam satu tahun, untuk kedua tipe hotel,
+        setiap kombinasi tipe kamar dipesan/diberikan dan beberapa lama menginap sekaligus. Detail booking lainnya
+        mengikuti prediksi terakhir Anda (atau nilai bawaan form).
+    """)
+    profil = st.session_state.get("profil_kalender", artefak.INPUT_BAWAAN)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        tahun = st.number_input("Tahun Kedatangan", min_value=2015, max_value=2100,
+                                value=datetime.date.today().year, key="tahun_kalender")
+    with col2:
+        lama_menginap = st.multiselect("Lama Menginap (malam)", list(range(1, 15)),
+                                       default=kalender_tarif.LAMA_MENGINAP, key="lama_kalender")
+    if not lama_menginap:
+        st.warning("⚠️ Pilih minimal satu lama menginap.")
+        return
+
+    bundle = pemegang.bundle
+    kunci = (tuple(sorted(profil.items())), int(tahun), tuple(sorted(lama_menginap)), bundle.versi, bundle)
+    with st.spinner('Sedang menyusun kalender tarif...'):
+        kalender = _buat_kalender_cache(*kunci)
+
+    col3, col4, col5, col6 = st.columns(4)
+    with col3:
+        hotel = st.selectbox("Tipe Hotel", kalender_tarif.HOTEL, key="hotel_kalender")
+    with col4:
+        kamar = st.selectbox("Kamar Dipesan", kalender_tarif.KAMAR_DIPESAN, key="kamar_kalender")
+    with col5:
+        # Bawaan: kamar yang diberikan sama dengan yang dipesan
+        kamar_diberikan = st.selectbox("Kamar Diberikan", kalender_tarif.KAMAR_DIBERIKAN,
+                                       index=kalender_tarif.KAMAR_DIBERIKAN.index(kamar),
+                                       key=f"kamar_diberikan_kalender_{kamar}")
+    with col6:
+        lama = st.selectbox("Lama Menginap", sorted(lama_menginap), key="lama_tampil_kalender")
+
+    st.plotly_chart(kalender_tarif.plot_kalender_tarif(kalender, hotel, kamar, kamar_diberikan, lama),
+                    use_container_width=True)
+    st.download_button("⬇️ Unduh Kalender Tarif (CSV)", _kalender_csv_cache(*kunci),
+                       file_name=f"kalender_tarif_{int(tahun)}.csv", mime="text/csv")
\ No newline at end of file
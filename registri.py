@@ -0,0 +1,343 @@
+"""
+Registri model lokal berversi, dengan hot-swap atomik dan skor bayangan.
+
+Setiap versi adalah satu set artefak hasil `latih.py`/`perbarui.py` di
+folder `<registri>/<versi>/`. `bundle_model/manifest.json` di dalamnya
+mengikat model, daftar kolom dan encoder lewat checksum, dan nama versi
+adalah hash isi file tersebut. `registri.json` mencatat versi yang
+dilayani (`aktif`) dan kandidat untuk skor bayangan:
+
+    model_versi/
+        registri.json
+        4c22813112eb/   bundle_model/, statistik_target.json, *.joblib, laporan_*.json
+        dee1815a82e6/   ...
+
+Keluaran `perbarui.py --keluaran model_versi` langsung berada di registri;
+hasil `latih.py` ditambahkan dengan `tambah`:
+
+    python registri.py daftar
+    python registri.py tambah model_baru
+    python registri.py aktifkan dee1815a82e6
+    python registri.py bayangan dee1815a82e6 --fraksi 0.05
+    python registri.py bayangan --hentikan
+
+Aplikasi (`HOTEL_REGISTRI=model_versi`) dan layanan API (`--registri`)
+memuat versi aktif lewat `PemegangModel`, lalu memantau `registri.json`.
+Versi baru dimuat, diverifikasi dan dipanaskan di thread background, baru
+kemudian menggantikan versi lama dengan satu assignment referensi, tanpa
+restart proses.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import artefak
+import metrik
+
+FILE_REGISTRI = "registri.json"
+# Registri dipakai aplikasi/layanan jika variabel ini diisi (mis. "model_versi")
+DIREKTORI_REGISTRI = os.environ.get("HOTEL_REGISTRI") or None
+INTERVAL_PANTAU = float(os.environ.get("HOTEL_REGISTRI_INTERVAL", "5"))
+MAKS_RIWAYAT = 50
+
+
+def path_bundle(direktori, versi):
+    return os.path.join(direktori, versi, artefak.DIREKTORI_BUNDLE)
+
+
+def baca_registri(direktori):
+    """Isi `registri.json`, atau registri kosong jika belum ada."""
+    data = {"aktif": None, "bayangan": None, "fraksi_bayangan": 0.0, "riwayat": []}
+    path = os.path.join(direktori, FILE_REGISTRI)
+    if os.path.exists(path):
+        with open(path) as f:
+            data.update(json.load(f))
+    return data
+
+
+def _tulis_registri(direktori, data):
+    """Menulis `registri.json` secara atomik (file sementara lalu os.replace)."""
+    sementara = os.path.join(direktori, f".{FILE_REGISTRI}.{os.getpid()}")
+    with open(sementara, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(sementara, os.path.join(direktori, FILE_REGISTRI))
+
+
+def daftar_versi(direktori):
+    """Manifest setiap versi di registri (tanpa cek checksum), dari yang terlama."""
+    hasil = []
+    for nama in sorted(os.listdir(direktori)) if os.path.isdir(direktori) else []:
+        if os.path.exists(os.path.join(path_bundle(direktori, nama), artefak.FILE_MANIFEST)):
+            hasil.append(artefak.baca_manifest(path_bundle(direktori, nama), verifikasi=False))
+    return sorted(hasil, key=lambda manifest: manifest.get("dibuat", ""))
+
+
+def periksa_versi(direktori, versi):
+    """Manifest `versi` setelah checksum setiap file bundle-nya dicocokkan."""
+    path = path_bundle(direktori, versi)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Versi '{versi}' tidak ada di registri '{direktori}'.")
+    manifest = artefak.baca_manifest(path)
+    if manifest["versi"] != versi:
+        raise ValueError(f"Folder '{versi}' berisi bundle versi {manifest['versi']}.")
+    return manifest
+
+
+def muat_versi(direktori, versi):
+    """Bundle `versi` yang sudah diverifikasi dan dipanaskan, siap dilayani."""
+    periksa_versi(direktori, versi)
+    bundle = artefak.muat_artefak(path_bundle(direktori, versi))
+    bundle.pemanasan()
+    return bundle
+
+
+def tambah(direktori, sumber):
+    """
+    Menyalin set artefak `sumber` (folder hasil `latih.py` berisi
+    bundle_model/, atau folder bundle itu sendiri) ke `<direktori>/<versi>/`.
+    Mengembalikan versi; versi yang sudah ada tidak disalin ulang.
+    """
+    hanya_bundle = os.path.exists(os.path.join(sumber, artefak.FILE_MANIFEST))
+    manifest = artefak.baca_manifest(sumber if hanya_bundle else os.path.join(sumber, artefak.DIREKTORI_BUNDLE))
+    tujuan = os.path.join(direktori, manifest["versi"])
+    if not os.path.exists(tujuan):
+        os.makedirs(direktori, exist_ok=True)
+        sementara = os.path.join(direktori, f".sementara_{os.getpid()}")
+        shutil.rmtree(sementara, ignore_errors=True)
+        shutil.copytree(sumber, os.path.join(sementara, artefak.DIREKTORI_BUNDLE) if hanya_bundle else sementara)
+        os.replace(sementara, tujuan)
+    return manifest["versi"]
+
+
+def aktifkan(direktori, versi):
+    """
+    Menjadikan `versi` versi yang dilayani. Versi dimuat dan dipanaskan sekali
+    di proses ini dulu, sehingga versi yang rusak ditolak sebelum proses yang
+    melayani mencoba memuatnya.
+    """
+    muat_versi(direktori, versi)
+    data = baca_registri(direktori)
+    if data["aktif"] != versi:
+        data["riwayat"] = (data["riwayat"] + [{"versi": versi, "sebelumnya": data["aktif"],
+                                               "waktu": time.strftime("%Y-%m-%dT%H:%M:%S")}])[-MAKS_RIWAYAT:]
+    data["aktif"] = versi
+    if data["bayangan"] == versi:
+        data["bayangan"], data["fraksi_bayangan"] = None, 0.0
+    _tulis_registri(direktori, data)
+    return data
+
+
+def atur_bayangan(direktori, versi, fraksi=0.05):
+    """Menjadikan `versi` kandidat skor bayangan untuk `fraksi` request; `versi=None` menghentikannya."""
+    if versi is not None:
+        if not 0 < fraksi <= 1:
+            raise ValueError("Fraksi bayangan harus di antara 0 (eksklusif) dan 1.")
+        muat_versi(direktori, versi)
+    data = baca_registri(direktori)
+    data["bayangan"], data["fraksi_bayangan"] = versi, fraksi if versi is not None else 0.0
+    _tulis_registri(direktori, data)
+    return data
+
+
+class PemegangModel:
+    """
+    Bundle yang sedang dilayani, plus kandidat bayangan opsional.
+
+    Pemanggil mengambil `pemegang.bundle` sekali per request/batch dan memakai
+    objek itu sampai selesai. Pergantian versi hanya mengganti referensi
+    tersebut setelah bundle baru selesai dimuat dan dipanaskan, sehingga
+    tidak ada request yang melihat campuran model dan encoder dua versi.
+    """
+
+    def __init__(self, bundle, direktori=None):
+        self.bundle = bundle
+        self.direktori = direktori
+        self.bayangan = None
+        self.fraksi_bayangan = 0.0
+        self.statistik = {"ganti_versi": 0, "gagal_muat": 0, "bayangan_request": 0,
+                          "bayangan_baris": 0, "bayangan_dilewati": 0}
+        # _kunci menyerialkan sinkronkan (bisa lama); _kunci_bayangan hanya
+        # menjaga tanda _sibuk sehingga request tidak pernah menunggu pemuatan
+        self._kunci = threading.Lock()
+        self._kunci_bayangan = threading.Lock()
+        self._mtime = None
+        self._berhenti = threading.Event()
+        self._thread = None
+        self._acak = random.Random()
+        self._sibuk = False
+        # Skor bayangan berjalan di satu thread sendiri; histogram tahap
+        # prediksi di thread itu tidak dicatat agar tidak bercampur
+        self._eksekutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bayangan",
+                                             initializer=metrik.diamkan_thread,
+                                             initargs=("hotel_prediksi_tahap_detik",))
+
+    @classmethod
+    def dari_registri(cls, direktori):
+        """Memuat versi aktif (dan kandidat bayangan) di `direktori`."""
+        data = baca_registri(direktori)
+        if data["aktif"] is None:
+            raise FileNotFoundError(f"Registri '{direktori}' belum punya versi aktif; "
+                                    "jalankan 'python registri.py aktifkan <versi>'.")
+        pemegang = cls(muat_versi(direktori, data["aktif"]), direktori)
+        pemegang.sinkronkan()
+        return pemegang
+
+    def sinkronkan(self):
+        """
+        Menyamakan versi aktif dan bayangan dengan `registri.json` jika file itu
+        berubah. Versi baru dimuat di thread pemanggil; jika gagal, versi lama
+        tetap dilayani dan versi itu tidak dicoba lagi sampai registri berubah.
+        """
+        with self._kunci:
+            try:
+                mtime = os.stat(os.path.join(self.direktori, FILE_REGISTRI)).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            data = baca_registri(self.direktori)
+
+            if data["aktif"] and data["aktif"] != self.bundle.versi:
+                # Kandidat yang dipromosikan sudah dimuat dan dipanaskan
+                baru = (self.bayangan if self.bayangan is not None and self.bayangan.versi == data["aktif"]
+                        else self._muat(data["aktif"]))
+                if baru is not None:
+                    lama, self.bundle = self.bundle, baru
+                    self.statistik["ganti_versi"] += 1
+                    metrik.log_json("versi_diganti", dari=lama.versi, ke=baru.versi)
+
+            versi_bayangan = data["bayangan"]
+            if versi_bayangan != (self.bayangan.versi if self.bayangan is not None else None):
+                self.fraksi_bayangan = 0.0
+                self.bayangan = self._muat(versi_bayangan) if versi_bayangan else None
+            self.fraksi_bayangan = float(data["fraksi_bayangan"]) if self.bayangan is not None else 0.0
+
+    def _muat(self, versi):
+        try:
+            return muat_versi(self.direktori, versi)
+        except Exception as e:
+            self.statistik["gagal_muat"] += 1
+            metrik.log_json("versi_gagal_dimuat", versi=versi, error=str(e))
+            return None
+
+    def pantau(self, interval=INTERVAL_PANTAU):
+        """Memulai thread daemon yang memanggil `sinkronkan` setiap `interval` detik."""
+        if self.direktori is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._putaran, args=(interval,),
+                                            name="pantau-registri", daemon=True)
+            self._thread.start()
+        return self
+
+    def _putaran(self, interval):
+        while not self._berhenti.wait(interval):
+            try:
+                self.sinkronkan()
+            except Exception as e:
+                # Mis. registri.json sedang ditulis tangan dan belum valid
+                metrik.log_json("registri_gagal_dibaca", error=str(e))
+
+    def berhenti(self):
+        self._berhenti.set()
+        self._eksekutor.shutdown(wait=False)
+
+    def bayangkan(self, daftar_input, adr, bundle):
+        """
+        Dengan peluang `fraksi_bayangan`, menjadwalkan skor `daftar_input`
+        (list dict) dengan kandidat bayangan, lalu mencatat latensinya dan
+        selisih terhadap `adr` yang sudah dilayani `bundle`. Hasil yang
+        dilayani tidak pernah diubah atau ditunda; jika skor bayangan
+        sebelumnya belum selesai, sampel ini dilewati.
+        """
+        bayangan = self.bayangan
+        if bayangan is None or bayangan.versi == bundle.versi or self._acak.random() >= self.fraksi_bayangan:
+            return
+        with self._kunci_bayangan:
+            if self._sibuk:
+                self.statistik["bayangan_dilewati"] += 1
+                return
+            self._sibuk = True
+        self._eksekutor.submit(self._skor_bayangan, bayangan, bundle.versi, daftar_input, adr)
+
+    def _skor_bayangan(self, bayangan, versi_dilayani, daftar_input, adr):
+        try:
+            kolom = {nama: [baris[nama] for baris in daftar_input] for nama in daftar_input[0]}
+            mulai = time.perf_counter()
+            adr_kandidat = bayangan.prediksi(kolom)
+            durasi = time.perf_counter() - mulai
+            adr = np.asarray(adr, dtype=np.float64)
+            rasio = np.abs(adr_kandidat - adr) / np.maximum(np.abs(adr), 1.0)
+            metrik.amati("hotel_bayangan_detik", durasi, versi=bayangan.versi)
+            metrik.amati_banyak("hotel_bayangan_selisih_rasio", rasio.tolist(), versi=bayangan.versi)
+            self.statistik["bayangan_request"] += 1
+            self.statistik["bayangan_baris"] += len(adr)
+            metrik.log_json("bayangan", versi=bayangan.versi, dilayani=versi_dilayani, baris=len(adr),
+                            durasi_ms=round(durasi * 1000, 4), selisih_rata=round(float(rasio.mean()), 6),
+                            selisih_maks=round(float(rasio.max()), 6))
+        except Exception as e:
+            metrik.log_json("bayangan_gagal", versi=bayangan.versi, error=str(e))
+        finally:
+            self._sibuk = False
+
+    def info(self):
+        """Versi aktif/bayangan dan penghitung, untuk /health."""
+        return {"versi_aktif": self.bundle.versi,
+                "versi_bayangan": self.bayangan.versi if self.bayangan is not None else None,
+                "fraksi_bayangan": self.fraksi_bayangan, **self.statistik}
+
+    def gauge(self):
+        """Penghitung registri dan bayangan sebagai gauge untuk /metrics."""
+        return {"hotel_registri_ganti_versi": self.statistik["ganti_versi"],
+                "hotel_registri_gagal_muat": self.statistik["gagal_muat"],
+                "hotel_bayangan_fraksi": self.fraksi_bayangan,
+                "hotel_bayangan_request": self.statistik["bayangan_request"],
+                "hotel_bayangan_baris": self.statistik["bayangan_baris"],
+                "hotel_bayangan_dilewati": self.statistik["bayangan_dilewati"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registri model ADR lokal berversi.")
+    parser.add_argument("--registri", default=DIREKTORI_REGISTRI or "model_versi", help="Folder registri.")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    sub.add_parser("daftar", help="Daftar versi beserta status aktif/bayangan.")
+    p = sub.add_parser("tambah", help="Salin set artefak (hasil latih.py) ke registri.")
+    p.add_argument("sumber")
+    p = sub.add_parser("aktifkan", help="Layani versi ini (proses yang berjalan ikut berganti).")
+    p.add_argument("versi")
+    p = sub.add_parser("bayangan", help="Skor sebagian request dengan versi kandidat tanpa melayaninya.")
+    p.add_argument("versi", nargs="?")
+    p.add_argument("--fraksi", type=float, default=0.05, help="Fraksi request yang ikut diskor kandidat.")
+    p.add_argument("--hentikan", action="store_true", help="Hentikan skor bayangan.")
+    args = parser.parse_args()
+
+    try:
+        if args.perintah == "daftar":
+            data = baca_registri(args.registri)
+            for manifest in daftar_versi(args.registri):
+                status = ("aktif" if manifest["versi"] == data["aktif"] else
+                          f"bayangan {data['fraksi_bayangan']:.0%}" if manifest["versi"] == data["bayangan"] else "")
+                print(f"{manifest['versi']}  {manifest.get('dibuat', '-'):19s}  {status:14s}  "
+                      f"induk={manifest.get('induk', '-')}  rmse_holdout="
+                      f"{manifest.get('metrik_holdout', {}).get('rmse_log', '-')}")
+        elif args.perintah == "tambah":
+            print(tambah(args.registri, args.sumber))
+        elif args.perintah == "aktifkan":
+            print(json.dumps(aktifkan(args.registri, args.versi), indent=1))
+        elif args.hentikan or args.versi is None:
+            print(json.dumps(atur_bayangan(args.registri, None), indent=1))
+        else:
+            print(json.dumps(atur_bayangan(args.registri, args.versi, args.fraksi), indent=1))
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Job skor batch untuk file booking besar (misalnya reprice harian seluruh
+tabel reservasi).
+
+File CSV/Parquet dibaca per chunk berukuran tetap, setiap chunk di-encode
+dengan `EncoderTerkompilasi` yang sama dengan `prediksi_adr` lalu diskor di
+process pool. Setiap pekerja memuat bundle model sekali dan memakai jumlah
+thread XGBoost yang tetap, sehingga throughput naik hampir linear dengan
+jumlah core:
+
+    python skor_batch.py reservasi.parquet --keluaran harga/ --pekerja 4
+
+Hasil ditulis ke folder `--keluaran` sebagai dataset Parquet berisi satu
+file per chunk (`bagian-00000.parquet`, ...) dengan urutan input; kolom
+`baris` berisi nomor baris input dan `adr_prediksi` hasil prediksi. Setiap
+file ditulis atomik saat chunk selesai, sehingga job yang terhenti
+dilanjutkan dari chunk terakhir yang sudah tertulis cukup dengan menjalankan
+perintah yang sama lagi. Memori puncak dibatasi oleh jumlah chunk yang
+sedang diproses (`--antrian` per pekerja), bukan ukuran file.
+
+Kolom yang dibaca adalah kolom input encoder model (`kolom_sumber`), jadi
+fitur seperti `arrival_week` ikut terbaca jika ada di file. `--cek`
+membandingkan hasil dengan `Bundle.prediksi` pada seluruh frame input
+(sampai `--cek-baris` baris pertama).
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import artefak
+from encoder import ONE_HOT_KATEGORI
+
+FILE_META = "_meta.json"
+POLA_BAGIAN = "bagian-{:05d}.parquet"
+KOLOM_HASIL = "adr_prediksi"
+
+# Kolom one-hot wajib ada di input (seperti jalur pandas); kolom lain bernilai 0 jika tidak ada
+KOLOM_ONE_HOT = list(ONE_HOT_KATEGORI)
+
+# Bundle milik proses pekerja, dimuat sekali oleh `_mulai_pekerja`
+_bundle = None
+
+
+def _mulai_pekerja(direktori_bundle, nthread):
+    """Initializer process pool: memuat model dan encoder sekali per pekerja."""
+    global _bundle
+    _bundle = artefak.muat_artefak(direktori_bundle)
+    _bundle.booster.set_param({"nthread": nthread})
+    _bundle.pemanasan()
+
+
+def _info_pekerja():
+    """Versi model dan kolom input encoder di proses pekerja."""
+    return _bundle.versi, _bundle.encoder.kolom_sumber
+
+
+def _skor_chunk(df):
+    """Prediksi ADR (float32) untuk satu chunk di proses pekerja."""
+    return _bundle.prediksi(df).astype(np.float32)
+
+
+def baca_chunk(path, ukuran_chunk, kolom, lewati=0):
+    """
+    Yield (DataFrame, nomor baris pertama) berisi kolom `kolom` yang ada di
+    file, per chunk berisi paling banyak `ukuran_chunk` baris. `lewati`
+    chunk pertama dilewati: Parquet tanpa dikonversi ke DataFrame, CSV
+    dibaca lalu dibuang per chunk agar memori tidak tumbuh dengan `lewati`.
+    """
+    baris = 0
+    if path.endswith(".parquet"):
+        berkas = pq.ParquetFile(path)
+        ada = [k for k in kolom if k in berkas.schema_arrow.names]
+        for i, batch in enumerate(berkas.iter_batches(batch_size=ukuran_chunk, columns=ada)):
+            if i >= lewati:
+                yield batch.to_pandas(), baris
+            baris += batch.num_rows
+    else:
+        # `skiprows=range(...)` diubah pandas menjadi set berisi semua nomor baris yang dilewati
+        for i, df in enumerate(pd.read_csv(path, chunksize=ukuran_chunk, usecols=lambda k: k in kolom)):
+            if i >= lewati:
+                yield df, baris
+            baris += len(df)
+
+
+def _cek_meta(keluaran, meta):
+    """
+    Menulis `_meta.json` untuk job baru, atau memastikan job yang dilanjutkan
+    memakai input, model dan ukuran chunk yang sama. Mengembalikan jumlah
+    chunk yang sudah tertulis.
+    """
+    path_meta = os.path.join(keluaran, FILE_META)
+    if os.path.exists(path_meta):
+        with open(path_meta) as f:
+            lama = json.load(f)
+        beda = [k for k in ("input", "ukuran_input", "versi_model", "ukuran_chunk", "bawa")
+                if lama.get(k) != meta[k]]
+        if beda:
+            raise ValueError(f"Folder '{keluaran}' berisi job lain (beda: {', '.join(beda)}); "
+                             "pakai --ulang atau folder keluaran lain.")
+    else:
+        with open(path_meta, "w") as f:
+            json.dump(meta, f, indent=1)
+
+    for sisa in glob.glob(os.path.join(keluaran, "*.tmp")):
+        os.remove(sisa)
+    selesai = 0
+    while os.path.exists(os.path.join(keluaran, POLA_BAGIAN.format(selesai))):
+        selesai += 1
+    return selesai
+
+
+def _tulis_bagian(keluaran, nomor, df, baris, adr, bawa):
+    """Menulis satu chunk hasil secara atomik (file sementara lalu rename)."""
+    kolom = {"baris": pa.array(np.arange(baris, baris + len(df), dtype=np.int64))}
+    kolom.update({k: pa.array(df[k]) for k in bawa})
+    kolom[KOLOM_HASIL] = pa.array(adr)
+    path = os.path.join(keluaran, POLA_BAGIAN.format(nomor))
+    pq.write_table(pa.table(kolom), path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def skor_file(path_input, keluaran, direktori_bundle=artefak.DIREKTORI_BUNDLE, ukuran_chunk=100_000,
+              pekerja=None, thread_per_pekerja=1, antrian=2, bawa=(), ulang=False, log=print):
+    """Menjalankan job skor batch dan mengembalikan ringkasan (dict)."""
+    pekerja = pekerja or max(1, (os.cpu_count() or 1) // thread_per_pekerja)
+    bawa = list(bawa)
+    os.makedirs(keluaran, exist_ok=True)
+    if ulang:
+        for path in glob.glob(os.path.join(keluaran, "bagian-*.parquet")) + [os.path.join(keluaran, FILE_META)]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    konteks = multiprocessing.get_context("spawn")
+    # Model hanya dimuat di proses pekerja; proses utama cukup membaca dan menulis
+    with ProcessPoolExecutor(pekerja, mp_context=konteks, initializer=_mulai_pekerja,
+                             initargs=(direktori_bundle, thread_per_pekerja)) as eksekutor:
+        versi, kolom_sumber = eksekutor.submit(_info_pekerja).result()
+        # Hanya kolom yang dipakai encoder (ditambah --bawa) yang dibaca dari file
+        kolom = set(kolom_sumber) | set(KOLOM_ONE_HOT) | set(bawa)
+        meta = {"input": os.path.abspath(path_input), "ukuran_input": os.path.getsize(path_input),
+                "versi_model": versi, "ukuran_chunk": ukuran_chunk, "bawa": bawa}
+        selesai = _cek_meta(keluaran, meta)
+        if selesai:
+            log(f"Melanjutkan dari chunk {selesai}.")
+        log(f"{pekerja} pekerja x {thread_per_pekerja} thread XGBoost, chunk {ukuran_chunk} baris.")
+        mulai = time.perf_counter()
+        n_baris = 0
+        nomor = selesai
+        # Chunk yang sedang diskor, dalam urutan input; hasil ditulis dari depan antrian
+        berjalan = deque()
+
+        def tulis_terdepan():
+            nonlocal nomor, n_baris
+            df, baris, hasil = berjalan.popleft()
+            _tulis_bagian(keluaran, nomor, df, baris, hasil.result(), bawa)
+            nomor += 1
+            n_baris += len(df)
+            log(f"Chunk {nomor - 1} ({baris + len(df)} baris), "
+                f"{n_baris / (time.perf_counter() - mulai):,.0f} baris/detik")
+
+        for i, (df, baris) in enumerate(baca_chunk(path_input, ukuran_chunk, kolom, lewati=selesai)):
+            if i == 0:
+                kurang = [k for k in KOLOM_ONE_HOT + bawa if k not in df.columns]
+                if kurang:
+                    raise ValueError(f"Kolom wajib tidak ada di '{path_input}': {', '.join(kurang)}")
+            berjalan.append((df[bawa], baris, eksekutor.submit(_skor_chunk, df)))
+            if len(berjalan) >= pekerja * antrian:
+                tulis_terdepan()
+        while berjalan:
+            tulis_terdepan()
+
+    durasi = time.perf_counter() - mulai
+    ringkasan = {"chunk": nomor, "baris_diskor": n_baris, "durasi_detik": round(durasi, 2),
+                 "baris_per_detik": round(n_baris / durasi, 1) if durasi else None,
+                 "pekerja": pekerja, "thread_per_pekerja": thread_per_pekerja, "versi_model": versi}
+    with open(os.path.join(keluaran, FILE_META), "w") as f:
+        json.dump({**meta, "selesai": ringkasan}, f, indent=1)
+    log(f"Selesai: {n_baris} baris dalam {durasi:.1f} detik, hasil di '{keluaran}'.")
+    return ringkasan
+
+
+def cek_hasil(path_input, keluaran, direktori_bundle=artefak.DIREKTORI_BUNDLE, maks_baris=200_000):
+    """
+    Membandingkan hasil job di `keluaran` dengan `Bundle.prediksi` pada
+    `maks_baris` baris pertama input yang dibaca utuh (semua kolom).
+    Mengembalikan selisih absolut maksimum; ValueError jika melebihi 1e-3.
+    """
+    if path_input.endswith(".parquet"):
+        df = next(pq.ParquetFile(path_input).iter_batches(batch_size=maks_baris)).to_pandas()
+    else:
+        df = pd.read_csv(path_input, nrows=maks_baris)
+    harapan = artefak.muat_artefak(direktori_bundle).prediksi(df).astype(np.float32)
+    hasil = pd.read_parquet(keluaran, columns=["baris", KOLOM_HASIL])
+    hasil = hasil[hasil["baris"] < len(df)].sort_values("baris")[KOLOM_HASIL].to_numpy()
+    if len(hasil) != len(df):
+        raise ValueError(f"Hasil berisi {len(hasil)} dari {len(df)} baris yang dicek.")
+    selisih = float(np.max(np.abs(hasil - harapan))) if len(df) else 0.0
+    if selisih > 1e-3:
+        raise ValueError(f"Hasil skor batch berbeda dari Bundle.prediksi (selisih maksimum {selisih:.6f}).")
+    return selisih
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skor batch ADR untuk file booking CSV/Parquet besar.")
+    parser.add_argument("input", help="File CSV atau Parquet dengan kolom yang sama seperti form prediksi.")
+    parser.add_argument("--keluaran", required=True, help="Folder dataset Parquet hasil.")
+    parser.add_argument("--bundle", default=artefak.DIREKTORI_BUNDLE, help="Folder bundle model.")
+    parser.add_argument("--ukuran-chunk", type=int, default=100_000)
+    parser.add_argument("--pekerja", type=int, default=None, help="Jumlah proses (bawaan: core / thread).")
+    parser.add_argument("--thread-per-pekerja", type=int, default=1, help="nthread XGBoost per proses.")
+    parser.add_argument("--antrian", type=int, default=2, help="Chunk yang boleh diproses per pekerja.")
+    parser.add_argument("--bawa", nargs="*", default=[],
+                        help="Kolom input yang ikut disalin ke hasil, misalnya id booking.")
+    parser.add_argument("--ulang", action="store_true", help="Hapus hasil sebelumnya dan mulai dari awal.")
+    parser.add_argument("--cek", action="store_true",
+                        help="Bandingkan hasil dengan Bundle.prediksi pada frame input utuh.")
+    parser.add_argument("--cek-baris", type=int, default=200_000, help="Jumlah baris pertama yang dicek.")
+    args = parser.parse_args()
+    skor_file(args.input, args.keluaran, args.bundle, args.ukuran_chunk, args.pekerja,
+              args.thread_per_pekerja, args.antrian, args.bawa, args.ulang)
+    if args.cek:
+        selisih = cek_hasil(args.input, args.keluaran, args.bundle, args.cek_baris)
+        print(f"Cek paritas: selisih maksimum dengan Bundle.prediksi {selisih:.2e}.")
+
+
+if __name__ == "__main__":
+    main()